@@ -0,0 +1,42 @@
+"""
+Configuration gunicorn - Déploiement multi-workers (workers uvicorn)
+Le master vérifie l'instantané du corpus construit au build (et ne le reconstruit
+que s'il ne correspond plus à la base) avant de lancer les workers ; chacun le
+mappe en lecture seule (mmap) : le cache de pages
+est partagé, le débit suit le nombre de cœurs sans multiplier la RAM.
+
+Usage: gunicorn main:app -c gunicorn.conf.py
+Rechargement du corpus : scripts/build_snapshot.py puis CORPUS_RELOAD_INTERVAL,
+ou kill -HUP <master> (remplacement gracieux des workers).
+"""
+
+import asyncio
+import multiprocessing
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", str(min(multiprocessing.cpu_count(), 4))))
+worker_class = "uvicorn.workers.UvicornWorker"
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "30"))  # in-flight LLM answers on reload / shutdown
+keepalive = 5
+
+
+def on_starting(server):
+    """
+    Fallback for the snapshot built with the image: rebuild it in the master only if it is
+    missing or no longer matches the database, so no worker loads everything from the DB.
+    A snapshot built for another embedding model is kept (workers load only the vectors).
+    """
+    from services.snapshot import refresh_snapshot
+
+    try:
+        manifest = asyncio.run(refresh_snapshot(match_model=False))
+    except Exception as e:
+        print(f"⚠️ Snapshot non construit ({e}) - chaque worker chargera la base")
+        return
+    if manifest is not None:
+        print(f"📸 Snapshot corpus v{manifest['corpus_version']} construit ({manifest['version']})")
@@ -1,16 +1,24 @@
 """
 Chatbot Juridique DZ - Backend FastAPI
-RAG complet avec FAISS + Embeddings + LLM (GPT/LLaMA)
+RAG complet avec index vectoriel (exact / IVF) + Embeddings + LLM (GPT/LLaMA)
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List, Optional
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from typing import List, Optional, Dict, Any, Literal
+import asyncio
 import os
+import json
+import signal
+import threading
 from dotenv import load_dotenv
 
 from services.rag_service import RAGService
+from services.scoring_pool import ScoringPoolSaturated
+from services.http_client import HTTPClient
+from services.database import ARTICLE_FIELDS, LIST_FIELDS
 
 # Load environment variables
 load_dotenv()
@@ -29,16 +37,39 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
+# Shared HTTP connection pool (Jina + Groq)
+http_client = HTTPClient()
+
 # Initialize RAG service
-rag_service = RAGService()
+rag_service = RAGService(http_client=http_client)
 
 
 # Request/Response models
+SortOrder = Literal["relevance", "prison_desc", "prison_asc", "amende_desc", "amende_asc"]
+
+class SearchFilters(BaseModel):
+    min_prison_mois: Optional[float] = None  # peine maximale >= (perpétuité / mort incluses)
+    max_prison_mois: Optional[float] = None  # peine maximale <= (hors perpétuité / mort)
+    min_amende: Optional[int] = None  # amende maximale >= (DA)
+    max_amende: Optional[int] = None  # amende maximale <= (DA)
+    section: Optional[str] = None
+    categorie: Optional[str] = None
+    livre: Optional[str] = None
+
 class ChatRequest(BaseModel):
     question: str
     use_llm: bool = True  # Use LLM for natural response
+    filters: Optional[SearchFilters] = None
+    sort: SortOrder = "relevance"
+
+class ArticleSearchRequest(BaseModel):
+    query: str = ""  # empty: structured filters only
+    filters: Optional[SearchFilters] = None
+    sort: SortOrder = "relevance"
+    limit: int = Field(10, ge=1, le=100)
     
 class CrimeResult(BaseModel):
     id: int
@@ -50,20 +81,92 @@ class CrimeResult(BaseModel):
     description: str
     score: float
 
+DISCLAIMER = "⚠️ Cette réponse est une information juridique générale et ne constitue pas un avis juridique personnalisé."
+
 class ChatResponse(BaseModel):
     response: str
     crimes: List[CrimeResult]
     llm_provider: str
-    disclaimer: str = "⚠️ Cette réponse est une information juridique générale et ne constitue pas un avis juridique personnalisé."
+    disclaimer: str = DISCLAIMER
+
+class ArticleSearchResponse(BaseModel):
+    articles: List[CrimeResult]
+    total: int
+
+CHAT_BATCH_MAX = int(os.getenv("CHAT_BATCH_MAX", "1000"))
+CHAT_BATCH_CONCURRENCY = int(os.getenv("CHAT_BATCH_CONCURRENCY", "4"))  # concurrent LLM calls per batch
+
+class ChatBatchRequest(BaseModel):
+    questions: List[str] = Field(..., min_length=1, max_length=CHAT_BATCH_MAX)
+    use_llm: bool = True
+    stream: bool = False  # NDJSON, one line per answer as soon as it is ready
+
+class ChatBatchItem(ChatResponse):
+    index: int
+    question: str
+    error: Optional[str] = None  # this answer failed (the others are still returned)
+
+class ChatBatchResponse(BaseModel):
+    results: List[ChatBatchItem]
+
+
+@app.exception_handler(ScoringPoolSaturated)
+async def scoring_saturated_handler(request: Request, exc: ScoringPoolSaturated):
+    """Backpressure: the scoring queue is full, fail fast instead of queueing"""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Search capacity exceeded, retry shortly"},
+        headers={"Retry-After": "1"}
+    )
+
+
+def to_crime_results(results: List[Dict[str, Any]]) -> List[CrimeResult]:
+    """Format RAG search results for the API"""
+    return [
+        CrimeResult(
+            id=r["id"],
+            crime=r["crime"],
+            article=r["article"],
+            categorie=r["categorie"],
+            prison=r["penalty"]["prison"],
+            amende=r["penalty"]["amende"],
+            description=r["description"],
+            score=r["score"]
+        )
+        for r in results
+    ]
+
+
+def sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Format one server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
 
 
 @app.on_event("startup")
 async def startup_event():
     """Load data and initialize LLM on startup"""
+    await http_client.start()
     await rag_service.initialize()
+    # kill -HUP <pid>: swap in the latest corpus snapshot now (under gunicorn, HUP the
+    # master instead: workers are replaced gracefully and open the new version).
+    # Signal handlers need the main thread (not the case under TestClient) and POSIX
+    if threading.current_thread() is threading.main_thread() and hasattr(signal, "SIGHUP"):
+        try:
+            asyncio.get_running_loop().add_signal_handler(
+                signal.SIGHUP, lambda: asyncio.create_task(rag_service.refresh())
+            )
+        except (NotImplementedError, RuntimeError):
+            pass
     print("✅ RAG Service LITE initialized")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Close pooled HTTP connections and the database"""
+    await rag_service.close()
+    await http_client.close()
+
+
 @app.get("/")
 async def root():
     return {
@@ -90,7 +193,7 @@ async def chat(request: ChatRequest):
     
     Flow:
     1. User question → Embedding
-    2. FAISS search → Find relevant crimes
+    2. Vector (IVF) + keyword search → Find relevant crimes
     3. Context + Question → LLM
     4. Natural response like ChatGPT
     """
@@ -100,50 +203,193 @@ async def chat(request: ChatRequest):
     if not rag_service.is_ready:
         raise HTTPException(status_code=503, detail="RAG service not ready")
     
-    # Step 1 & 2: Search using FAISS
-    results = await rag_service.search(request.question)
+    # Step 1 & 2: Hybrid search (embeddings + keywords)
+    results = await rag_service.search(
+        request.question,
+        filters=request.filters.model_dump() if request.filters else None,
+        sort=request.sort
+    )
     
-    # Step 3 & 4: Generate response with LLM
-    if request.use_llm:
+    # Step 3 & 4: Generate response with LLM (bare article lookups return the article text)
+    if request.use_llm and not rag_service.is_direct_lookup(request.question):
         response_text = await rag_service.generate_response(request.question, results)
     else:
         response_text = rag_service.format_response(results, request.question)
     
-    # Format crime results
-    crimes = [
-        CrimeResult(
-            id=r["id"],
-            crime=r["crime"],
-            article=r["article"],
-            categorie=r["categorie"],
-            prison=r["penalty"]["prison"],
-            amende=r["penalty"]["amende"],
-            description=r["description"],
-            score=r["score"]
-        )
-        for r in results
-    ]
-    
     return ChatResponse(
         response=response_text, 
-        crimes=crimes,
+        crimes=to_crime_results(results),
         llm_provider=rag_service.llm_service.provider if rag_service.llm_service else "none"
     )
 
 
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """
+    Streaming chat endpoint (Server-Sent Events)
+    
+    Events:
+    1. `crimes` → retrieved articles, sent as soon as retrieval is done
+    2. `token` → LLM response chunks as they arrive
+    3. `done` → disclaimer (or `error` if generation failed)
+    """
+    if not request.question.strip():
+        raise HTTPException(status_code=400, detail="Question cannot be empty")
+    
+    if not rag_service.is_ready:
+        raise HTTPException(status_code=503, detail="RAG service not ready")
+    
+    results = await rag_service.search(
+        request.question,
+        filters=request.filters.model_dump() if request.filters else None,
+        sort=request.sort
+    )
+    provider = rag_service.llm_service.provider if rag_service.llm_service else "none"
+    
+    async def events():
+        yield sse_event("crimes", {
+            "crimes": [c.model_dump() for c in to_crime_results(results)],
+            "llm_provider": provider
+        })
+        try:
+            if request.use_llm and not rag_service.is_direct_lookup(request.question):
+                async for chunk in rag_service.generate_response_stream(request.question, results):
+                    yield sse_event("token", {"text": chunk})
+            else:
+                yield sse_event("token", {"text": rag_service.format_response(results, request.question)})
+        except Exception as e:
+            print(f"❌ Streaming error: {e}")
+            yield sse_event("error", {"detail": str(e)})
+            return
+        yield sse_event("done", {"disclaimer": DISCLAIMER})
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.post("/chat/batch")
+async def chat_batch(request: ChatBatchRequest):
+    """
+    Bulk question answering (back-office jobs)
+    
+    Retrieval is batched (one embedding request, one matrix-matrix product),
+    LLM generation runs with bounded concurrency. Results come back in question
+    order, or as NDJSON lines (with their `index`) in completion order if `stream`.
+    A failed answer is returned with its `error` set instead of failing the batch.
+    """
+    if any(not question.strip() for question in request.questions):
+        raise HTTPException(status_code=400, detail="Question cannot be empty")
+    
+    if not rag_service.is_ready:
+        raise HTTPException(status_code=503, detail="RAG service not ready")
+    
+    results = await rag_service.search_batch(request.questions)
+    provider = rag_service.llm_service.provider if rag_service.llm_service else "none"
+    semaphore = asyncio.Semaphore(CHAT_BATCH_CONCURRENCY)
+    
+    async def answer(index: int) -> ChatBatchItem:
+        question, crimes = request.questions[index], results[index]
+        response_text, error = "", None
+        try:
+            if request.use_llm and not rag_service.is_direct_lookup(question):
+                async with semaphore:
+                    response_text = await rag_service.generate_response(question, crimes)
+            else:
+                response_text = rag_service.format_response(crimes, question)
+        except Exception as e:
+            print(f"❌ Batch answer {index} error: {e}")
+            error = str(e)
+        return ChatBatchItem(
+            index=index,
+            question=question,
+            response=response_text,
+            crimes=to_crime_results(crimes),
+            llm_provider=provider,
+            error=error
+        )
+    
+    if request.stream:
+        async def lines():
+            tasks = [asyncio.create_task(answer(i)) for i in range(len(results))]
+            try:
+                for item in asyncio.as_completed(tasks):
+                    yield (await item).model_dump_json() + "\n"
+            finally:
+                # Client gone (or stream closed): stop the answers nobody will read
+                for task in tasks:
+                    task.cancel()
+        
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+    
+    return ChatBatchResponse(results=await asyncio.gather(*[answer(i) for i in range(len(results))]))
+
+
+@app.post("/articles/search", response_model=ArticleSearchResponse)
+async def search_articles(request: ArticleSearchRequest):
+    """
+    Structured article search: penalty range / section / categorie / livre filters
+    and sort order, applied server-side on indexed columns. Composes with the text
+    (or embedding) ranking when a query is given.
+    """
+    if not rag_service.is_ready:
+        raise HTTPException(status_code=503, detail="RAG service not ready")
+    
+    filters = request.filters.model_dump() if request.filters else None
+    if request.query.strip():
+        results = await rag_service.search(request.query, request.limit, filters, request.sort)
+        total = len(results)
+    else:
+        results, total = await rag_service.filter_articles(filters, request.sort, request.limit)
+    
+    return ArticleSearchResponse(articles=to_crime_results(results), total=total)
+
+
 @app.get("/crimes")
-async def list_crimes():
-    """Get all crimes in the database"""
-    return {"crimes": rag_service.crimes, "total": len(rag_service.crimes)}
+async def list_crimes(
+    request: Request,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: int = Query(0, ge=0, description="next_cursor of the previous page"),
+    fields: Optional[str] = Query(None, description="comma-separated columns (default: all but texte / texte_arabe)")
+):
+    """List articles, keyset-paginated by id; ETag follows the corpus version"""
+    if not rag_service.is_ready:
+        raise HTTPException(status_code=503, detail="RAG service not ready")
+    
+    selected = LIST_FIELDS
+    if fields:
+        selected = tuple(field.strip() for field in fields.split(",") if field.strip())
+        unknown = set(selected) - set(ARTICLE_FIELDS)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    
+    etag = f'"{await rag_service.db.get_corpus_version()}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    
+    crimes = await rag_service.db.list_articles(cursor, limit, selected)
+    return JSONResponse(
+        {
+            "crimes": crimes,
+            "total": await rag_service.db.get_article_count(),
+            "next_cursor": crimes[-1]["id"] if len(crimes) == limit else None
+        },
+        headers={"ETag": etag}
+    )
 
 
 @app.get("/crimes/{crime_id}")
 async def get_crime(crime_id: int):
     """Get a specific crime by ID"""
-    for crime in rag_service.crimes:
-        if crime["id"] == crime_id:
-            return crime
-    raise HTTPException(status_code=404, detail="Crime not found")
+    if not rag_service.is_ready:
+        raise HTTPException(status_code=503, detail="RAG service not ready")
+    
+    article = await rag_service.db.get_article(crime_id)
+    if article is None:
+        raise HTTPException(status_code=404, detail="Crime not found")
+    return article
 
 
 @app.get("/config")
@@ -151,7 +397,14 @@ async def get_config():
     """Get current configuration"""
     return {
         "llm_provider": rag_service.llm_service.provider if rag_service.llm_service else "none",
-        "search_method": "keyword-matching",
+        "search_method": rag_service.search_method,
         "version": "LITE (512MB RAM)",
-        "crimes_count": len(rag_service.crimes)
+        "crimes_count": await rag_service.db.get_article_count() if rag_service.db else 0,
+        "embedding_cache": rag_service.embedding_service.cache_stats() if rag_service.embedding_service else None,
+        "vector_store": rag_service.vector_store.stats(),
+        "snapshot": rag_service.snapshot.manifest if rag_service.snapshot else None,
+        "worker_pid": os.getpid(),
+        "answer_cache": rag_service.answer_cache.stats(),
+        "singleflight": rag_service.flights.stats(),
+        "scoring": rag_service.scoring.stats()
     }
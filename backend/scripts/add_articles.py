@@ -1,6 +1,8 @@
 """
 Script pour ajouter des articles supplémentaires au Code Pénal
-Ajoute les articles manquants sans supprimer les existants
+Ajoute les articles manquants sans supprimer ni modifier les existants : le texte
+importé par init_db.py depuis la source fait foi, ces textes abrégés ne servent
+que pour les numéros absents de la base.
 """
 
 import asyncio
@@ -589,15 +591,12 @@ async def main():
     count_before = await db.get_article_count()
     print(f"📊 Articles actuels: {count_before}")
     
-    # Insérer les nouveaux articles
-    print(f"\n📥 Ajout de {len(ARTICLES_SUPPLEMENTAIRES)} nouveaux articles...")
+    # Insérer les articles absents (les articles déjà importés ne sont pas écrasés)
+    print(f"\n📥 Ajout de {len(ARTICLES_SUPPLEMENTAIRES)} articles (numéros manquants seulement)...")
     
-    inserted = 0
-    for article in ARTICLES_SUPPLEMENTAIRES:
-        await db.insert_article(article)
-        inserted += 1
-        if inserted % 20 == 0:
-            print(f"  ✓ {inserted} articles ajoutés...")
+    stats = await db.insert_articles_batch(ARTICLES_SUPPLEMENTAIRES, only_missing=True)
+    inserted = stats['inserted']
+    print(f"  ✓ {stats['inserted']} nouveaux, {stats['unchanged']} déjà présents (conservés)")
     
     # Afficher le total
     count_after = await db.get_article_count()
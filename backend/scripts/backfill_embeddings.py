@@ -0,0 +1,128 @@
+"""
+Script pour calculer les embeddings manquants (Jina AI ou modèle local)
+Incrémental et reprenable : seuls les articles sans embedding, ou dont le
+texte a changé depuis le dernier calcul (hash différent), sont envoyés.
+
+Usage: python scripts/backfill_embeddings.py [--batch-size 32] [--concurrency 2]
+"""
+
+import argparse
+import asyncio
+import sys
+import os
+from typing import List, Dict, Any
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dotenv import load_dotenv
+from services.database import DatabaseService
+from services.embedding_provider import BaseEmbeddingProvider, create_embedding_provider
+from services.embedding_service import JinaAPIError
+
+
+def make_batches(articles: List[Dict[str, Any]], batch_size: int, max_chars: int) -> List[List[Dict[str, Any]]]:
+    """Split articles into batches bounded by count and total characters"""
+    batches, current, current_chars = [], [], 0
+    for article in articles:
+        size = len(article['text'])
+        if current and (len(current) >= batch_size or current_chars + size > max_chars):
+            batches.append(current)
+            current, current_chars = [], 0
+        current.append(article)
+        current_chars += size
+    if current:
+        batches.append(current)
+    return batches
+
+
+async def embed_batch(
+    service: BaseEmbeddingProvider,
+    batch: List[Dict[str, Any]],
+    semaphore: asyncio.Semaphore,
+    max_retries: int
+) -> List[tuple]:
+    """Embed one batch with retries; 429 honours Retry-After, else exponential backoff"""
+    texts = [article['text'] for article in batch]
+    for attempt in range(max_retries + 1):
+        try:
+            async with semaphore:
+                embeddings = await service.get_embeddings_batch(texts, raise_on_error=True)
+            return [
+                (article['id'], BaseEmbeddingProvider.embedding_to_bytes(embedding), article['hash'])
+                for article, embedding in zip(batch, embeddings)
+            ]
+        except JinaAPIError as e:
+            if not e.retryable or attempt == max_retries:
+                print(f"  ❌ Lot {batch[0]['numero']}…{batch[-1]['numero']} abandonné: {e}")
+                return []
+            delay = e.retry_after or min(2 ** attempt, 60)
+            print(f"  ⏳ {e} - nouvel essai dans {delay:.0f}s")
+            await asyncio.sleep(delay)
+    return []
+
+
+async def main():
+    """Calcule les embeddings manquants ou obsolètes, page par page"""
+    parser = argparse.ArgumentParser(description="Backfill des embeddings (EMBEDDING_PROVIDER)")
+    parser.add_argument("--page-size", type=int, default=500, help="articles lus par page")
+    parser.add_argument("--batch-size", type=int, default=32, help="textes max par requête Jina")
+    parser.add_argument("--max-chars", type=int, default=30000, help="caractères max par requête Jina")
+    parser.add_argument("--concurrency", type=int, default=2, help="requêtes Jina simultanées")
+    parser.add_argument("--max-retries", type=int, default=5)
+    args = parser.parse_args()
+
+    load_dotenv()
+    print("🚀 Backfill des embeddings")
+    print("=" * 60)
+
+    service = create_embedding_provider()
+    if service is None:
+        print("❌ Aucun fournisseur d'embeddings (JINA_API_KEY ou EMBEDDING_PROVIDER=local)")
+        return
+    await service.initialize()
+
+    db = DatabaseService()
+    await db.initialize()
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    after_id = 0
+    scanned = embedded = failed = 0
+    try:
+        while True:
+            rows = await db.get_articles_without_embeddings(after_id, args.page_size, include_embedded=True)
+            if not rows:
+                break
+            after_id = rows[-1]['id']
+            scanned += len(rows)
+
+            # Only articles whose current text hash differs from the stored one
+            pending = []
+            for row in rows:
+                text = BaseEmbeddingProvider.passage_text(row)
+                text_hash = service.content_hash(text)
+                if row['embedding_hash'] != text_hash:
+                    pending.append({'id': row['id'], 'numero': row['numero'], 'text': text, 'hash': text_hash})
+            if not pending:
+                continue
+
+            batches = make_batches(pending, args.batch_size, args.max_chars)
+            results = await asyncio.gather(*[
+                embed_batch(service, batch, semaphore, args.max_retries) for batch in batches
+            ])
+            items = [item for batch_items in results for item in batch_items]
+
+            # One transaction per page: progress survives an interruption
+            await db.update_embeddings_batch(items)
+            embedded += len(items)
+            failed += len(pending) - len(items)
+            print(f"  ✓ {scanned} articles parcourus, {embedded} embeddings écrits")
+    finally:
+        await service.close()
+        if getattr(service, "http_client", None):
+            await service.http_client.close()
+        await db.close()
+
+    print(f"\n✅ {embedded} embeddings calculés, {failed} échecs, {scanned - embedded - failed} déjà à jour")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,42 @@
+"""
+Script pour construire l'instantané du corpus (démarrage à froid rapide)
+Écrit articles, index BM25 et matrice d'embeddings en .npy dans une nouvelle
+version de data/code_penal.snapshot/, puis bascule CURRENT dessus : les workers
+en cours la chargent sans redémarrage (CORPUS_RELOAD_INTERVAL ou SIGHUP).
+À lancer au build / après chaque import : le serveur l'ignore dès que la base a changé
+(le master gunicorn ne le reconstruit alors qu'en secours, au démarrage).
+
+Usage: python scripts/build_snapshot.py [--output data/code_penal.snapshot] [--if-stale]
+"""
+
+import argparse
+import asyncio
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dotenv import load_dotenv
+from services.snapshot import refresh_snapshot
+
+
+async def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Instantané du corpus en lecture seule (mmap)")
+    parser.add_argument("--output", default="", help="répertoire racine (défaut: CORPUS_SNAPSHOT_PATH ou data/code_penal.snapshot)")
+    parser.add_argument("--if-stale", action="store_true", help="ne rien faire si la version courante est à jour")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    manifest = await refresh_snapshot(args.output or None, force=not args.if_stale)
+    if manifest is None:
+        print("\n✅ Snapshot déjà à jour")
+        return
+
+    print(f"\n✅ Snapshot corpus v{manifest['corpus_version']}: {manifest['articles']} articles, "
+          f"{manifest['terms']} termes, {manifest['vectors']} vecteurs ({time.perf_counter() - start:.2f}s)")
+    print(f"   → {manifest['version']}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
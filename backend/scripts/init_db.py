@@ -1,152 +1,40 @@
 """
 Script pour parser le Code Pénal Algérien et l'insérer dans SQLite
-Ce script extrait tous les articles du texte du Code Pénal
+Ce script extrait tous les articles du texte du Code Pénal (lecture en flux,
+insertion par lots) ; à défaut du fichier source, les articles ci-dessous sont utilisés.
+Relançable sans interaction : seuls les articles nouveaux ou modifiés (hash du contenu)
+sont écrits, les embeddings des articles inchangés sont conservés.
 """
 
-import re
+import argparse
 import asyncio
 import sys
 import os
+from typing import Iterable, Iterator, List, Dict, Any
 
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from services.database import DatabaseService
+from services.code_parser import parse_code_penal_file
 
+SOURCE_PATH = os.getenv(
+    "CODE_PENAL_SOURCE",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "code penal alger")
+)
+INSERT_CHUNK_SIZE = int(os.getenv("INIT_DB_CHUNK_SIZE", "200"))
 
-def parse_code_penal(text: str) -> list:
-    """
-    Parse le texte du Code Pénal et extrait tous les articles
-    Retourne une liste de dictionnaires
-    """
-    articles = []
-    
-    # Contexte actuel (livre, titre, chapitre, section)
-    current_livre = ""
-    current_titre = ""
-    current_chapitre = ""
-    current_section = ""
-    
-    # Patterns pour détecter les sections
-    livre_pattern = re.compile(r'LIVRE\s+(PREMIER|DEUXIEME|TROISIEME|QUATRIEME|CINQUIEME|[IVX]+)', re.IGNORECASE)
-    titre_pattern = re.compile(r'TITRE\s+([IVX]+|PREMIER)', re.IGNORECASE)
-    chapitre_pattern = re.compile(r'Chapitre\s+([IVX]+|[0-9]+)', re.IGNORECASE)
-    section_pattern = re.compile(r'Section\s+([0-9]+|[IVX]+)', re.IGNORECASE)
-    
-    # Pattern pour les articles - plusieurs formats
-    article_patterns = [
-        re.compile(r'Art(?:icle)?\.?\s*(\d+(?:\s*bis(?:\s*\d+)?)?)\s*[-–.]?\s*[-–]?\s*(.+?)(?=Art(?:icle)?\.?\s*\d+|$)', re.IGNORECASE | re.DOTALL),
-        re.compile(r'Art(?:icle)?\s+(\d+)\s*[-–.]?\s*(.+?)(?=Art(?:icle)?\s+\d+|$)', re.IGNORECASE | re.DOTALL),
-    ]
-    
-    # Nettoyer le texte
-    text = text.replace('\r\n', '\n').replace('\r', '\n')
-    
-    # Diviser en lignes pour analyser la structure
-    lines = text.split('\n')
-    current_text = ""
-    
-    for line in lines:
-        line = line.strip()
-        if not line:
-            continue
-        
-        # Détecter les changements de section
-        livre_match = livre_pattern.search(line)
-        if livre_match:
-            current_livre = line
-            continue
-        
-        titre_match = titre_pattern.search(line)
-        if titre_match:
-            current_titre = line
-            continue
-        
-        chapitre_match = chapitre_pattern.search(line)
-        if chapitre_match:
-            current_chapitre = line
-            continue
-        
-        section_match = section_pattern.search(line)
-        if section_match:
-            current_section = line
-            continue
-        
-        current_text += line + " "
-    
-    # Maintenant extraire les articles du texte complet
-    for pattern in article_patterns:
-        matches = pattern.findall(current_text)
-        for match in matches:
-            numero = match[0].strip()
-            texte = match[1].strip()
-            
-            # Nettoyer le texte
-            texte = re.sub(r'\s+', ' ', texte)
-            texte = texte.strip()
-            
-            if len(texte) > 20:  # Ignorer les articles trop courts
-                articles.append({
-                    'numero': f"Art. {numero}",
-                    'texte': texte,
-                    'texte_arabe': '',  # À remplir si disponible
-                    'categorie': current_section or current_chapitre,
-                    'section': current_section,
-                    'chapitre': current_chapitre,
-                    'titre': current_titre,
-                    'livre': current_livre
-                })
-        
-        if articles:
-            break
-    
-    return articles
 
-
-def parse_code_penal_v2(text: str) -> list:
-    """
-    Version améliorée du parser - extraction par regex simple
-    """
-    articles = []
-    
-    # Pattern simple mais efficace
-    pattern = re.compile(
-        r'Art\.?\s*(\d+(?:\s*(?:bis|ter|quater)(?:\s*\d+)?)?)\s*[-–.]?\s*[-–]?\s*'
-        r'(?:\([^)]+\)\s*)?'  # Optionnel: (Loi n° ...)
-        r'(.+?)(?=Art\.?\s*\d+|$)',
-        re.IGNORECASE | re.DOTALL
-    )
-    
-    # Nettoyer le texte
-    text = re.sub(r'\r\n|\r', '\n', text)
-    text = re.sub(r'\n\s*\n', '\n', text)
-    
-    matches = pattern.findall(text)
-    
-    for numero, contenu in matches:
-        numero = numero.strip()
-        contenu = re.sub(r'\s+', ' ', contenu).strip()
-        
-        # Ignorer les articles trop courts ou invalides
-        if len(contenu) < 30:
-            continue
-        
-        # Tronquer si trop long (probablement a capturé plusieurs articles)
-        if len(contenu) > 3000:
-            contenu = contenu[:3000] + "..."
-        
-        articles.append({
-            'numero': f"Art. {numero}",
-            'texte': contenu,
-            'texte_arabe': '',
-            'categorie': '',
-            'section': '',
-            'chapitre': '',
-            'titre': '',
-            'livre': ''
-        })
-    
-    return articles
+def chunked(articles: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    """Group a stream of articles into lists of at most `size`"""
+    batch = []
+    for article in articles:
+        batch.append(article)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
 
 
 # Articles du Code Pénal Algérien - Données extraites du PDF
@@ -542,43 +430,53 @@ CODE_PENAL_ARTICLES = [
 
 
 async def main():
-    """Script principal pour initialiser la base de données"""
+    """Script principal pour initialiser (ou resynchroniser) la base de données"""
+    parser = argparse.ArgumentParser(description="Import incrémental du Code Pénal (diff par hash du contenu)")
+    parser.add_argument("--source", default=SOURCE_PATH, help="fichier texte du Code Pénal")
+    parser.add_argument("--prune", action="store_true", help="supprimer les articles absents de la source")
+    parser.add_argument("--reset", action="store_true", help="tout supprimer avant l'import (embeddings compris)")
+    args = parser.parse_args()
+    
     print("🚀 Initialisation de la base de données du Code Pénal Algérien")
     print("=" * 60)
     
     db = DatabaseService()
     await db.initialize()
+    version_before = await db.get_corpus_version()
     
-    # Vérifier si des articles existent déjà
-    count = await db.get_article_count()
-    if count > 0:
-        print(f"⚠️ La base contient déjà {count} articles")
-        response = input("Voulez-vous les supprimer et recommencer? (o/n): ")
-        if response.lower() != 'o':
-            print("Annulé.")
-            await db.close()
-            return
-        
-        # Supprimer tous les articles
+    if args.reset:
         await db.connection.execute("DELETE FROM articles")
         await db.connection.commit()
         print("🗑️ Articles supprimés")
     
-    # Insérer les articles
-    print(f"\n📥 Insertion de {len(CODE_PENAL_ARTICLES)} articles...")
+    # Insérer les articles (au fil du parsing, par lots) : seuls les nouveaux / modifiés sont écrits
+    if os.path.exists(args.source):
+        print(f"\n📥 Lecture de {args.source}...")
+        articles = parse_code_penal_file(args.source)
+    else:
+        print(f"\n⚠️ {args.source} introuvable - {len(CODE_PENAL_ARTICLES)} articles intégrés utilisés")
+        articles = CODE_PENAL_ARTICLES
     
-    inserted = 0
-    for article in CODE_PENAL_ARTICLES:
-        await db.insert_article(article)
-        inserted += 1
-        if inserted % 10 == 0:
-            print(f"  ✓ {inserted} articles insérés...")
+    totals = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+    seen = set()
+    for batch in chunked(articles, INSERT_CHUNK_SIZE):
+        seen.update(article['numero'] for article in batch)
+        stats = await db.insert_articles_batch(batch)
+        for key in totals:
+            totals[key] += stats[key]
+        print(f"  ✓ {stats['inserted']} nouveaux, {stats['updated']} mis à jour, {stats['unchanged']} inchangés")
     
-    print(f"\n✅ {inserted} articles insérés avec succès!")
+    deleted = await db.delete_articles_except(seen) if args.prune else 0
+    
+    print(
+        f"\n✅ {totals['inserted']} articles insérés, {totals['updated']} mis à jour, "
+        f"{totals['unchanged']} inchangés, {deleted} supprimés"
+    )
     
     # Afficher un résumé
     count = await db.get_article_count()
-    print(f"\n📊 Total dans la base: {count} articles")
+    version = await db.get_corpus_version()
+    print(f"\n📊 Total dans la base: {count} articles (corpus_version {version_before} → {version})")
     
     await db.close()
     print("\n🎉 Base de données prête!")
@@ -0,0 +1,107 @@
+"""
+Script pour réduire la dimension des embeddings stockés (Matryoshka, jina-embeddings-v3)
+Tronque et renormalise localement les vecteurs existants, sans appel à l'API Jina.
+Mettre ensuite JINA_EMBEDDING_DIMENSIONS à la même valeur pour les requêtes.
+
+Usage: python scripts/truncate_embeddings.py --dimensions 256 [--measure] [--dry-run]
+"""
+
+import argparse
+import asyncio
+import sys
+import os
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dotenv import load_dotenv
+from services.database import DatabaseService
+from services.embedding_service import JinaEmbeddingService
+
+
+def truncate(vectors: np.ndarray, dimensions: int) -> np.ndarray:
+    """Keep the first `dimensions` components and renormalize (L2)"""
+    truncated = np.array(vectors[:, :dimensions], dtype=np.float32)
+    norms = np.linalg.norm(truncated, axis=1, keepdims=True)
+    return truncated / np.maximum(norms, 1e-12)
+
+
+async def measure_recall(db: DatabaseService, dimensions: int, sample: int, top_k: int = 10):
+    """recall@k of truncated vs full vectors, using stored articles as queries"""
+    rows = await db.get_embedded_articles(larger_than=dimensions)
+    if not rows:
+        return
+    source_dim = max(row['embedding_dim'] for row in rows)
+    rows = [row for row in rows if row['embedding_dim'] == source_dim]
+    full = np.stack([np.frombuffer(row['embedding'], dtype='<f4') for row in rows])
+    full /= np.maximum(np.linalg.norm(full, axis=1, keepdims=True), 1e-12)
+    reduced = truncate(full, dimensions)
+
+    queries = np.random.default_rng(0).choice(len(rows), size=min(sample, len(rows)), replace=False)
+    k = min(top_k, len(rows) - 1)
+    recall = []
+    for i in queries:
+        exact = np.argsort(-(full @ full[i]))[1:k + 1]  # the article itself ranks first
+        approx = np.argsort(-(reduced @ reduced[i]))[1:k + 1]
+        recall.append(len(set(exact) & set(approx)) / k)
+    print(f"📏 recall@{k} {source_dim} → {dimensions} dims: {np.mean(recall):.3f} ({len(queries)} requêtes)")
+
+
+async def main():
+    """Tronque les embeddings plus grands que --dimensions, page par page"""
+    parser = argparse.ArgumentParser(description="Réduction Matryoshka des embeddings stockés")
+    parser.add_argument("--dimensions", type=int, required=True, help="nouvelle dimension (ex. 256, 512)")
+    parser.add_argument("--page-size", type=int, default=500)
+    parser.add_argument("--measure", action="store_true", help="mesurer le recall avant d'écrire")
+    parser.add_argument("--sample", type=int, default=200, help="requêtes pour --measure")
+    parser.add_argument("--dry-run", action="store_true", help="ne rien écrire")
+    args = parser.parse_args()
+
+    load_dotenv()
+    print(f"✂️ Réduction des embeddings à {args.dimensions} dimensions")
+    print("=" * 60)
+
+    service = JinaEmbeddingService()  # model name for the content hashes (no API call)
+    db = DatabaseService()
+    await db.initialize()
+
+    after_id = 0
+    truncated = stale = 0
+    try:
+        if args.measure:
+            await measure_recall(db, args.dimensions, args.sample)
+        if args.dry_run:
+            return
+
+        while True:
+            rows = await db.get_embedded_articles(after_id, args.page_size, larger_than=args.dimensions)
+            if not rows:
+                break
+            after_id = rows[-1]['id']
+
+            vectors = truncate(
+                np.stack([np.frombuffer(row['embedding'], dtype='<f4')[:args.dimensions] for row in rows]),
+                args.dimensions
+            )
+            items = []
+            for row, vector in zip(rows, vectors):
+                text = JinaEmbeddingService.passage_text(row)
+                # A hash that was current stays current; a stale one is dropped so backfill re-embeds
+                current = row['embedding_hash'] == service.content_hash(text, row['embedding_dim'])
+                new_hash = service.content_hash(text, args.dimensions) if current else None
+                stale += not current
+                items.append((row['id'], vector.astype('<f4').tobytes(), new_hash))
+
+            # One transaction per page
+            await db.update_embeddings_batch(items)
+            truncated += len(items)
+            print(f"  ✓ {truncated} embeddings réduits")
+    finally:
+        await db.close()
+
+    print(f"\n✅ {truncated} embeddings réduits à {args.dimensions} dims ({stale} à recalculer par le backfill)")
+    print(f"   → JINA_EMBEDDING_DIMENSIONS={args.dimensions}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,132 @@
+"""
+ANN Index - Index IVF (inverted file) pour la recherche vectorielle approchée
+Les vecteurs sont regroupés par centroïde k-means ; une requête ne compare que
+les `nprobe` listes les plus proches. Persisté en .npy à côté de la base et
+rechargé en mmap (pas de reconstruction ni de lecture des BLOBs au démarrage).
+"""
+
+import json
+import os
+import shutil
+from typing import Optional, Dict, Any
+
+import numpy as np
+
+
+class IVFIndex:
+    """k-means centroids + vectors / ids stored contiguously, grouped by list"""
+
+    FILES = ("centroids", "offsets", "vectors", "ids")
+
+    def __init__(
+        self,
+        centroids: np.ndarray,
+        offsets: np.ndarray,
+        vectors: np.ndarray,
+        ids: np.ndarray,
+        meta: Optional[Dict[str, Any]] = None
+    ):
+        self.centroids = centroids  # (n_lists, dims)
+        self.offsets = offsets  # list i = rows offsets[i]:offsets[i + 1]
+        self.vectors = vectors  # (count, dims), L2-normalized
+        self.ids = ids
+        self.meta = meta or {}
+
+    @property
+    def n_lists(self) -> int:
+        return len(self.centroids)
+
+    @staticmethod
+    def _assign(vectors: np.ndarray, centroids: np.ndarray, chunk: int = 4096) -> np.ndarray:
+        """Nearest centroid (max inner product) per row, chunked to bound memory"""
+        labels = np.empty(len(vectors), dtype=np.int64)
+        for start in range(0, len(vectors), chunk):
+            labels[start:start + chunk] = np.argmax(vectors[start:start + chunk] @ centroids.T, axis=1)
+        return labels
+
+    @classmethod
+    def build(
+        cls,
+        vectors: np.ndarray,
+        ids: np.ndarray,
+        n_lists: Optional[int] = None,
+        iterations: int = 10,
+        seed: int = 0
+    ) -> "IVFIndex":
+        """Spherical k-means on a sample, then group every vector under its nearest centroid"""
+        count = len(vectors)
+        n_lists = max(1, min(n_lists or int(np.sqrt(count)), count))
+        rng = np.random.default_rng(seed)
+
+        sample = vectors[rng.choice(count, size=min(count, 256 * n_lists), replace=False)]
+        centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)].copy()
+        for _ in range(iterations):
+            labels = cls._assign(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            empty = np.bincount(labels, minlength=n_lists) == 0
+            sums[empty] = sample[rng.choice(len(sample), size=int(empty.sum()))]  # reseed empty lists
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            centroids = sums / np.maximum(norms, 1e-12)
+
+        labels = cls._assign(vectors, centroids)
+        order = np.argsort(labels, kind="stable")
+        offsets = np.zeros(n_lists + 1, dtype=np.int64)
+        np.cumsum(np.bincount(labels, minlength=n_lists), out=offsets[1:])
+        return cls(
+            centroids.astype(np.float32),
+            offsets,
+            np.ascontiguousarray(vectors[order], dtype=np.float32),
+            ids[order].astype(np.int64)
+        )
+
+    def probe(self, query: np.ndarray, nprobe: int) -> np.ndarray:
+        """Row numbers of the vectors in the nprobe lists closest to the (normalized) query"""
+        nprobe = min(nprobe, self.n_lists)
+        lists = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        return np.concatenate([np.arange(self.offsets[i], self.offsets[i + 1]) for i in lists])
+
+    def save(self, path: str):
+        """
+        Write the index as .npy files (+ meta.json) in a temp directory of this process,
+        then swap it in by renames. Files are never rewritten in place: other processes
+        (gunicorn workers) that mapped the previous index keep reading it.
+        """
+        self.meta = {**self.meta, "build": os.urandom(8).hex()}
+        tmp = f"{path}.{os.getpid()}.tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        for name in self.FILES:
+            np.save(os.path.join(tmp, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(self.meta, f)
+
+        old = f"{path}.{os.getpid()}.old"
+        try:
+            os.replace(path, old)
+        except FileNotFoundError:
+            old = None
+        try:
+            os.replace(tmp, path)
+        except OSError:
+            # Another process published its index in between: keep that one
+            shutil.rmtree(tmp, ignore_errors=True)
+        if old:
+            shutil.rmtree(old, ignore_errors=True)
+
+    @staticmethod
+    def _read_meta(path: str) -> Dict[str, Any]:
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            return json.load(f)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["IVFIndex"]:
+        """Memory-map a saved index (copy-on-write: in-place updates stay in this process)"""
+        try:
+            meta = cls._read_meta(path)
+            arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="c") for name in cls.FILES}
+            if cls._read_meta(path) != meta:
+                return None  # replaced by another process while loading: files may be mixed
+        except (OSError, ValueError):
+            return None
+        return cls(meta=meta, **arrays)
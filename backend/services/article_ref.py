@@ -0,0 +1,91 @@
+"""
+Article references - Détection des références d'articles dans une question
+("Art. 303 bis", "article 372", "articles 350 et 351", "المادة 350 مكرر")
+et clé normalisée du numéro, indexée en base (numero_key).
+"""
+
+import re
+from typing import List, Tuple
+
+from .text_utils import tokenize
+
+# Arabic-Indic digits -> ASCII
+_DIGITS = str.maketrans("٠١٢٣٤٥٦٧٨٩", "0123456789")
+
+_SUFFIXES = {
+    'bis': 'bis', 'ter': 'ter', 'quater': 'quater', 'quinquies': 'quinquies', 'sexies': 'sexies',
+    'septies': 'septies', 'octies': 'octies', 'nonies': 'nonies', 'decies': 'decies', 'مكرر': 'bis'
+}
+
+_PREFIX = re.compile(r"(?:\bart(?:icles?)?\b\.?|المادة|المواد|مادة)\s*", re.IGNORECASE)
+_NUMBER = re.compile(
+    r"(\d+)(?:\s*(?:er|ère)\b)?"
+    r"(?:[\s-]*\b(bis|ter|quater|(?:quinqu|s[ei]x|sept|oct|non|d[eé]c)i[eè]s)\b|\s*(مكرر))?"
+    r"(?:(?<=bis|ter|ies|كرر)[\s-]*(\d+)\b|(?<=\d)-(\d{1,2})\b)?",  # "87 bis 10", "423-1"
+    re.IGNORECASE
+)
+_SEPARATOR = re.compile(r"\s*(?:,|\bet\b|و)\s*", re.IGNORECASE)
+
+# Words that may surround a bare reference ("que dit l'article 350 du code pénal ?")
+_FILLER = frozenset(tokenize(
+    "que dit disent article articles code penal contenu texte voir montre moi affiche "
+    "donne lire quel quelle explique signifie sur "
+    "ماذا تقول نص قانون العقوبات"
+))
+
+
+def normalize_suffix(suffix: str) -> str:
+    """Canonical spelling of a numbering suffix ("Sixiès" -> "sexies")"""
+    suffix = suffix.lower().replace("è", "e").replace("é", "e")
+    return "sexies" if suffix == "sixies" else suffix
+
+
+def _key(number: str, suffix: str, index: str) -> str:
+    parts = [str(int(number))]
+    if suffix:
+        parts.append(_SUFFIXES[normalize_suffix(suffix)])
+        if index:
+            parts.append(str(int(index)))
+    elif index:
+        return f"{parts[0]}-{int(index)}"
+    return " ".join(parts)
+
+
+def parse_article_query(text: str) -> Tuple[List[str], bool]:
+    """
+    Return (normalized article keys in order, whether the text is only a reference).
+    "Art. 87 bis 1" -> (["87 bis 1"], True); "Art. 423-1" -> (["423-1"], True);
+    "vol et article 350" -> (["350"], False)
+    """
+    text = (text or "").translate(_DIGITS)
+    keys: List[str] = []
+    rest: List[str] = []
+    position = 0
+
+    for prefix in _PREFIX.finditer(text):
+        if prefix.start() < position:
+            continue
+        match = _NUMBER.match(text, prefix.end())
+        if not match:
+            continue
+        rest.append(text[position:prefix.start()])
+        while match:
+            number, suffix, arabic_suffix, index, dash_index = match.groups()
+            key = _key(number, suffix or arabic_suffix, index or dash_index)
+            if key not in keys:
+                keys.append(key)
+            position = match.end()
+            separator = _SEPARATOR.match(text, position)
+            match = _NUMBER.match(text, separator.end()) if separator else None
+    rest.append(text[position:])
+
+    remaining = [token for token in tokenize(" ".join(rest)) if token not in _FILLER]
+    return keys, bool(keys) and not remaining
+
+
+def numero_key(numero: str) -> str:
+    """Normalized key of a stored article number ("Art. 303 bis" -> "303 bis")"""
+    keys, _ = parse_article_query(numero)
+    if not keys:
+        keys, _ = parse_article_query(f"article {numero}")
+    return keys[0] if keys else (numero or "").strip().lower()
@@ -0,0 +1,126 @@
+"""
+Cache Service - Cache LRU + TTL en mémoire, avec tier SQLite optionnel
+"""
+
+import time
+import aiosqlite
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class TTLCache:
+    """Bounded in-process LRU cache with per-entry expiry and hit/miss counters"""
+
+    def __init__(self, max_size: int = 1024, ttl: float = 3600):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any):
+        if self.max_size <= 0:
+            return
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def clear(self):
+        self._data.clear()
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hit_ratio, 3)
+        }
+
+
+class SQLiteCache:
+    """On-disk cache tier (key -> BLOB) so warm entries survive restarts"""
+
+    def __init__(self, path: str, ttl: float = 7 * 24 * 3600, max_entries: int = 50000):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.connection: Optional[aiosqlite.Connection] = None
+        self.hits = 0
+        self.misses = 0
+
+    async def initialize(self):
+        self.connection = await aiosqlite.connect(self.path)
+        await self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS cache (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        """)
+        await self.connection.execute("CREATE INDEX IF NOT EXISTS idx_cache_expires ON cache(expires_at)")
+
+        # Drop expired entries and trim to max_entries (oldest expiry first)
+        await self.connection.execute("DELETE FROM cache WHERE expires_at < ?", (time.time(),))
+        await self.connection.execute("""
+            DELETE FROM cache WHERE key IN (
+                SELECT key FROM cache ORDER BY expires_at DESC LIMIT -1 OFFSET ?
+            )
+        """, (self.max_entries,))
+        await self.connection.commit()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        if not self.connection:
+            return None
+        cursor = await self.connection.execute(
+            "SELECT value FROM cache WHERE key = ? AND expires_at >= ?", (key, time.time())
+        )
+        row = await cursor.fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row[0]
+
+    async def set(self, key: str, value: bytes):
+        if not self.connection:
+            return
+        await self.connection.execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, value, time.time() + self.ttl)
+        )
+        await self.connection.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"path": self.path, "hits": self.hits, "misses": self.misses}
+
+    async def close(self):
+        if self.connection:
+            await self.connection.close()
+            self.connection = None
@@ -0,0 +1,361 @@
+"""
+Code parser - Lecture en flux du texte du Code Pénal (fichier `code penal alger`)
+Une seule passe ligne par ligne, mémoire bornée : contexte LIVRE/TITRE/Chapitre/Section,
+articles (1er, bis/ter/quater..., abrogés, remplacés par la loi n° 06-23) et texte
+arabe de la page « N bis », rattaché à l'article français de même numéro.
+"""
+
+import re
+from collections import OrderedDict
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Set, Tuple
+
+from .article_ref import numero_key, normalize_suffix
+
+LEVELS = ("livre", "titre", "chapitre", "section")
+
+_SUFFIX = r"bis|ter|quater|(?:quinqu|s[ei]x|sept|oct|non|d[eé]c)i[eè]s"
+
+# "Article 1er - ", "Art. 2. - ", "Art 87. bis 10. - ", "Art 144: ", "Art. 423. 1 - ", "«Art. 16 bis.  "
+_ARTICLE = re.compile(
+    r"^(«)?\s*Art(?:icle)?\.?\s*(\d+)\s*(?:er\b)?\.?"
+    r"(?:\s*(" + _SUFFIX + r")\b\.?(?:\s*(\d+)\b\.?)?|\s+(\d+)(?=\s*[-–—]))?"
+    r"(?:\s*[-–—:]+|(?<=\.)\s)\s*(.*)$",
+    re.IGNORECASE
+)
+# "Articles de 322 à 325. – (Abrogés ...)"
+_ARTICLE_RANGE = re.compile(r"^Articles\s+(?:de\s+)?(\d+)\.?\s+à\s+(\d+)\.?\s*[-–—]+\s*(.*)$", re.IGNORECASE)
+_ABROGATED_NOTE = re.compile(r"^Les articles\b.*\babrogés\b", re.IGNORECASE)
+
+_HEADINGS = (
+    ("livre", re.compile(r"^(?:(?:PREMIERE|DEUXIEME|TROISIEME|QUATRIEME)\s+PARTIE|LIVRE\s+[A-Z]+)$")),
+    ("titre", re.compile(r"^TITRE\s+[IVX]+(?:\s+bis)?$")),
+    ("chapitre", re.compile(r"^Chapitre\s*[IVX]+(?:\s+bis)?$", re.IGNORECASE)),
+    ("section", re.compile(r"^Section\s+[\dIVX]+(?:\s+bis)?$", re.IGNORECASE)),
+)
+# Title line that runs into the next heading: "CRIMES ET DELITS CONTRE LA CHOSE PUBLIQUE Chapitre I"
+_TRAILING_HEADING = re.compile(r"^(.*\S)\s+((?:Chapitre|Section)\s*[\dIVX]+)$")
+_AMENDMENT_NOTE = re.compile(r"^\((?:Loi|Ordonnance)\b[^)]*\)\.?$", re.IGNORECASE)
+
+_PAGE = re.compile(r"^\d{1,3}(\s+bis)?$")
+_FOOTNOTE = re.compile(r"^(?:\)\d+\(|\*)")
+_GAZETTE = re.compile(r"JOURNAL OFFICIEL|^\d+\s+\d+\s+Dhou\b")
+_END_OF_TEXT = re.compile(r"^Fait à Alger\b")
+# Amending law whose quoted articles replace the previous versions
+_AMENDING_LAW = re.compile(r"^Loi n°.*\bmodifiant\b.*\b66-156\b")
+_LAW_OWN_ARTICLE = re.compile(r"ordonnance n° 66-156|présente loi")
+_CLOSING_QUOTE = re.compile(r"»[.;]?$")
+_UNCHANGED = re.compile(r"sans changement", re.IGNORECASE)
+_LOWERCASE = re.compile(r"[a-zà-ÿ]")
+
+# Arabic page: ":4المادة", "(1 مكرر 87المادة" (reversed PDF extraction), "المادة األولى"
+_ARABIC_ARTICLE = re.compile(r"(?:(\d+)\s*)?مكرر\s*(\d+)\s*الماد|:\s*\(?\s*(\d+)\s*الم|المادة\s+األولى")
+_ARABIC_HEADING = re.compile(r"الباب|الفصل|القسم|الكتاب|الجزء")
+_ARABIC_LETTER = re.compile(r"[ء-ي]")
+# cp1252 dashes left as C1 control characters by the PDF extraction
+_C1_DASHES = str.maketrans({"\x96": "–", "\x97": "—"})
+
+
+class _Article:
+    """Article being assembled (French lines, Arabic lines, heading context)"""
+
+    __slots__ = ("numero", "key", "context", "lines", "arabic", "french_done", "arabic_done", "amended")
+
+    def __init__(self, numero: str, context: Tuple[str, ...], first_line: str, amended: bool = False):
+        self.numero = numero
+        self.key = numero_key(numero)
+        self.context = context
+        self.lines = [first_line] if first_line else []
+        self.arabic: List[str] = []
+        self.french_done = False
+        self.arabic_done = amended  # the amending law has no Arabic pages
+        self.amended = amended
+
+    def to_dict(self) -> Dict[str, Any]:
+        livre, titre, chapitre, section, categorie = self.context
+        return {
+            'numero': self.numero,
+            'texte': " ".join(" ".join(self.lines).split()),
+            'texte_arabe': " ".join(" ".join(self.arabic).split()),
+            'categorie': categorie,
+            'section': section,
+            'chapitre': chapitre,
+            'titre': titre,
+            'livre': livre
+        }
+
+
+class CodePenalParser:
+    """
+    Line-at-a-time state machine. French pages alternate with their Arabic
+    translation ("N bis" page marker), so an article stays in a small pending
+    window until its Arabic text has been read; at most `window` articles are held.
+    """
+
+    def __init__(self, window: int = 64, superseded: Optional[Set[str]] = None):
+        self.window = window
+        self.superseded = superseded or set()  # numeros replaced later in the file (skip the old version)
+        self.amended: Set[str] = set()  # numeros yielded from the amending law
+        self.part = "code"  # code -> annex (after "Fait à Alger") -> amendment (loi 06-23)
+        self.arabic_page = False
+        self.headings: Dict[str, Tuple[str, str]] = {}
+        self.heading_level: Optional[str] = None  # last line was this heading (or its title)
+        self.expect_title = False
+        self.current: Optional[_Article] = None
+        self.arabic: Optional[_Article] = None
+        self.pending: "OrderedDict[str, _Article]" = OrderedDict()
+        self.contexts: Dict[str, Tuple[str, ...]] = {}  # numero key -> headings, for amended articles
+
+    # --- Headings ---
+
+    def _context(self) -> Tuple[str, ...]:
+        labels = []
+        for level in LEVELS:
+            marker, title = self.headings.get(level, ("", ""))
+            labels.append(" - ".join(part for part in (marker, title) if part))
+        categorie = next(
+            (self.headings[level][1] or self.headings[level][0] for level in reversed(LEVELS) if level in self.headings),
+            ""
+        )
+        return tuple(labels) + (categorie,)
+
+    def _open_heading(self, level: str, marker: str, title: str = ""):
+        for lower in LEVELS[LEVELS.index(level):]:
+            self.headings.pop(lower, None)
+        self.headings[level] = (marker, title)
+        self.heading_level = level
+        self.expect_title = not title
+
+    def _heading_line(self, line: str) -> bool:
+        """Heading marker, its title, or an unnumbered all-caps heading"""
+        for level, pattern in _HEADINGS:
+            if pattern.match(line):
+                self._open_heading(level, line)
+                return True
+
+        if self.expect_title and not _AMENDMENT_NOTE.match(line):
+            trailing = _TRAILING_HEADING.match(line)
+            title = trailing.group(1) if trailing else line
+            marker, _ = self.headings[self.heading_level]
+            self.headings[self.heading_level] = (marker, title)
+            self.expect_title = False
+            if trailing:
+                level = next(level for level, pattern in _HEADINGS if pattern.match(trailing.group(2)))
+                self._open_heading(level, trailing.group(2))
+            return True
+
+        if not _LOWERCASE.search(line) and sum(c.isupper() for c in line) >= 3:
+            if self.heading_level and not self.expect_title:
+                marker, title = self.headings[self.heading_level]
+                self.headings[self.heading_level] = (marker, f"{title} {line}".strip())
+            else:
+                self._open_heading("titre", "", line)
+            return True
+        return False
+
+    # --- Articles ---
+
+    @staticmethod
+    def _numero(number: str, suffix: Optional[str], index: Optional[str]) -> str:
+        numero = f"Art. {int(number)}"
+        if suffix:
+            numero += f" {normalize_suffix(suffix)}"
+            if index:
+                numero += f" {int(index)}"
+        elif index:
+            numero += f"-{int(index)}"
+        return numero
+
+    def _start(
+        self,
+        numero: str,
+        first_line: str,
+        amended: bool = False,
+        lines: Optional[List[str]] = None
+    ) -> Iterator[Dict[str, Any]]:
+        context = self._context()
+        if amended:
+            key = numero_key(numero)
+            context = self.contexts.get(key) or self.contexts.get(key.split()[0]) or context
+        article = _Article(numero, context, first_line, amended)
+        if lines is not None:
+            article.lines = lines
+        yield from self._close_french()
+        self.contexts.setdefault(article.key, article.context)
+
+        previous = self.pending.pop(article.key, None)
+        if previous is not None:  # same number twice: keep both, in order
+            previous.french_done = previous.arabic_done = True
+            yield from self._emit(previous)
+        self.pending[article.key] = article
+        self.current = article
+        if len(self.pending) > self.window:
+            _, oldest = self.pending.popitem(last=False)
+            yield from self._emit(oldest)
+
+    def _close_french(self) -> Iterator[Dict[str, Any]]:
+        if self.current is not None:
+            self.current.french_done = True
+            self.current = None
+        yield from self._drain()
+
+    def _drain(self) -> Iterator[Dict[str, Any]]:
+        """Emit leading articles whose French and Arabic text are both complete"""
+        while self.pending:
+            article = next(iter(self.pending.values()))
+            if not (article.french_done and article.arabic_done):
+                break
+            self.pending.popitem(last=False)
+            yield from self._emit(article)
+
+    def _emit(self, article: _Article) -> Iterator[Dict[str, Any]]:
+        if self.arabic is article:
+            self.arabic = None
+        if self.current is article:
+            self.current = None
+        if not article.amended and article.numero in self.superseded:
+            return
+        item = article.to_dict()
+        # Partial replacements ("1 - (sans changement)") keep the previous version
+        if item['texte'] and not _UNCHANGED.search(item['texte']):
+            if article.amended:
+                self.amended.add(article.numero)
+            yield item
+
+    def _french_line(self, line: str) -> Iterator[Dict[str, Any]]:
+        if _END_OF_TEXT.match(line):
+            self.part = "annex"
+            yield from self._close_french()
+            return
+        if self.part == "annex":
+            if _AMENDING_LAW.match(line):
+                self.part = "amendment"
+            return
+
+        article = _ARTICLE.match(line)
+        if article:
+            quoted, number, suffix, index, bare_index, text = article.groups()
+            if self.part == "amendment" and not quoted and _LAW_OWN_ARTICLE.search(text):
+                yield from self._close_french()  # article of the amending law itself
+                return
+            self.heading_level = None
+            self.expect_title = False
+            yield from self._start(
+                self._numero(number, suffix, index or bare_index),
+                _CLOSING_QUOTE.sub("", text) if self.part == "amendment" else text,
+                amended=self.part == "amendment"
+            )
+            return
+
+        articles_range = _ARTICLE_RANGE.match(line)
+        if articles_range and self.part == "code":
+            first, last, text = articles_range.groups()
+            shared = [text]  # one note for the whole range, continuation lines included
+            for number in range(int(first), int(last) + 1):
+                yield from self._start(self._numero(str(number), None, None), text, lines=shared)
+            return
+
+        if _ABROGATED_NOTE.match(line):
+            yield from self._close_french()
+            return
+
+        if self.part == "code" and self._heading_line(line):
+            yield from self._close_french()
+            return
+        self.heading_level = None
+
+        if self.current is not None:
+            if self.part == "amendment":
+                line = _CLOSING_QUOTE.sub("", line.lstrip("«"))
+            self.current.lines.append(line)
+
+    def _arabic_line(self, line: str) -> Iterator[Dict[str, Any]]:
+        markers = list(_ARABIC_ARTICLE.finditer(line))
+        if markers:
+            for marker in markers:
+                index, bis_number, number = marker.groups()
+                key = (
+                    f"{int(bis_number)} bis" + (f" {int(index)}" if index else "") if bis_number
+                    else str(int(number)) if number else "1"
+                )
+                article = self.pending.get(key)
+                if article is None:
+                    continue
+                for earlier in self.pending.values():  # articles before this one get no Arabic text
+                    if earlier is article:
+                        break
+                    earlier.arabic_done = True
+                if self.arabic is not None and self.arabic is not article:
+                    self.arabic.arabic_done = True
+                self.arabic = article
+            if self.arabic is not None:
+                self.arabic.arabic.append(line)
+            yield from self._drain()
+            return
+
+        if len(line) < 60 and _ARABIC_HEADING.search(line):
+            if self.arabic is not None:
+                self.arabic.arabic_done = True
+                self.arabic = None
+            yield from self._drain()
+            return
+
+        if self.arabic is not None:
+            self.arabic.arabic.append(line)
+
+    def feed(self, line: str) -> Iterator[Dict[str, Any]]:
+        """Consume one line, yield the articles completed by it"""
+        line = line.translate(_C1_DASHES).strip()
+        if not line or _GAZETTE.search(line):
+            return
+        page = _PAGE.match(line)
+        if page and self.part == "code":
+            self.arabic_page = bool(page.group(1))
+            return
+        if _FOOTNOTE.match(line) or (self.arabic_page and line.endswith("*")):
+            return
+
+        if self.arabic_page:
+            if _ARABIC_LETTER.search(line):
+                yield from self._arabic_line(line)
+        else:
+            yield from self._french_line(line)
+
+    def finish(self) -> Iterator[Dict[str, Any]]:
+        """Flush the articles still waiting for their Arabic text"""
+        self.current = self.arabic = None
+        while self.pending:
+            _, article = self.pending.popitem(last=False)
+            yield from self._emit(article)
+
+
+def parse_code_penal(
+    lines: Iterable[str],
+    window: int = 64,
+    superseded: Optional[Set[str]] = None,
+    parser: Optional[CodePenalParser] = None
+) -> Iterator[Dict[str, Any]]:
+    """Stream articles out of the Code Pénal text, one line at a time"""
+    parser = parser or CodePenalParser(window, superseded)
+    for line in lines:
+        yield from parser.feed(line)
+    yield from parser.finish()
+
+
+def amended_numeros(lines: Iterable[str]) -> Set[str]:
+    """Numbers of the articles rewritten by the amending law at the end of the text"""
+    parser = CodePenalParser()
+    for _ in parse_code_penal(lines, parser=parser):
+        pass
+    return parser.amended
+
+
+def parse_code_penal_file(path: str, window: int = 64) -> Iterator[Dict[str, Any]]:
+    """
+    Stream articles from the source file (never read into memory as a whole).
+    A first, cheap pass collects the amended numbers so that only their final
+    version is yielded: re-ingesting an unchanged file then writes nothing.
+    """
+    with open(path, encoding="utf-8", errors="replace") as f:
+        superseded = amended_numeros(f)
+    with open(path, encoding="utf-8", errors="replace") as f:
+        yield from parse_code_penal(f, window, superseded)
@@ -5,10 +5,88 @@ Database Service - SQLite pour le Code Pénal Algérien
 import aiosqlite
 import os
 import json
-from typing import List, Dict, Any, Optional
+import re
+import hashlib
+from typing import List, Dict, Any, Optional, Iterable, Tuple
+
+from .penalty import extract_penalty, PENALTY_VERSION
+from .article_ref import numero_key
+from .text_utils import normalize_text, STOPWORDS
 
 DATABASE_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "code_penal.db")
 
+# Bump when the DDL / startup migrations below change. The database is stamped
+# (PRAGMA user_version) once they have run, so later startups skip them.
+SCHEMA_VERSION = 2  # 2: numero_key of "Art. 423-1" style numbers
+SCHEMA_STAMP = SCHEMA_VERSION * 1000 + PENALTY_VERSION
+
+BASE_FIELDS = ("numero", "texte", "texte_arabe", "categorie", "section", "chapitre", "titre", "livre")
+
+# Peines structurées, calculées à l'ingestion (voir services/penalty.py)
+PENALTY_FIELDS = (
+    "prison_min_mois", "prison_max_mois", "perpetuite", "peine_mort",
+    "amende_min", "amende_max", "prison_texte", "amende_texte"
+)
+
+ARTICLE_FIELDS = ("id",) + BASE_FIELDS + PENALTY_FIELDS
+ARTICLE_COLUMNS = ", ".join(ARTICLE_FIELDS)
+
+# Colonnes écrites à l'insertion / mise à jour d'un article
+WRITE_FIELDS = BASE_FIELDS + PENALTY_FIELDS + ("penalty_version", "numero_key", "content_hash")
+
+# Colonnes indexées en plein texte et leur poids bm25()
+FTS_COLUMNS = ("numero", "categorie", "section", "texte", "texte_arabe")
+FTS_WEIGHTS = (5.0, 3.0, 2.0, 1.0, 1.0)
+FTS_PREFIX_MIN_LENGTH = 5  # shorter words are matched exactly ("vol" must not match "volontairement")
+
+# Filtres structurés : nom -> (condition SQL, sur des colonnes indexées)
+FILTER_CLAUSES = {
+    "min_prison_mois": "(peine_mort = 1 OR perpetuite = 1 OR prison_max_mois >= ?)",
+    "max_prison_mois": "(peine_mort = 0 AND perpetuite = 0 AND prison_max_mois <= ?)",
+    "min_amende": "amende_max >= ?",
+    "max_amende": "amende_max <= ?",
+    "section": "section = ?",
+    "categorie": "categorie = ?",
+    "livre": "livre = ?"
+}
+
+# Tris disponibles (en plus de "relevance"), du plus au moins sévère pour *_desc
+SORT_ORDERS = {
+    "prison_desc": "peine_mort DESC, perpetuite DESC, prison_max_mois DESC, id",
+    "prison_asc": "peine_mort, perpetuite, prison_max_mois IS NULL, prison_max_mois, id",
+    "amende_desc": "amende_max DESC, id",
+    "amende_asc": "amende_max IS NULL, amende_max, id"
+}
+
+# Projection par défaut des listes (sans les textes complets)
+LIST_FIELDS = tuple(field for field in ARTICLE_FIELDS if field not in ("texte", "texte_arabe"))
+
+# Colonnes ajoutées après la création initiale de la table (migrées au démarrage)
+ADDED_COLUMNS = {
+    "embedding_hash": "TEXT",  # hash of the text the stored embedding was computed from
+    "embedding_dim": "INTEGER",  # dimension of the stored vector (Matryoshka truncation)
+    "prison_min_mois": "REAL",
+    "prison_max_mois": "REAL",
+    "perpetuite": "INTEGER DEFAULT 0",
+    "peine_mort": "INTEGER DEFAULT 0",
+    "amende_min": "INTEGER",
+    "amende_max": "INTEGER",
+    "prison_texte": "TEXT",
+    "amende_texte": "TEXT",
+    "penalty_version": "INTEGER",
+    "numero_key": "TEXT",  # normalized article number ("303 bis"), see services/article_ref.py
+    "content_hash": "TEXT"  # hash of BASE_FIELDS: re-ingestion only writes articles that changed
+}
+
+# Max bound parameters per "IN (...)" query
+_IN_CHUNK = 500
+
+
+def content_hash(article: Dict[str, Any]) -> str:
+    """Hash of an article's source fields (numero, texts, headings)"""
+    payload = "\x1f".join(str(article.get(field) or '') for field in BASE_FIELDS)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
 
 class DatabaseService:
     def __init__(self):
@@ -22,6 +100,11 @@ class DatabaseService:
         
         self.connection = await aiosqlite.connect(self.db_path)
         
+        cursor = await self.connection.execute("PRAGMA user_version")
+        if (await cursor.fetchone())[0] == SCHEMA_STAMP:
+            print(f"📦 Database opened (schema v{SCHEMA_VERSION}): {self.db_path}")
+            return
+        
         # Create articles table
         await self.connection.execute("""
             CREATE TABLE IF NOT EXISTS articles (
@@ -39,129 +122,510 @@ class DatabaseService:
             )
         """)
         
+        await self._add_missing_columns()
+        
         # Create index for faster search
         await self.connection.execute("""
             CREATE INDEX IF NOT EXISTS idx_numero ON articles(numero)
         """)
+        await self._refresh_numero_keys()
+        await self._refresh_content_hashes()
+        # Vectors stored before embedding_dim existed
+        await self.connection.execute("""
+            UPDATE articles SET embedding_dim = length(embedding) / 4
+            WHERE embedding IS NOT NULL AND embedding_dim IS NULL
+        """)
+        await self.connection.execute("""
+            CREATE INDEX IF NOT EXISTS idx_numero_key ON articles(numero_key)
+        """)
+        
+        # Indexes for structured filters / sorts
+        await self.connection.executescript("""
+            CREATE INDEX IF NOT EXISTS idx_prison_max ON articles(prison_max_mois);
+            CREATE INDEX IF NOT EXISTS idx_amende_max ON articles(amende_max);
+            CREATE INDEX IF NOT EXISTS idx_section ON articles(section);
+            CREATE INDEX IF NOT EXISTS idx_categorie ON articles(categorie);
+            CREATE INDEX IF NOT EXISTS idx_livre ON articles(livre);
+        """)
+        
+        await self._create_fts()
+        await self._create_corpus_version()
+        await self._refresh_penalties()
         
+        await self.connection.execute(f"PRAGMA user_version = {SCHEMA_STAMP}")
         await self.connection.commit()
         print(f"📦 Database initialized: {self.db_path}")
     
+    async def _add_missing_columns(self):
+        """Add columns introduced after the table was first created"""
+        cursor = await self.connection.execute("PRAGMA table_info(articles)")
+        existing = {row[1] for row in await cursor.fetchall()}
+        for column, column_type in ADDED_COLUMNS.items():
+            if column not in existing:
+                await self.connection.execute(f"ALTER TABLE articles ADD COLUMN {column} {column_type}")
+    
+    async def _refresh_penalties(self):
+        """Extract penalties for rows ingested before (or with an older) extractor"""
+        cursor = await self.connection.execute("""
+            SELECT id, texte FROM articles
+            WHERE penalty_version IS NULL OR penalty_version < ?
+        """, (PENALTY_VERSION,))
+        rows = await cursor.fetchall()
+        if not rows:
+            return
+        
+        assignments = ", ".join(f"{field} = ?" for field in PENALTY_FIELDS)
+        await self.connection.executemany(f"""
+            UPDATE articles SET {assignments}, penalty_version = ? WHERE id = ?
+        """, [
+            tuple(extract_penalty(texte)[field] for field in PENALTY_FIELDS) + (PENALTY_VERSION, article_id)
+            for article_id, texte in rows
+        ])
+        print(f"⚖️ Peines extraites pour {len(rows)} articles")
+    
+    async def _refresh_numero_keys(self):
+        """Compute the normalized article number for rows ingested before the column existed (or keyed differently)"""
+        cursor = await self.connection.execute("SELECT id, numero, numero_key FROM articles")
+        changed = []
+        for article_id, numero, key in await cursor.fetchall():
+            normalized = numero_key(numero)
+            if normalized != key:
+                changed.append((normalized, article_id))
+        if changed:
+            await self.connection.executemany("UPDATE articles SET numero_key = ? WHERE id = ?", changed)
+    
+    async def _refresh_content_hashes(self):
+        """Hash the source fields of rows ingested before the column existed"""
+        cursor = await self.connection.execute(
+            f"SELECT id, {', '.join(BASE_FIELDS)} FROM articles WHERE content_hash IS NULL"
+        )
+        rows = await cursor.fetchall()
+        if rows:
+            await self.connection.executemany(
+                "UPDATE articles SET content_hash = ? WHERE id = ?",
+                [(content_hash(dict(zip(BASE_FIELDS, row[1:]))), row[0]) for row in rows]
+            )
+    
+    async def _create_fts(self):
+        """Create the FTS5 index (accent-folding) and the triggers keeping it in sync"""
+        cursor = await self.connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'articles_fts'"
+        )
+        exists = await cursor.fetchone() is not None
+        
+        columns = ", ".join(FTS_COLUMNS)
+        new_values = ", ".join(f"new.{c}" for c in FTS_COLUMNS)
+        old_values = ", ".join(f"old.{c}" for c in FTS_COLUMNS)
+        
+        await self.connection.executescript(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+                {columns},
+                content='articles', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2'
+            );
+            
+            CREATE TRIGGER IF NOT EXISTS articles_fts_insert AFTER INSERT ON articles BEGIN
+                INSERT INTO articles_fts(rowid, {columns}) VALUES (new.id, {new_values});
+            END;
+            
+            CREATE TRIGGER IF NOT EXISTS articles_fts_delete AFTER DELETE ON articles BEGIN
+                INSERT INTO articles_fts(articles_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+            END;
+            
+            CREATE TRIGGER IF NOT EXISTS articles_fts_update AFTER UPDATE OF {columns} ON articles BEGIN
+                INSERT INTO articles_fts(articles_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+                INSERT INTO articles_fts(rowid, {columns}) VALUES (new.id, {new_values});
+            END;
+        """)
+        
+        if not exists:
+            # Existing rows predate the index
+            await self.connection.execute("INSERT INTO articles_fts(articles_fts) VALUES ('rebuild')")
+            print("🔎 Index FTS5 créé")
+    
+    async def _create_corpus_version(self):
+        """
+        Version counters bumped by triggers (ETags, caches, snapshots):
+        corpus_version on every article change, embedding_version on every embedding write
+        """
+        columns = ", ".join(BASE_FIELDS + PENALTY_FIELDS)
+        bump = "UPDATE meta SET value = value + 1 WHERE key = 'corpus_version';"
+        bump_embedding = "UPDATE meta SET value = value + 1 WHERE key = 'embedding_version';"
+        await self.connection.executescript(f"""
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+            INSERT OR IGNORE INTO meta (key, value) VALUES ('corpus_version', 1);
+            INSERT OR IGNORE INTO meta (key, value) VALUES ('embedding_version', 1);
+            INSERT OR IGNORE INTO meta (key, value) VALUES ('database_id', abs(random()));
+            
+            CREATE TRIGGER IF NOT EXISTS articles_version_insert AFTER INSERT ON articles BEGIN {bump} END;
+            CREATE TRIGGER IF NOT EXISTS articles_version_delete AFTER DELETE ON articles BEGIN {bump} END;
+            CREATE TRIGGER IF NOT EXISTS articles_version_update AFTER UPDATE OF {columns} ON articles BEGIN {bump} END;
+            CREATE TRIGGER IF NOT EXISTS articles_embedding_version AFTER UPDATE OF embedding ON articles
+                BEGIN {bump_embedding} END;
+        """)
+    
+    async def _get_meta(self, key: str) -> int:
+        cursor = await self.connection.execute("SELECT value FROM meta WHERE key = ?", (key,))
+        row = await cursor.fetchone()
+        return row[0] if row else 0
+    
+    async def get_corpus_version(self) -> int:
+        """Current corpus version (changes whenever an article is added, edited or removed)"""
+        return await self._get_meta('corpus_version')
+    
+    async def get_embedding_version(self) -> int:
+        """Changes whenever a stored embedding is written or cleared"""
+        return await self._get_meta('embedding_version')
+    
+    async def get_stamp(self) -> Dict[str, int]:
+        """database_id + corpus / embedding versions: identifies the exact content (snapshots)"""
+        cursor = await self.connection.execute("""
+            SELECT key, value FROM meta WHERE key IN ('database_id', 'corpus_version', 'embedding_version')
+        """)
+        return dict(await cursor.fetchall())
+    
+    @staticmethod
+    def _row_to_article(row) -> Dict[str, Any]:
+        return dict(zip(ARTICLE_FIELDS, row))
+    
     async def get_article_count(self) -> int:
         """Get total number of articles"""
         cursor = await self.connection.execute("SELECT COUNT(*) FROM articles")
         row = await cursor.fetchone()
         return row[0] if row else 0
     
+    @staticmethod
+    def _article_values(article: Dict[str, Any]) -> Tuple:
+        """Values for WRITE_FIELDS (penalties are extracted here, once)"""
+        penalty = extract_penalty(article.get('texte', ''))
+        return (
+            tuple(article.get(field, '') for field in BASE_FIELDS)
+            + tuple(penalty[field] for field in PENALTY_FIELDS)
+            + (PENALTY_VERSION, numero_key(article.get('numero', '')), content_hash(article))
+        )
+    
+    _INSERT_SQL = f"""
+        INSERT INTO articles ({", ".join(WRITE_FIELDS)})
+        VALUES ({", ".join("?" for _ in WRITE_FIELDS)})
+    """
+    
     async def insert_article(self, article: Dict[str, Any]) -> int:
         """Insert a single article"""
-        cursor = await self.connection.execute("""
-            INSERT INTO articles (numero, texte, texte_arabe, categorie, section, chapitre, titre, livre)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            article.get('numero', ''),
-            article.get('texte', ''),
-            article.get('texte_arabe', ''),
-            article.get('categorie', ''),
-            article.get('section', ''),
-            article.get('chapitre', ''),
-            article.get('titre', ''),
-            article.get('livre', '')
-        ))
+        cursor = await self.connection.execute(self._INSERT_SQL, self._article_values(article))
         await self.connection.commit()
         return cursor.lastrowid
     
-    async def insert_articles_batch(self, articles: List[Dict[str, Any]]) -> int:
-        """Insert multiple articles at once"""
-        count = 0
+    async def get_content_hashes(self, numeros: Iterable[str]) -> Dict[str, Optional[str]]:
+        """content_hash of the given articles that exist, by numero"""
+        numeros = list(dict.fromkeys(numeros))
+        hashes: Dict[str, Optional[str]] = {}
+        for start in range(0, len(numeros), _IN_CHUNK):
+            chunk = numeros[start:start + _IN_CHUNK]
+            cursor = await self.connection.execute(
+                f"SELECT numero, content_hash FROM articles WHERE numero IN ({', '.join('?' for _ in chunk)})",
+                chunk
+            )
+            hashes.update({numero: digest for numero, digest in await cursor.fetchall()})
+        return hashes
+    
+    async def insert_articles_batch(
+        self,
+        articles: Iterable[Dict[str, Any]],
+        only_missing: bool = False
+    ) -> Dict[str, int]:
+        """
+        Incremental upsert on numero, diffed by content_hash: one executemany per
+        statement, one transaction. New articles are inserted, changed ones updated
+        in place (embedding cleared if the embedded text changed), unchanged ones untouched.
+        only_missing: existing numeros are never updated (supplements to a parsed source).
+        Returns {'inserted': n, 'updated': m, 'unchanged': k}
+        """
+        latest: Dict[str, Tuple] = {}
         for article in articles:
-            await self.insert_article(article)
-            count += 1
-        return count
+            values = self._article_values(article)
+            latest[values[0]] = values  # last occurrence wins within the batch
+        existing = await self.get_content_hashes(latest)
+        
+        inserts = [values for numero, values in latest.items() if numero not in existing]
+        updates = [
+            values for numero, values in latest.items()
+            if numero in existing and existing[numero] != values[-1] and not only_missing
+        ]
+        
+        try:
+            await self.connection.executemany(self._INSERT_SQL, inserts)
+            assignments = ", ".join(f"{field} = ?" for field in WRITE_FIELDS[1:])
+            unchanged_text = "texte = ? AND categorie IS ?"  # see BaseEmbeddingProvider.passage_text
+            await self.connection.executemany(f"""
+                UPDATE articles SET
+                    embedding = CASE WHEN {unchanged_text} THEN embedding ELSE NULL END,
+                    embedding_dim = CASE WHEN {unchanged_text} THEN embedding_dim ELSE NULL END,
+                    {assignments}
+                WHERE numero = ?
+            """, [(v[1], v[3], v[1], v[3]) + v[1:] + (v[0],) for v in updates])
+            await self.connection.commit()
+        except Exception:
+            await self.connection.rollback()
+            raise
+        
+        return {'inserted': len(inserts), 'updated': len(updates), 'unchanged': len(latest) - len(inserts) - len(updates)}
+    
+    async def delete_articles_except(self, numeros: Iterable[str]) -> int:
+        """Delete the articles whose numero is not in `numeros` (full re-ingestion); returns the count"""
+        keep = set(numeros)
+        cursor = await self.connection.execute("SELECT id, numero FROM articles")
+        stale = [(article_id,) for article_id, numero in await cursor.fetchall() if numero not in keep]
+        if stale:
+            await self.connection.executemany("DELETE FROM articles WHERE id = ?", stale)
+            await self.connection.commit()
+        return len(stale)
     
-    async def update_embedding(self, article_id: int, embedding: bytes):
+    async def update_embedding(self, article_id: int, embedding: bytes, embedding_hash: Optional[str] = None):
         """Update embedding for an article"""
         await self.connection.execute("""
-            UPDATE articles SET embedding = ? WHERE id = ?
-        """, (embedding, article_id))
+            UPDATE articles SET embedding = ?, embedding_hash = ?, embedding_dim = ? WHERE id = ?
+        """, (embedding, embedding_hash, len(embedding) // 4, article_id))
         await self.connection.commit()
     
+    async def update_embeddings_batch(self, items: List[Tuple[int, bytes, Optional[str]]]) -> int:
+        """Write (article_id, embedding, embedding_hash) rows in a single transaction"""
+        try:
+            await self.connection.executemany("""
+                UPDATE articles SET embedding = ?, embedding_hash = ?, embedding_dim = ? WHERE id = ?
+            """, [
+                (embedding, embedding_hash, len(embedding) // 4, article_id)
+                for article_id, embedding, embedding_hash in items
+            ])
+            await self.connection.commit()
+        except Exception:
+            await self.connection.rollback()
+            raise
+        return len(items)
+    
+    async def get_embedded_articles(
+        self,
+        after_id: int = 0,
+        limit: Optional[int] = None,
+        larger_than: int = 0
+    ) -> List[Dict[str, Any]]:
+        """Keyset page of articles with a stored vector of more than `larger_than` dimensions"""
+        cursor = await self.connection.execute("""
+            SELECT id, numero, texte, categorie, embedding_hash, embedding, embedding_dim
+            FROM articles
+            WHERE embedding IS NOT NULL AND embedding_dim > ? AND id > ?
+            ORDER BY id LIMIT ?
+        """, (larger_than, after_id, -1 if limit is None else limit))
+        fields = ('id', 'numero', 'texte', 'categorie', 'embedding_hash', 'embedding', 'embedding_dim')
+        return [dict(zip(fields, row)) for row in await cursor.fetchall()]
+    
+    async def get_embedding_hashes(self) -> Dict[int, Tuple[Optional[str], int]]:
+        """(embedding_hash, embedding_dim) of every stored vector by article id, without reading the BLOBs"""
+        cursor = await self.connection.execute("""
+            SELECT id, embedding_hash, embedding_dim FROM articles WHERE embedding IS NOT NULL
+        """)
+        return {row[0]: (row[1], row[2]) for row in await cursor.fetchall()}
+    
+    async def get_embeddings(self, article_ids: List[int]) -> List[Tuple[Dict[str, Any], bytes]]:
+        """(article, embedding blob) for the given ids"""
+        if not article_ids:
+            return []
+        cursor = await self.connection.execute(f"""
+            SELECT {ARTICLE_COLUMNS}, embedding FROM articles
+            WHERE id IN ({", ".join("?" for _ in article_ids)}) AND embedding IS NOT NULL
+        """, article_ids)
+        return [(self._row_to_article(row), row[-1]) for row in await cursor.fetchall()]
+    
+    async def get_article(self, article_id: int) -> Optional[Dict[str, Any]]:
+        """Get one article by primary key"""
+        cursor = await self.connection.execute(f"""
+            SELECT {ARTICLE_COLUMNS} FROM articles WHERE id = ?
+        """, (article_id,))
+        row = await cursor.fetchone()
+        return self._row_to_article(row) if row else None
+    
+    async def get_articles_by_numero_keys(self, keys: List[str]) -> List[Dict[str, Any]]:
+        """Exact lookup on the normalized article number (idx_numero_key), in key order"""
+        if not keys:
+            return []
+        cursor = await self.connection.execute(f"""
+            SELECT {ARTICLE_COLUMNS}, numero_key FROM articles
+            WHERE numero_key IN ({", ".join("?" for _ in keys)})
+        """, keys)
+        by_key = {row[-1]: self._row_to_article(row) for row in await cursor.fetchall()}
+        return [by_key[key] for key in keys if key in by_key]
+    
     async def search_by_numero(self, numero: str) -> Optional[Dict[str, Any]]:
         """Search article by number"""
-        cursor = await self.connection.execute("""
-            SELECT id, numero, texte, texte_arabe, categorie, section, chapitre, titre, livre
+        cursor = await self.connection.execute(f"""
+            SELECT {ARTICLE_COLUMNS}
             FROM articles WHERE numero LIKE ?
         """, (f"%{numero}%",))
         row = await cursor.fetchone()
-        if row:
-            return {
-                'id': row[0],
-                'numero': row[1],
-                'texte': row[2],
-                'texte_arabe': row[3],
-                'categorie': row[4],
-                'section': row[5],
-                'chapitre': row[6],
-                'titre': row[7],
-                'livre': row[8]
-            }
-        return None
+        return self._row_to_article(row) if row else None
     
     async def search_by_text(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
         """Search articles by text (simple LIKE search)"""
-        cursor = await self.connection.execute("""
-            SELECT id, numero, texte, texte_arabe, categorie, section, chapitre, titre, livre
+        cursor = await self.connection.execute(f"""
+            SELECT {ARTICLE_COLUMNS}
             FROM articles 
             WHERE texte LIKE ? OR numero LIKE ?
             LIMIT ?
         """, (f"%{query}%", f"%{query}%", limit))
         
         rows = await cursor.fetchall()
-        return [
-            {
-                'id': row[0],
-                'numero': row[1],
-                'texte': row[2],
-                'texte_arabe': row[3],
-                'categorie': row[4],
-                'section': row[5],
-                'chapitre': row[6],
-                'titre': row[7],
-                'livre': row[8]
-            }
-            for row in rows
+        return [self._row_to_article(row) for row in rows]
+    
+    @staticmethod
+    def _fts_queries(query: str) -> List[str]:
+        """
+        Safe FTS5 MATCH expressions for free text, strictest first: every term,
+        any term, then any term with prefix matching for words of FTS_PREFIX_MIN_LENGTH+.
+        """
+        terms = list(dict.fromkeys(
+            token for token in re.findall(r'\w+', normalize_text(query))
+            if token.isdigit() or (len(token) > 2 and token not in STOPWORDS)
+        ))
+        if not terms:
+            return []
+        exact = [f'"{term}"' for term in terms]
+        loose = [
+            f'"{term}"*' if len(term) >= FTS_PREFIX_MIN_LENGTH and not term.isdigit() else f'"{term}"'
+            for term in terms
         ]
+        queries = [" AND ".join(exact)]
+        if len(terms) > 1:
+            queries.append(" OR ".join(exact))
+        if loose != exact:
+            queries.append(" OR ".join(loose))
+        return queries
+    
+    @staticmethod
+    def _filter_sql(filters: Optional[Dict[str, Any]], prefix: str = "") -> Tuple[str, List[Any]]:
+        """AND-combined WHERE fragment for the structured filters that are set"""
+        clauses, params = [], []
+        for name, value in (filters or {}).items():
+            if value is None or name not in FILTER_CLAUSES:
+                continue
+            clause = FILTER_CLAUSES[name]
+            if prefix:
+                clause = re.sub(r"\b(peine_mort|perpetuite|prison_max_mois|amende_max|section|categorie|livre)\b",
+                                rf"{prefix}\1", clause)
+            clauses.append(clause)
+            params.append(value)
+        return " AND ".join(clauses), params
+    
+    async def filter_article_ids(self, filters: Dict[str, Any]) -> set:
+        """Ids of the articles matching the structured filters (index lookups)"""
+        where, params = self._filter_sql(filters)
+        cursor = await self.connection.execute(
+            f"SELECT id FROM articles WHERE {where or '1'}", params
+        )
+        return {row[0] for row in await cursor.fetchall()}
+    
+    async def search_articles(
+        self,
+        filters: Optional[Dict[str, Any]] = None,
+        sort: Optional[str] = None,
+        limit: int = 20,
+        offset: int = 0
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """Structured search without text: (page of articles, total matches)"""
+        where, params = self._filter_sql(filters)
+        where = where or "1"
+        order = SORT_ORDERS.get(sort, "id")
+        
+        cursor = await self.connection.execute(f"SELECT COUNT(*) FROM articles WHERE {where}", params)
+        total = (await cursor.fetchone())[0]
+        
+        cursor = await self.connection.execute(f"""
+            SELECT {ARTICLE_COLUMNS} FROM articles
+            WHERE {where} ORDER BY {order} LIMIT ? OFFSET ?
+        """, params + [limit, offset])
+        return [self._row_to_article(row) for row in await cursor.fetchall()], total
+    
+    async def search_fts(
+        self,
+        query: str,
+        limit: int = 5,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Full-text search ranked by SQLite bm25() (best first), optionally filtered.
+        Articles matching every term come first; looser matches (any term, then word
+        prefixes) only fill the remaining places, never outranking a stricter match.
+        """
+        columns = ", ".join(f"a.{field}" for field in ARTICLE_FIELDS)
+        weights = ", ".join(str(w) for w in FTS_WEIGHTS)
+        where, params = self._filter_sql(filters, prefix="a.")
+        
+        results: Dict[int, Dict[str, Any]] = {}
+        for match in self._fts_queries(query):
+            if len(results) >= limit:
+                break
+            cursor = await self.connection.execute(f"""
+                SELECT {columns}, bm25(articles_fts, {weights}) AS rank
+                FROM articles_fts JOIN articles a ON a.id = articles_fts.rowid
+                WHERE articles_fts MATCH ? {"AND " + where if where else ""}
+                ORDER BY rank
+                LIMIT ?
+            """, [match] + params + [limit])
+            
+            floor = min((article['score'] for article in results.values()), default=None)
+            for row in await cursor.fetchall():
+                article = self._row_to_article(row)
+                if article['id'] in results or len(results) >= limit:
+                    continue
+                article['score'] = -row[len(ARTICLE_FIELDS)]  # bm25() is negative, lower is better
+                if floor is not None:
+                    article['score'] = min(article['score'], floor)
+                results[article['id']] = article
+        return list(results.values())
     
     async def get_all_articles(self) -> List[Dict[str, Any]]:
         """Get all articles"""
-        cursor = await self.connection.execute("""
-            SELECT id, numero, texte, texte_arabe, categorie, section, chapitre, titre, livre
+        cursor = await self.connection.execute(f"""
+            SELECT {ARTICLE_COLUMNS}
             FROM articles ORDER BY id
         """)
         rows = await cursor.fetchall()
+        return [self._row_to_article(row) for row in rows]
+    
+    async def list_articles(
+        self,
+        after_id: int = 0,
+        limit: int = 50,
+        fields: Iterable[str] = LIST_FIELDS
+    ) -> List[Dict[str, Any]]:
+        """Keyset page of articles (id > after_id, ordered by id) with only the requested fields"""
+        fields = tuple(field for field in ARTICLE_FIELDS if field in set(fields) | {"id"})
+        cursor = await self.connection.execute(f"""
+            SELECT {", ".join(fields)} FROM articles
+            WHERE id > ? ORDER BY id LIMIT ?
+        """, (after_id, limit))
+        return [dict(zip(fields, row)) for row in await cursor.fetchall()]
+    
+    async def get_articles_without_embeddings(
+        self,
+        after_id: int = 0,
+        limit: Optional[int] = None,
+        include_embedded: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        Get articles that don't have embeddings yet, paged by id (keyset).
+        With include_embedded, embedded articles are returned too (with their
+        embedding_hash) so callers can detect vectors computed from an older text.
+        """
+        where = "id > ?" if include_embedded else "id > ? AND embedding IS NULL"
+        cursor = await self.connection.execute(f"""
+            SELECT id, numero, texte, categorie, embedding_hash FROM articles
+            WHERE {where} ORDER BY id LIMIT ?
+        """, (after_id, limit if limit is not None else -1))
+        rows = await cursor.fetchall()
         return [
-            {
-                'id': row[0],
-                'numero': row[1],
-                'texte': row[2],
-                'texte_arabe': row[3],
-                'categorie': row[4],
-                'section': row[5],
-                'chapitre': row[6],
-                'titre': row[7],
-                'livre': row[8]
-            }
+            {'id': row[0], 'numero': row[1], 'texte': row[2], 'categorie': row[3], 'embedding_hash': row[4]}
             for row in rows
         ]
     
-    async def get_articles_without_embeddings(self) -> List[Dict[str, Any]]:
-        """Get articles that don't have embeddings yet"""
-        cursor = await self.connection.execute("""
-            SELECT id, numero, texte FROM articles WHERE embedding IS NULL
-        """)
-        rows = await cursor.fetchall()
-        return [{'id': row[0], 'numero': row[1], 'texte': row[2]} for row in rows]
-    
     async def close(self):
         """Close database connection"""
         if self.connection:
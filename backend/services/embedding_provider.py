@@ -0,0 +1,91 @@
+"""
+Embedding providers - Interface commune (Jina AI, modèle local CPU)
+Tous les fournisseurs produisent des vecteurs float32 stockés dans la même
+colonne `embedding` ; le hash du contenu inclut le modèle et la dimension.
+"""
+
+import os
+import struct
+import hashlib
+from abc import ABC, abstractmethod
+from typing import List, Optional, Dict, Any
+
+from .http_client import HTTPClient
+
+
+class BaseEmbeddingProvider(ABC):
+    """Passage and query embeddings for semantic search"""
+
+    name: str = "base"
+    model: str = ""
+    dimensions: int = 0
+
+    async def initialize(self):
+        pass
+
+    async def close(self):
+        pass
+
+    @abstractmethod
+    async def get_embeddings_batch(self, texts: List[str], raise_on_error: bool = False) -> List[Optional[List[float]]]:
+        """Embed passages (articles)"""
+
+    @abstractmethod
+    async def get_query_embedding(self, query: str) -> Optional[List[float]]:
+        """Embed a search query"""
+
+    async def get_embedding(self, text: str) -> Optional[List[float]]:
+        """Embed a single passage"""
+        embeddings = await self.get_embeddings_batch([text])
+        return embeddings[0] if embeddings else None
+
+    async def get_query_embeddings_batch(self, queries: List[str]) -> List[Optional[List[float]]]:
+        """Embed many queries (default: one at a time)"""
+        return [await self.get_query_embedding(query) for query in queries]
+
+    def cache_stats(self) -> Optional[Dict[str, Any]]:
+        return None
+
+    @staticmethod
+    def passage_text(article: Dict[str, Any]) -> str:
+        """Text embedded for an article (number + category + body)"""
+        header = " - ".join(part for part in (article.get('numero'), article.get('categorie')) if part)
+        return f"{header}\n{article.get('texte', '')}"
+
+    def content_hash(self, text: str, dimensions: Optional[int] = None) -> str:
+        """Hash of the embedded text and embedding settings (changes => re-embed)"""
+        dimensions = dimensions or self.dimensions
+        return hashlib.sha256(f"{self.model}:{dimensions}:{text}".encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def embedding_to_bytes(embedding: List[float]) -> bytes:
+        """Convert embedding list to bytes for SQLite storage"""
+        return struct.pack(f'{len(embedding)}f', *embedding)
+
+    @staticmethod
+    def bytes_to_embedding(data: bytes) -> List[float]:
+        """Convert bytes back to embedding list"""
+        count = len(data) // 4  # float is 4 bytes
+        return list(struct.unpack(f'{count}f', data))
+
+
+def create_embedding_provider(http_client: Optional[HTTPClient] = None) -> Optional[BaseEmbeddingProvider]:
+    """
+    Provider selected by EMBEDDING_PROVIDER ("jina", "local", "none");
+    by default Jina when JINA_API_KEY is set, otherwise none (keyword search only).
+    """
+    provider = os.getenv("EMBEDDING_PROVIDER", "").lower()
+    if not provider:
+        provider = "jina" if os.getenv("JINA_API_KEY") else "none"
+
+    if provider == "jina":
+        from .embedding_service import JinaEmbeddingService
+        service = JinaEmbeddingService(http_client=http_client)
+        if not service.api_key:
+            print("⚠️ JINA_API_KEY non défini - embeddings Jina désactivés")
+            return None
+        return service
+    if provider == "local":
+        from .local_embedding import LocalEmbeddingService
+        return LocalEmbeddingService()
+    return None
@@ -2,25 +2,72 @@
 Jina AI Embedding Service - API cloud pour embeddings
 """
 
-import aiohttp
 import os
-import struct
-from typing import List, Optional
+from typing import List, Optional, Dict, Any
 
+from .http_client import HTTPClient
+from .embedding_provider import BaseEmbeddingProvider
+from .cache import TTLCache, SQLiteCache
+from .text_utils import normalize_text
 
-class JinaEmbeddingService:
-    def __init__(self, api_key: str = None):
+
+class JinaAPIError(Exception):
+    """Jina API call failed (status is None for network errors)"""
+    
+    def __init__(self, status: Optional[int], message: str, retry_after: Optional[float] = None):
+        super().__init__(f"Jina API error ({status}): {message}")
+        self.status = status
+        self.retry_after = retry_after
+    
+    @property
+    def retryable(self) -> bool:
+        return self.status is None or self.status == 429 or self.status >= 500
+
+
+class JinaEmbeddingService(BaseEmbeddingProvider):
+    name = "jina"
+    
+    def __init__(self, api_key: str = None, http_client: Optional[HTTPClient] = None):
         self.api_key = api_key or os.getenv("JINA_API_KEY")
-        self.api_url = "https://api.jina.ai/v1/embeddings"
+        self.api_url = os.getenv("JINA_API_URL", "https://api.jina.ai/v1/embeddings")
         self.model = "jina-embeddings-v3"  # Multilingual, supports French & Arabic
-        self.dimensions = 1024  # Default dimensions
-    
-    async def get_embedding(self, text: str) -> Optional[List[float]]:
-        """Get embedding for a single text"""
-        if not self.api_key:
-            print("⚠️ JINA_API_KEY not set")
-            return None
+        # Matryoshka output size (jina-embeddings-v3: 32 to 1024), sent with every request
+        self.dimensions = int(os.getenv("JINA_EMBEDDING_DIMENSIONS", "1024"))
+        if not 32 <= self.dimensions <= 1024:
+            raise ValueError(f"JINA_EMBEDDING_DIMENSIONS must be between 32 and 1024, got {self.dimensions}")
+        self.max_batch_size = int(os.getenv("JINA_MAX_BATCH_SIZE", "128"))  # inputs per API request
+        self.http_client = http_client or HTTPClient()
         
+        # Query embedding cache: in-process LRU + optional SQLite tier
+        self.query_cache = TTLCache(
+            max_size=int(os.getenv("EMBEDDING_CACHE_SIZE", "2048")),
+            ttl=float(os.getenv("EMBEDDING_CACHE_TTL", "86400"))
+        )
+        cache_path = os.getenv("EMBEDDING_CACHE_PATH", "")
+        self.disk_cache: Optional[SQLiteCache] = SQLiteCache(cache_path) if cache_path else None
+    
+    async def initialize(self):
+        """Open the on-disk cache tier if configured"""
+        if self.disk_cache:
+            await self.disk_cache.initialize()
+            print(f"💾 Cache embeddings sur disque: {self.disk_cache.path}")
+    
+    async def close(self):
+        if self.disk_cache:
+            await self.disk_cache.close()
+    
+    def _query_cache_key(self, query: str) -> str:
+        normalized = " ".join(normalize_text(query).split())
+        return f"{self.model}:{self.dimensions}:retrieval.query:{normalized}"
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        stats = {"memory": self.query_cache.stats()}
+        if self.disk_cache:
+            stats["disk"] = self.disk_cache.stats()
+        return stats
+    
+    async def _request_embeddings(self, texts: List[str], task: str, raise_on_error: bool = False) -> Optional[List[List[float]]]:
+        """POST texts to the Jina API over the shared session"""
         headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
@@ -28,93 +75,113 @@ class JinaEmbeddingService:
         
         payload = {
             "model": self.model,
-            "input": [text],
-            "task": "retrieval.passage"  # Optimized for search
+            "input": texts,
+            "task": task,
+            "dimensions": self.dimensions
         }
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(self.api_url, headers=headers, json=payload) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return data["data"][0]["embedding"]
-                    else:
-                        error = await response.text()
-                        print(f"❌ Jina API error ({response.status}): {error}")
-                        return None
+            async with self.http_client.session.post(self.api_url, headers=headers, json=payload) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    return [item["embedding"] for item in data["data"]]
+                else:
+                    error = await response.text()
+                    if raise_on_error:
+                        retry_after = response.headers.get("Retry-After")
+                        raise JinaAPIError(
+                            response.status, error,
+                            float(retry_after) if retry_after and retry_after.isdigit() else None
+                        )
+                    print(f"❌ Jina API error ({response.status}): {error}")
+                    return None
+        except JinaAPIError:
+            raise
         except Exception as e:
+            if raise_on_error:
+                raise JinaAPIError(None, str(e)) from e
             print(f"❌ Jina API exception: {e}")
             return None
     
-    async def get_embeddings_batch(self, texts: List[str]) -> List[Optional[List[float]]]:
-        """Get embeddings for multiple texts (batch)"""
+    async def get_embedding(self, text: str) -> Optional[List[float]]:
+        """Get embedding for a single text"""
         if not self.api_key:
             print("⚠️ JINA_API_KEY not set")
-            return [None] * len(texts)
+            return None
         
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
+        embeddings = await self._request_embeddings([text], "retrieval.passage")  # Optimized for search
+        return embeddings[0] if embeddings else None
+    
+    async def get_embeddings_batch(self, texts: List[str], raise_on_error: bool = False) -> List[Optional[List[float]]]:
+        """Get embeddings for multiple texts (batch); raise_on_error raises JinaAPIError instead of returning None"""
+        if not self.api_key:
+            print("⚠️ JINA_API_KEY not set")
+            return [None] * len(texts)
         
-        payload = {
-            "model": self.model,
-            "input": texts,
-            "task": "retrieval.passage"
-        }
+        embeddings = await self._request_embeddings(texts, "retrieval.passage", raise_on_error)
+        return embeddings if embeddings else [None] * len(texts)
+    
+    async def _cached_query_embedding(self, key: str) -> Optional[List[float]]:
+        """Look a query embedding up in memory, then in the disk tier"""
+        embedding = self.query_cache.get(key)
+        if embedding is not None:
+            return embedding
         
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(self.api_url, headers=headers, json=payload) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return [item["embedding"] for item in data["data"]]
-                    else:
-                        error = await response.text()
-                        print(f"❌ Jina API batch error ({response.status}): {error}")
-                        return [None] * len(texts)
-        except Exception as e:
-            print(f"❌ Jina API exception: {e}")
-            return [None] * len(texts)
+        if self.disk_cache:
+            data = await self.disk_cache.get(key)
+            if data is not None:
+                embedding = self.bytes_to_embedding(data)
+                self.query_cache.set(key, embedding)
+                return embedding
+        return None
+    
+    async def _store_query_embedding(self, key: str, embedding: List[float]):
+        self.query_cache.set(key, embedding)
+        if self.disk_cache:
+            await self.disk_cache.set(key, self.embedding_to_bytes(embedding))
     
     async def get_query_embedding(self, query: str) -> Optional[List[float]]:
-        """Get embedding for a search query (different task type)"""
+        """Get embedding for a search query (different task type), cached"""
         if not self.api_key:
             return None
         
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
-        
-        payload = {
-            "model": self.model,
-            "input": [query],
-            "task": "retrieval.query"  # Optimized for queries
-        }
+        key = self._query_cache_key(query)
+        embedding = await self._cached_query_embedding(key)
+        if embedding is not None:
+            return embedding
         
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(self.api_url, headers=headers, json=payload) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return data["data"][0]["embedding"]
-                    else:
-                        return None
-        except Exception as e:
-            print(f"❌ Jina query error: {e}")
+        embeddings = await self._request_embeddings([query], "retrieval.query")  # Optimized for queries
+        if not embeddings:
             return None
+        
+        embedding = embeddings[0]
+        await self._store_query_embedding(key, embedding)
+        return embedding
     
-    @staticmethod
-    def embedding_to_bytes(embedding: List[float]) -> bytes:
-        """Convert embedding list to bytes for SQLite storage"""
-        return struct.pack(f'{len(embedding)}f', *embedding)
-    
-    @staticmethod
-    def bytes_to_embedding(data: bytes) -> List[float]:
-        """Convert bytes back to embedding list"""
-        count = len(data) // 4  # float is 4 bytes
-        return list(struct.unpack(f'{count}f', data))
+    async def get_query_embeddings_batch(self, queries: List[str]) -> List[Optional[List[float]]]:
+        """Embed many queries: cache hits first, the rest in as few API requests as possible"""
+        if not self.api_key:
+            return [None] * len(queries)
+        
+        embeddings: List[Optional[List[float]]] = [None] * len(queries)
+        missing: Dict[str, List[int]] = {}  # cache key -> positions (duplicates embedded once)
+        for i, query in enumerate(queries):
+            key = self._query_cache_key(query)
+            embeddings[i] = await self._cached_query_embedding(key)
+            if embeddings[i] is None:
+                missing.setdefault(key, []).append(i)
+        
+        keys = list(missing)
+        for start in range(0, len(keys), self.max_batch_size):
+            chunk = keys[start:start + self.max_batch_size]
+            results = await self._request_embeddings([queries[missing[key][0]] for key in chunk], "retrieval.query")
+            if not results:
+                continue
+            for key, embedding in zip(chunk, results):
+                await self._store_query_embedding(key, embedding)
+                for i in missing[key]:
+                    embeddings[i] = embedding
+        return embeddings
     
     @staticmethod
     def cosine_similarity(vec1: List[float], vec2: List[float]) -> float:
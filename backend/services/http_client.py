@@ -0,0 +1,58 @@
+"""
+HTTP Client - Session aiohttp partagée pour Jina et Groq
+Keep-alive + pool de connexions : on évite DNS/TCP/TLS à chaque requête.
+"""
+
+import aiohttp
+import os
+from typing import Optional
+
+
+class HTTPClient:
+    """Long-lived, app-scoped aiohttp session with connection pooling"""
+
+    def __init__(
+        self,
+        limit: Optional[int] = None,
+        limit_per_host: Optional[int] = None,
+        timeout: Optional[float] = None,
+        connect_timeout: Optional[float] = None,
+        keepalive_timeout: Optional[float] = None
+    ):
+        self.limit = limit or int(os.getenv("HTTP_POOL_LIMIT", "100"))
+        self.limit_per_host = limit_per_host or int(os.getenv("HTTP_POOL_LIMIT_PER_HOST", "20"))
+        self.timeout = timeout or float(os.getenv("HTTP_TIMEOUT", "60"))
+        self.connect_timeout = connect_timeout or float(os.getenv("HTTP_CONNECT_TIMEOUT", "10"))
+        self.keepalive_timeout = keepalive_timeout or float(os.getenv("HTTP_KEEPALIVE_TIMEOUT", "60"))
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def _create_session(self) -> aiohttp.ClientSession:
+        connector = aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            keepalive_timeout=self.keepalive_timeout,
+            ttl_dns_cache=300
+        )
+        return aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout, connect=self.connect_timeout)
+        )
+
+    async def start(self):
+        """Create the pooled session (call from the running event loop)"""
+        if self._session is None or self._session.closed:
+            self._session = self._create_session()
+            print(f"🌐 HTTP pool prêt ({self.limit_per_host} connexions/hôte, timeout {self.timeout:.0f}s)")
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """The shared session, created lazily if start() was not called"""
+        if self._session is None or self._session.closed:
+            self._session = self._create_session()
+        return self._session
+
+    async def close(self):
+        """Close the session and its pooled connections"""
+        if self._session and not self._session.closed:
+            await self._session.close()
+        self._session = None
@@ -0,0 +1,193 @@
+"""
+Keyword Index - Index inversé avec scoring BM25
+Construit au démarrage, mis à jour quand les articles changent :
+une requête ne touche que les postings de ses termes.
+"""
+
+import heapq
+import math
+from collections import Counter
+from collections.abc import Mapping
+from typing import List, Dict, Any, Tuple, Optional, Set, Iterator
+
+import numpy as np
+
+from .text_utils import tokenize
+
+# Field boosts (BM25F): a term in the article number counts more than in the body
+FIELD_WEIGHTS = {
+    'numero': 5.0,
+    'categorie': 3.0,
+    'texte': 1.0,
+    'texte_arabe': 1.0
+}
+
+
+class _FrozenPostings(Mapping):
+    """
+    Read-only postings over flat arrays (CSR layout, possibly memory-mapped):
+    term i -> ids / tfs[offsets[i]:offsets[i + 1]]. A term's dict is built on lookup.
+    """
+
+    def __init__(self, terms: List[str], offsets: np.ndarray, ids: np.ndarray, tfs: np.ndarray):
+        self.terms = {term: i for i, term in enumerate(terms)}
+        self.offsets = offsets
+        self.ids = ids
+        self.tfs = tfs
+
+    def __getitem__(self, term: str) -> Dict[int, float]:
+        i = self.terms[term]
+        start, end = int(self.offsets[i]), int(self.offsets[i + 1])
+        return dict(zip(self.ids[start:end].tolist(), self.tfs[start:end].tolist()))
+
+    def __contains__(self, term) -> bool:
+        return term in self.terms
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.terms)
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+
+class KeywordIndex:
+    """Inverted index: token -> {article_id: weighted term frequency}"""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Mapping = {}  # dict, or _FrozenPostings when loaded from a snapshot
+        self.documents: Dict[int, Dict[str, Any]] = {}
+        self.doc_lengths: Dict[int, float] = {}
+        self._total_length: float = 0.0
+
+    @property
+    def size(self) -> int:
+        return len(self.documents)
+
+    def build(self, articles: List[Dict[str, Any]]):
+        """Rebuild the whole index"""
+        self.postings = {}
+        self.documents = {}
+        self.doc_lengths = {}
+        self._total_length = 0.0
+        for article in articles:
+            self.add(article)
+
+    def to_arrays(self) -> Tuple[List[str], Dict[str, np.ndarray]]:
+        """Flat (CSR) copy of the index for a snapshot: terms + numeric arrays"""
+        terms = sorted(self.postings)
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum([len(self.postings[term]) for term in terms], out=offsets[1:])
+        ids = np.fromiter(
+            (article_id for term in terms for article_id in self.postings[term]), dtype=np.int64, count=offsets[-1]
+        )
+        tfs = np.fromiter(
+            (tf for term in terms for tf in self.postings[term].values()), dtype=np.float32, count=offsets[-1]
+        )
+        doc_ids = np.fromiter(self.doc_lengths, dtype=np.int64, count=len(self.doc_lengths))
+        doc_lengths = np.fromiter(self.doc_lengths.values(), dtype=np.float64, count=len(self.doc_lengths))
+        return terms, {
+            "offsets": offsets, "posting_ids": ids, "posting_tfs": tfs,
+            "doc_ids": doc_ids, "doc_lengths": doc_lengths
+        }
+
+    @classmethod
+    def from_arrays(
+        cls,
+        articles: List[Dict[str, Any]],
+        terms: List[str],
+        arrays: Dict[str, np.ndarray],
+        k1: float = 1.2,
+        b: float = 0.75
+    ) -> "KeywordIndex":
+        """Index over snapshot arrays (no tokenization); copied into dicts on the first change"""
+        index = cls(k1, b)
+        index.postings = _FrozenPostings(terms, arrays["offsets"], arrays["posting_ids"], arrays["posting_tfs"])
+        index.documents = {article['id']: article for article in articles}
+        index.doc_lengths = dict(zip(arrays["doc_ids"].tolist(), arrays["doc_lengths"].tolist()))
+        index._total_length = float(sum(index.doc_lengths.values()))
+        return index
+
+    def _thaw(self):
+        if isinstance(self.postings, _FrozenPostings):
+            self.postings = {term: self.postings[term] for term in self.postings}
+
+    def _field_frequencies(self, article: Dict[str, Any]) -> Tuple[Counter, float]:
+        frequencies = Counter()
+        length = 0.0
+        for field, weight in FIELD_WEIGHTS.items():
+            tokens = tokenize(article.get(field) or '')
+            length += weight * len(tokens)
+            for token in tokens:
+                frequencies[token] += weight
+        return frequencies, length
+
+    def add(self, article: Dict[str, Any]):
+        """Index (or re-index) a single article"""
+        article_id = article['id']
+        self._thaw()
+        if article_id in self.documents:
+            self.remove(article_id)
+
+        frequencies, length = self._field_frequencies(article)
+        for token, tf in frequencies.items():
+            self.postings.setdefault(token, {})[article_id] = tf
+
+        self.documents[article_id] = article
+        self.doc_lengths[article_id] = length
+        self._total_length += length
+
+    def remove(self, article_id: int):
+        """Drop an article from the index"""
+        self._thaw()
+        article = self.documents.pop(article_id, None)
+        if article is None:
+            return
+
+        frequencies, _ = self._field_frequencies(article)
+        for token in frequencies:
+            posting = self.postings.get(token)
+            if posting is not None:
+                posting.pop(article_id, None)
+                if not posting:
+                    del self.postings[token]
+
+        self._total_length -= self.doc_lengths.pop(article_id)
+
+    def _idf(self, document_frequency: int) -> float:
+        n = len(self.documents)
+        return math.log(1 + (n - document_frequency + 0.5) / (document_frequency + 0.5))
+
+    def search(
+        self,
+        query: str,
+        top_k: int,
+        allowed_ids: Optional[Set[int]] = None
+    ) -> List[Tuple[Dict[str, Any], float]]:
+        """Return the top_k (article, score) pairs, scores normalized to [0, 1]"""
+        terms = set(tokenize(query))
+        if not terms or not self.documents:
+            return []
+
+        avg_length = self._total_length / len(self.documents) or 1.0
+        scores: Dict[int, float] = {}
+        max_score = 0.0
+
+        for term in terms:
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            idf = self._idf(len(posting))
+            max_score += idf * (self.k1 + 1)
+            for article_id, tf in posting.items():
+                if allowed_ids is not None and article_id not in allowed_ids:
+                    continue
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[article_id] / avg_length)
+                scores[article_id] = scores.get(article_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+        if not scores:
+            return []
+
+        ranked = heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+        return [(self.documents[article_id], min(score / max_score, 1.0)) for article_id, score in ranked]
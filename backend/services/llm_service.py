@@ -3,42 +3,65 @@ LLM Service - Génération de réponses avec Groq (LLaMA cloud)
 """
 
 import os
-from typing import Optional
+import json
+import re
+from typing import Optional, AsyncIterator
 from abc import ABC, abstractmethod
 
+from .http_client import HTTPClient
+
+
+# Bump when SYSTEM_PROMPT or the context format changes (invalidates cached answers)
+PROMPT_VERSION = "1"
+
+# Prefix of the error strings returned instead of an answer (never cached)
+ERROR_PREFIX = "Erreur Groq"
+
+SYSTEM_PROMPT = """Tu es un assistant juridique algérien expert du Code pénal.
+Tu dois:
+- Répondre en français de manière claire et professionnelle
+- Utiliser UNIQUEMENT les informations du contexte fourni
+- Citer les articles de loi quand disponibles
+- Mentionner les sanctions (prison et amende)
+- NE JAMAIS inventer d'informations non présentes dans le contexte
+- Ajouter un avertissement que c'est une information générale, pas un conseil juridique
+
+Si le contexte ne contient pas l'information demandée, dis-le clairement."""
+
+
+class GroqAPIError(Exception):
+    """Groq refused a streaming request (the stream has no answer text to carry the error)"""
+    
+    def __init__(self, status: int, message: str):
+        super().__init__(f"{ERROR_PREFIX} ({status}): {message}")
+        self.status = status
+
 
 class BaseLLM(ABC):
     @abstractmethod
     async def generate(self, prompt: str, context: str) -> str:
         pass
+    
+    async def generate_stream(self, prompt: str, context: str) -> AsyncIterator[str]:
+        """Yield the response in chunks (default: one chunk)"""
+        yield await self.generate(prompt, context)
 
 
 class GroqLLM(BaseLLM):
     """Groq Cloud LLM - Fast LLaMA inference"""
     
-    def __init__(self, api_key: str, model: str = "llama-3.1-8b-instant"):
+    def __init__(self, api_key: str, model: str = "llama-3.1-8b-instant", http_client: Optional[HTTPClient] = None):
         self.api_key = api_key
         self.model = model
+        self.api_url = os.getenv("GROQ_API_URL", "https://api.groq.com/openai/v1/chat/completions")
+        self.http_client = http_client or HTTPClient()
         
     async def initialize(self):
         print(f"✅ Groq initialized with model: {self.model}")
     
-    async def generate(self, prompt: str, context: str) -> str:
-        import aiohttp
-        
-        system_prompt = """Tu es un assistant juridique algérien expert du Code pénal.
-Tu dois:
-- Répondre en français de manière claire et professionnelle
-- Utiliser UNIQUEMENT les informations du contexte fourni
-- Citer les articles de loi quand disponibles
-- Mentionner les sanctions (prison et amende)
-- NE JAMAIS inventer d'informations non présentes dans le contexte
-- Ajouter un avertissement que c'est une information générale, pas un conseil juridique
-
-Si le contexte ne contient pas l'information demandée, dis-le clairement."""
-
+    def _build_request(self, prompt: str, context: str, stream: bool = False):
         messages = [
-            {"role": "system", "content": system_prompt},
+            {"role": "system", "content": SYSTEM_PROMPT},
             {"role": "user", "content": f"Contexte juridique:\n{context}\n\nQuestion: {prompt}"}
         ]
         
@@ -53,19 +76,39 @@ Si le contexte ne contient pas l'information demandée, dis-le clairement."""
             "temperature": 0.3,
             "max_tokens": 800
         }
+        if stream:
+            payload["stream"] = True
+        return headers, payload
+    
+    async def generate(self, prompt: str, context: str) -> str:
+        headers, payload = self._build_request(prompt, context)
         
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                "https://api.groq.com/openai/v1/chat/completions",
-                headers=headers,
-                json=payload
-            ) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return data["choices"][0]["message"]["content"]
-                else:
-                    error = await response.text()
-                    return f"Erreur Groq ({response.status}): {error}"
+        async with self.http_client.session.post(self.api_url, headers=headers, json=payload) as response:
+            if response.status == 200:
+                data = await response.json()
+                return data["choices"][0]["message"]["content"]
+            else:
+                error = await response.text()
+                return f"{ERROR_PREFIX} ({response.status}): {error}"
+    
+    async def generate_stream(self, prompt: str, context: str) -> AsyncIterator[str]:
+        """Relay tokens from the OpenAI-compatible SSE stream as they arrive (GroqAPIError if refused)"""
+        headers, payload = self._build_request(prompt, context, stream=True)
+        
+        async with self.http_client.session.post(self.api_url, headers=headers, json=payload) as response:
+            if response.status != 200:
+                raise GroqAPIError(response.status, await response.text())
+            
+            async for raw_line in response.content:
+                line = raw_line.decode("utf-8").strip()
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                delta = json.loads(data)["choices"][0].get("delta", {})
+                if delta.get("content"):
+                    yield delta["content"]
 
 
 class MockLLM(BaseLLM):
@@ -81,21 +124,27 @@ class MockLLM(BaseLLM):
 
 ---
 ⚠️ **Avertissement juridique:** Cette réponse est une information juridique générale basée sur le Code pénal algérien et ne constitue pas un avis juridique personnalisé. Pour toute situation spécifique, consultez un avocat."""
+    
+    async def generate_stream(self, prompt: str, context: str) -> AsyncIterator[str]:
+        """Word-by-word chunks, like a real streaming LLM"""
+        for chunk in re.findall(r'\S+\s*|\s+', await self.generate(prompt, context)):
+            yield chunk
 
 
 class LLMService:
     """Service principal pour la génération LLM - Utilise Groq Cloud"""
     
-    def __init__(self):
+    def __init__(self, http_client: Optional[HTTPClient] = None):
         self.llm: Optional[BaseLLM] = None
         self.provider: str = "mock"
+        self.http_client = http_client
         
     async def initialize(self):
         """Initialize LLM - priorité à Groq"""
         groq_key = os.getenv("GROQ_API_KEY")
         
         if groq_key:
-            self.llm = GroqLLM(api_key=groq_key)
+            self.llm = GroqLLM(api_key=groq_key, http_client=self.http_client)
             self.provider = "groq"
         else:
             self.llm = MockLLM()
@@ -103,8 +152,18 @@ class LLMService:
         
         await self.llm.initialize()
         print(f"🤖 LLM Provider: {self.provider}")
+    
+    @property
+    def model(self) -> str:
+        return getattr(self.llm, "model", self.provider)
         
     async def generate_response(self, question: str, context: str) -> str:
         if not self.llm:
             await self.initialize()
         return await self.llm.generate(question, context)
+    
+    async def generate_response_stream(self, question: str, context: str) -> AsyncIterator[str]:
+        if not self.llm:
+            await self.initialize()
+        async for chunk in self.llm.generate_stream(question, context):
+            yield chunk
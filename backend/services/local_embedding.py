@@ -0,0 +1,176 @@
+"""
+Local Embedding Service - Embeddings calculés sur CPU, sans appel réseau
+Modèle ONNX (ex. multilingual-e5-small, français + arabe) si LOCAL_EMBEDDING_MODEL_PATH
+est défini et onnxruntime / tokenizers installés ; sinon vecteurs de n-grammes de
+caractères hachés (signed hashing), sans dépendance ni modèle à télécharger.
+"""
+
+import asyncio
+import math
+import os
+import re
+import zlib
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Dict, Any
+
+import numpy as np
+
+from .cache import TTLCache
+from .embedding_provider import BaseEmbeddingProvider
+from .text_utils import normalize_text
+
+# Arabic: diacritics / tatweel removed, letter variants folded
+_ARABIC_MARKS = re.compile(r"[\u064B-\u0652\u0640]")
+_ARABIC_LETTERS = str.maketrans({'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ى': 'ي', 'ة': 'ه'})
+
+
+def _normalize(text: str) -> str:
+    text = _ARABIC_MARKS.sub("", normalize_text(text)).translate(_ARABIC_LETTERS)
+    return " ".join(text.split())
+
+
+class _HashingEncoder:
+    """Signed hashing of character n-grams, sublinear tf, L2-normalized"""
+
+    def __init__(self, dimensions: int, ngram_range=(3, 5)):
+        self.dimensions = dimensions
+        self.ngram_range = ngram_range
+        self.model = f"hash-char-{ngram_range[0]}-{ngram_range[1]}gram"
+
+    def _vector(self, text: str) -> np.ndarray:
+        text = f" {_normalize(text)} "
+        counts = Counter(
+            text[i:i + n]
+            for n in range(self.ngram_range[0], self.ngram_range[1] + 1)
+            for i in range(len(text) - n + 1)
+        )
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        if not counts:
+            return vector
+
+        hashes = np.fromiter((zlib.crc32(gram.encode("utf-8")) for gram in counts), dtype=np.uint32, count=len(counts))
+        weights = np.fromiter((1.0 + math.log(tf) for tf in counts.values()), dtype=np.float32, count=len(counts))
+        signs = np.where(hashes & 0x80000000, 1.0, -1.0).astype(np.float32)
+        np.add.at(vector, (hashes % self.dimensions).astype(np.intp), signs * weights)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        return np.stack([self._vector(text) for text in texts])
+
+
+class _OnnxEncoder:
+    """Sentence-embedding model exported to ONNX (mean pooling over tokens)"""
+
+    def __init__(self, model_dir: str, max_length: int):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = 1  # parallelism comes from the executor (one batch per thread)
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, "model.onnx"), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {item.name for item in self.session.get_inputs()}
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length)
+        self.tokenizer.enable_padding()
+        self.model = os.path.basename(os.path.normpath(model_dir))
+        self.dimensions = int(self.encode(["test"]).shape[1])
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.zeros_like(input_ids)
+
+        hidden = self.session.run(None, feeds)[0]  # (batch, tokens, dims)
+        mask = attention_mask[..., None].astype(np.float32)
+        return (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+
+
+class LocalEmbeddingService(BaseEmbeddingProvider):
+    name = "local"
+
+    def __init__(self, model_path: Optional[str] = None):
+        self.model_path = model_path or os.getenv("LOCAL_EMBEDDING_MODEL_PATH", "")
+        self.batch_size = int(os.getenv("LOCAL_EMBEDDING_BATCH_SIZE", "32"))
+        self.threads = int(os.getenv("LOCAL_EMBEDDING_THREADS", str(min(4, os.cpu_count() or 1))))
+        # e5-style models expect "query: " / "passage: " prefixes
+        self.query_prefix = os.getenv("LOCAL_EMBEDDING_QUERY_PREFIX", "")
+        self.passage_prefix = os.getenv("LOCAL_EMBEDDING_PASSAGE_PREFIX", "")
+        self.encoder = None
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.query_cache = TTLCache(
+            max_size=int(os.getenv("EMBEDDING_CACHE_SIZE", "2048")),
+            ttl=float(os.getenv("EMBEDDING_CACHE_TTL", "86400"))
+        )
+        self._load_encoder()
+
+    def _load_encoder(self):
+        if self.model_path:
+            try:
+                self.encoder = _OnnxEncoder(self.model_path, int(os.getenv("LOCAL_EMBEDDING_MAX_LENGTH", "512")))
+            except ImportError:
+                print("⚠️ onnxruntime / tokenizers non installés - n-grammes hachés utilisés")
+            except Exception as e:
+                print(f"⚠️ Modèle ONNX non chargé ({e}) - n-grammes hachés utilisés")
+        if self.encoder is None:
+            self.encoder = _HashingEncoder(int(os.getenv("LOCAL_EMBEDDING_DIMENSIONS", "512")))
+        self.model = self.encoder.model
+        self.dimensions = self.encoder.dimensions
+
+    async def initialize(self):
+        """Start the encoding threads (inference runs off the event loop)"""
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="embedding")
+        print(f"🧠 Embeddings locaux: {self.model} ({self.dimensions} dims, {self.threads} threads)")
+
+    async def close(self):
+        if self.executor:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+
+    def cache_stats(self) -> Dict[str, Any]:
+        return {"memory": self.query_cache.stats()}
+
+    async def _encode(self, texts: List[str]) -> List[List[float]]:
+        """Encode in batches spread over the executor threads"""
+        if self.executor is None:
+            await self.initialize()
+        loop = asyncio.get_running_loop()
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        results = await asyncio.gather(*[
+            loop.run_in_executor(self.executor, self.encoder.encode, batch) for batch in batches
+        ])
+        return [vector.tolist() for matrix in results for vector in matrix]
+
+    async def get_embeddings_batch(self, texts: List[str], raise_on_error: bool = False) -> List[Optional[List[float]]]:
+        """Embed passages (articles)"""
+        if not texts:
+            return []
+        return await self._encode([self.passage_prefix + text for text in texts])
+
+    async def get_query_embedding(self, query: str) -> Optional[List[float]]:
+        """Embed a search query, cached"""
+        key = " ".join(normalize_text(query).split())
+        embedding = self.query_cache.get(key)
+        if embedding is None:
+            embedding = (await self._encode([self.query_prefix + query]))[0]
+            self.query_cache.set(key, embedding)
+        return embedding
+
+    async def get_query_embeddings_batch(self, queries: List[str]) -> List[Optional[List[float]]]:
+        """Embed many queries in one pass over the executor"""
+        keys = [" ".join(normalize_text(query).split()) for query in queries]
+        embeddings = [self.query_cache.get(key) for key in keys]
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            encoded = await self._encode([self.query_prefix + queries[i] for i in missing])
+            for i, embedding in zip(missing, encoded):
+                embeddings[i] = embedding
+                self.query_cache.set(keys[i], embedding)
+        return embeddings
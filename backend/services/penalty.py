@@ -0,0 +1,130 @@
+"""
+Penalty extraction - Peines structurées extraites du texte des articles
+Exécuté une fois à l'ingestion ; les valeurs sont stockées dans des colonnes
+(prison min/max en mois, perpétuité, mort, amende min/max en DA).
+"""
+
+import re
+from typing import Dict, Any, Optional
+
+# Bump when the extraction rules change: stored rows are recomputed at startup
+PENALTY_VERSION = 2
+
+_NUMBERS = {
+    'un': 1, 'une': 1, 'deux': 2, 'trois': 3, 'quatre': 4, 'cinq': 5, 'six': 6,
+    'sept': 7, 'huit': 8, 'neuf': 9, 'dix': 10, 'onze': 11, 'douze': 12,
+    'quinze': 15, 'vingt': 20, 'trente': 30
+}
+# A number, in words and/or digits: "cinq", "5", "cinq (5)", "(5)"
+_NUMBER = r"(\d+|\(\d+\)|" + "|".join(sorted(_NUMBERS, key=len, reverse=True)) + r")(?:\s*\(\d+\))?"
+_UNIT = r"(ans?|années?|mois|jours?)(?:\s*\(\d+\))?"
+
+# "emprisonnement", "réclusion à temps,", "réclusion criminelle", "l'emprisonnement est",
+# "la réclusion n'est que", "emprisonnement d'une durée"
+_PRISON = (
+    r"(?:réclusion|emprisonnement|détention)(?:\s+criminelle)?(?:\s+à\s+temps)?,?"
+    r"(?:\s+(?:est|sera|n['’]est\s+que))?\s+(?:(?:pour\s+une|d['’]une)\s+durée\s+)?"
+)
+
+# "emprisonnement de deux mois à cinq ans", "réclusion à temps, de cinq (5) à dix (10) ans",
+# "emprisonnement d'un an (1) à trois (3) ans", "emprisonnement pendant dix jours à deux mois",
+# "emprisonnement de six mois au moins et de deux ans au plus"
+_PRISON_RANGE = re.compile(
+    _PRISON + r"(?:de\s+|d['’]|pendant\s+)(?:plus\s+de\s+)?" + _NUMBER + r"(?:\s+" + _UNIT + r")?"
+    r"(?:\s+au\s+moins\s*(?:à\s+|et\s+(?:de\s+|d['’])?)|\s+à\s+)" + _NUMBER + r"\s+" + _UNIT
+    + r"(?:\s+au\s+plus)?",
+    re.IGNORECASE
+)
+# Upper bound only: "emprisonnement pendant dix jours au plus", "emprisonnement de cinq jours au plus",
+# "emprisonnement qui peut être porté à quatre (4) mois"
+_PRISON_MAX = re.compile(
+    _PRISON + r"(?:(?:de\s+|d['’]|pendant\s+)" + _NUMBER + r"\s+" + _UNIT + r"\s+au\s+plus"
+    r"|(?:qui\s+)?peut\s+être\s+porté\s+à\s+" + _NUMBER + r"\s+" + _UNIT + r")",
+    re.IGNORECASE
+)
+_PERPETUAL = re.compile(r"réclusion\s+(?:perpétuelle|(?:criminelle\s+)?à\s+perp[ée]tuité)", re.IGNORECASE)
+_DEATH = re.compile(
+    r"(?:puni|punie|punis|condamnée?s?|passible)\s+(?:de\s+(?:la\s+)?|à\s+)mort\b"
+    r"|peine\s+(?:est\s+la\s+|de\s+)mort\b",
+    re.IGNORECASE
+)
+_AMOUNT = r"(\d{1,3}(?:[.\s]\d{3})+|\d+)"
+_CURRENCY = r"\s*(?:de\s+)?(?:D\.A\.?|DA\b|dinars?)"
+# "amende de 500 à 1.000 DA", "amende de 500.000 DA à 1.000.000 de DA", "amende, de 150.000 DA à 800.000 DA",
+# "amende de 500 DA au moins à 3.000 DA au plus"
+_FINE_RANGE = re.compile(
+    r"amende,?\s+(?:de\s+|d['’])(?:plus\s+de\s+)?" + _AMOUNT + r"(?:" + _CURRENCY + r")?(?:\s+au\s+moins)?\s+à\s+"
+    + _AMOUNT + _CURRENCY,
+    re.IGNORECASE
+)
+
+
+def _to_number(token: str) -> int:
+    token = token.strip("()").lower()
+    return int(token) if token.isdigit() else _NUMBERS[token]
+
+
+def _to_months(value: int, unit: str) -> float:
+    unit = unit.lower()
+    if unit.startswith('an'):
+        return value * 12.0
+    if unit.startswith('jour'):
+        return round(value / 30.0, 2)
+    return float(value)
+
+
+def _to_dinars(amount: str) -> int:
+    return int(re.sub(r"[.\s]", "", amount))
+
+
+def extract_penalty(text: str) -> Dict[str, Any]:
+    """
+    Extract structured penalties from an article text.
+    Ranges are aggregated over every mention (min of mins, max of maxes);
+    the *_texte fields keep the first matching span for display.
+    """
+    text = text or ""
+    prison_min: Optional[float] = None
+    prison_max: Optional[float] = None
+    first_span: Optional[re.Match] = None
+
+    for match in _PRISON_RANGE.finditer(text):
+        low_value, low_unit, high_value, high_unit = match.groups()
+        low = _to_months(_to_number(low_value), low_unit or high_unit)
+        high = _to_months(_to_number(high_value), high_unit)
+        prison_min = low if prison_min is None else min(prison_min, low)
+        prison_max = high if prison_max is None else max(prison_max, high)
+        first_span = first_span or match
+
+    for match in _PRISON_MAX.finditer(text):
+        groups = [group for group in match.groups() if group is not None]
+        high = _to_months(_to_number(groups[0]), groups[1])
+        prison_max = high if prison_max is None else max(prison_max, high)
+        if first_span is None or match.start() < first_span.start():
+            first_span = match
+
+    perpetual = _PERPETUAL.search(text)
+    death = _DEATH.search(text)
+    for match in (perpetual, death):
+        if match and (first_span is None or match.start() < first_span.start()):
+            first_span = match
+
+    amende_min: Optional[int] = None
+    amende_max: Optional[int] = None
+    amende_texte = ""
+    for match in _FINE_RANGE.finditer(text):
+        low, high = _to_dinars(match.group(1)), _to_dinars(match.group(2))
+        amende_min = low if amende_min is None else min(amende_min, low)
+        amende_max = high if amende_max is None else max(amende_max, high)
+        amende_texte = amende_texte or f"{match.group(1)} à {match.group(2)} DA"
+
+    return {
+        'prison_min_mois': prison_min,
+        'prison_max_mois': prison_max,
+        'perpetuite': 1 if perpetual else 0,
+        'peine_mort': 1 if death else 0,
+        'amende_min': amende_min,
+        'amende_max': amende_max,
+        'prison_texte': first_span.group(0) if first_span else "",
+        'amende_texte': amende_texte
+    }
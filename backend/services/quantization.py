@@ -0,0 +1,71 @@
+"""
+Quantization - Représentations compactes des embeddings pour le pré-filtrage
+int8 (échelle par vecteur, 4x plus petit) ou binaire (signe, 32x plus petit) ;
+les meilleurs candidats sont ensuite re-classés en pleine précision (float32).
+"""
+
+from typing import Optional
+
+import numpy as np
+
+MODES = ("int8", "binary")
+
+
+class QuantizedVectors:
+    """Row-aligned quantized copy of a (normalized) float32 matrix"""
+
+    def __init__(self, mode: str, codes: np.ndarray, scales: Optional[np.ndarray] = None):
+        if mode not in MODES:
+            raise ValueError(f"Unknown quantization mode: {mode}")
+        self.mode = mode
+        self.codes = codes  # int8 (n, dims) or packed sign bits uint8 (n, dims / 8)
+        self.scales = scales  # int8 only: per-vector dequantization scale
+
+    @staticmethod
+    def _encode(mode: str, vectors: np.ndarray):
+        if mode == "binary":
+            return np.packbits(vectors > 0, axis=1), None
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        safe = np.where(scales > 0, scales, 1.0)
+        codes = np.clip(np.rint(vectors / safe[:, None]), -127, 127).astype(np.int8)
+        return codes, scales.astype(np.float32)
+
+    @classmethod
+    def fit(cls, mode: str, matrix: np.ndarray, chunk: int = 4096) -> "QuantizedVectors":
+        """Quantize every row (chunked: the float32 matrix may be memory-mapped)"""
+        parts = [cls._encode(mode, np.asarray(matrix[i:i + chunk])) for i in range(0, len(matrix), chunk)]
+        codes = np.concatenate([codes for codes, _ in parts])
+        scales = np.concatenate([scales for _, scales in parts]) if mode == "int8" else None
+        return cls(mode, codes, scales)
+
+    def copy(self) -> "QuantizedVectors":
+        return QuantizedVectors(self.mode, self.codes.copy(), None if self.scales is None else self.scales.copy())
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    def set(self, position: int, vector: np.ndarray):
+        """Replace (or append, if position == len) one row"""
+        codes, scales = self._encode(self.mode, vector.reshape(1, -1))
+        if position == len(self.codes):
+            self.codes = np.vstack([self.codes, codes])
+            if scales is not None:
+                self.scales = np.append(self.scales, scales)
+            return
+        self.codes[position] = codes[0]
+        if scales is not None:
+            self.scales[position] = scales[0]
+
+    def scores(self, query: np.ndarray, rows: Optional[np.ndarray] = None, chunk: int = 4096) -> np.ndarray:
+        """Approximate similarity of the query to each row (higher is closer)"""
+        codes = self.codes if rows is None else self.codes[rows]
+        if self.mode == "binary":
+            bits = np.packbits(query > 0)
+            return -np.bitwise_count(codes ^ bits).sum(axis=1, dtype=np.int32).astype(np.float32)
+
+        scales = self.scales if rows is None else self.scales[rows]
+        out = np.empty(len(codes), dtype=np.float32)
+        for start in range(0, len(codes), chunk):
+            out[start:start + chunk] = codes[start:start + chunk].astype(np.float32) @ query
+        return out * scales
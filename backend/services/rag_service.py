@@ -3,207 +3,555 @@ RAG Service avec Jina AI Embeddings + SQLite + Groq LLM
 Version production pour Render (< 200MB RAM)
 """
 
+import asyncio
 import os
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator, Tuple
 
 from .database import DatabaseService
-from .embedding_service import JinaEmbeddingService
-from .llm_service import LLMService
+from .embedding_provider import BaseEmbeddingProvider, create_embedding_provider
+from .http_client import HTTPClient
+from .llm_service import LLMService, PROMPT_VERSION, ERROR_PREFIX
+from .cache import TTLCache
+from .singleflight import SingleFlight
+from .scoring_pool import ScoringPool, ScoringPoolSaturated
+from .keyword_index import KeywordIndex
+from .text_utils import normalize_text
+from .article_ref import parse_article_query
+from .vector_store import VectorStore
+from .snapshot import CorpusSnapshot, build_lock, refresh_snapshot, snapshot_path, current_version
 
 
 class RAGService:
-    def __init__(self):
+    def __init__(self, http_client: Optional[HTTPClient] = None):
+        self.http_client = http_client or HTTPClient()
         self.db: DatabaseService = None
-        self.embedding_service: JinaEmbeddingService = None
+        self.embedding_service: Optional[BaseEmbeddingProvider] = None
         self.llm_service: LLMService = None
+        self.vector_store: VectorStore = VectorStore()
+        self.keyword_index: KeywordIndex = KeywordIndex()
+        self.snapshot: Optional[CorpusSnapshot] = None  # prebuilt read-only corpus (scripts/build_snapshot.py)
+        self.snapshot_root: Optional[str] = None
+        self._snapshot_seen: Optional[str] = None  # last CURRENT version considered (served or rejected)
+        # Database versions and stored vectors the in-memory indexes reflect (see sync_with_database)
+        self._synced_stamp: Optional[Dict[str, int]] = None
+        self._embedding_hashes: Dict[int, Tuple[Optional[str], int]] = {}
+        # Seconds between checks of the snapshot's CURRENT pointer and the database
+        # versions (0: only on SIGHUP)
+        self.reload_interval = float(os.getenv("CORPUS_RELOAD_INTERVAL", "30"))
+        self._reload_task: Optional[asyncio.Task] = None
+        # Searches run on scoring threads: reloads build fresh indexes and embedding writes go
+        # to a copy of the vector store, swapped in afterwards; the lock serializes the updates
+        self._update_lock = asyncio.Lock()
+        self.answer_cache = TTLCache(
+            max_size=int(os.getenv("ANSWER_CACHE_SIZE", "512")),
+            ttl=float(os.getenv("ANSWER_CACHE_TTL", "3600"))
+        )
+        self.flights = SingleFlight()  # shared in-flight embedding / retrieval / LLM work
+        # CPU-bound ranking off the event loop; SCORING_THREADS=0 scores inline
+        self.scoring = ScoringPool(
+            threads=int(os.getenv("SCORING_THREADS", str(min(4, os.cpu_count() or 1)))),
+            max_pending=int(os.getenv("SCORING_QUEUE_SIZE", "32"))
+        )
         self.is_ready: bool = False
         self.use_embeddings: bool = False  # Fallback to keyword search if no embeddings
+        self.keyword_backend: str = "memory"  # "memory" (BM25 index) or "fts" (SQLite FTS5)
+        self.search_mode: str = os.getenv("SEARCH_MODE", "hybrid").lower()  # "hybrid", "embedding" or "keyword"
+        # Reciprocal rank fusion: score = sum(weight / (rrf_k + rank))
+        self.rrf_k = int(os.getenv("RRF_K", "60"))
+        self.embedding_weight = float(os.getenv("HYBRID_EMBEDDING_WEIGHT", "1.0"))
+        self.keyword_weight = float(os.getenv("HYBRID_KEYWORD_WEIGHT", "1.0"))
+        # Bare article references ("Art. 303 bis") are answered from the article text itself
+        self.direct_lookup_llm = os.getenv("DIRECT_LOOKUP_USE_LLM", "false").lower() == "true"
         
     async def initialize(self):
         """Initialize all services"""
+        self.scoring.start()
+        
         # Initialize database
         self.db = DatabaseService()
         await self.db.initialize()
+        # Read before loading: writes made while the indexes load trigger a later sync
+        self._embedding_hashes = await self.db.get_embedding_hashes()
+        self._synced_stamp = await self.db.get_stamp()
+        # ANN index and full-precision vectors persisted next to the database
+        data_prefix = os.path.splitext(self.db.db_path)[0]
+        self.vector_store = VectorStore(
+            os.getenv("ANN_INDEX_PATH") or data_prefix + ".ivf",
+            data_prefix + ".vectors.npy"
+        )
         
-        article_count = await self.db.get_article_count()
+        self.snapshot_root = snapshot_path(self.db.db_path)
+        self._snapshot_seen = current_version(self.snapshot_root)
+        self.snapshot = await self._open_snapshot(self.snapshot_root, self._snapshot_seen)
+        article_count = self.snapshot.article_count if self.snapshot else await self.db.get_article_count()
         print(f"📚 {article_count} articles dans la base de données")
         
-        # Initialize embedding service (if key is available)
-        jina_key = os.getenv("JINA_API_KEY")
-        if jina_key:
-            self.embedding_service = JinaEmbeddingService(jina_key)
+        self.keyword_backend = os.getenv("KEYWORD_SEARCH_BACKEND", "memory").lower()
+        if self.keyword_backend == "fts":
+            print("🔎 Recherche mots-clés: SQLite FTS5")
+        else:
+            keyword_index = self.snapshot.keyword_index() if self.snapshot else None
+            if keyword_index is not None:
+                self.keyword_index = keyword_index
+                print(f"🔤 Index BM25 (snapshot): {keyword_index.size} articles, {len(keyword_index.postings)} termes")
+            else:
+                await self.reload_keyword_index()
+        
+        # Initialize embedding provider (Jina API or local CPU model)
+        self.embedding_service = create_embedding_provider(self.http_client)
+        if self.embedding_service:
+            await self.embedding_service.initialize()
             self.use_embeddings = True
-            print("🔍 Jina AI Embeddings activé")
+            print(f"🔍 Embeddings activés ({self.embedding_service.name})")
+            if self.snapshot and self.snapshot.attach_vectors(self.vector_store, self.embedding_service):
+                print(f"🧮 {self.vector_store.size} embeddings mappés depuis le snapshot ({self.vector_store.dimensions} dims)")
+            else:
+                await self.reload_embeddings()
         else:
-            print("⚠️ JINA_API_KEY non défini - recherche par mots-clés")
+            print("⚠️ Aucun fournisseur d'embeddings - recherche par mots-clés")
         
         # Initialize LLM service (Groq)
-        self.llm_service = LLMService()
+        self.llm_service = LLMService(http_client=self.http_client)
         await self.llm_service.initialize()
         
         self.is_ready = True
+        if self.reload_interval > 0:
+            self._reload_task = asyncio.create_task(self._watch_corpus())
         print("✅ RAG Service initialisé")
     
+    async def close(self):
+        """Release the database connection and caches"""
+        if self._reload_task:
+            self._reload_task.cancel()
+        self.scoring.close()
+        if self.embedding_service:
+            await self.embedding_service.close()
+        if self.db:
+            await self.db.close()
+    
+    async def _open_snapshot(self, path: str, version: Optional[str] = None) -> Optional[CorpusSnapshot]:
+        """The snapshot version under path, if it matches the database versions (otherwise load from the DB)"""
+        snapshot = CorpusSnapshot.open(path, version)
+        if snapshot is None:
+            return None
+        stamp = await self.db.get_stamp()
+        if not snapshot.is_current(stamp):
+            print(f"⚠️ Snapshot obsolète (corpus v{snapshot.corpus_version}, base v{stamp.get('corpus_version')}) "
+                  f"- chargement depuis la base")
+            return None
+        print(f"📸 Snapshot corpus v{snapshot.corpus_version}: {snapshot.path}")
+        return snapshot
+    
+    async def reload_snapshot(self) -> bool:
+        """
+        Serve the snapshot version CURRENT now points to (scripts/build_snapshot.py).
+        The new indexes are built aside, then swapped in with no await in between:
+        a search sees either the old corpus or the new one, never a mix.
+        """
+        async with self._update_lock:
+            return await self._reload_snapshot()
+    
+    async def _reload_snapshot(self) -> bool:
+        version = current_version(self.snapshot_root)
+        if version is None or version == self._snapshot_seen:
+            return False
+        self._snapshot_seen = version
+        hashes = await self.db.get_embedding_hashes()
+        stamp = await self.db.get_stamp()
+        snapshot = await self._open_snapshot(self.snapshot_root, version)
+        if snapshot is None:
+            return False
+        
+        keyword_index = self.keyword_index
+        if self.keyword_backend != "fts":
+            keyword_index = snapshot.keyword_index()
+            if keyword_index is None:
+                print(f"⚠️ Snapshot {version}: champs BM25 différents - version ignorée")
+                return False
+        vector_store = self.vector_store
+        if self.embedding_service:
+            vector_store = VectorStore(self.vector_store.index_path, self.vector_store.vectors_path)
+            if not snapshot.attach_vectors(vector_store, self.embedding_service):
+                print(f"⚠️ Snapshot {version}: modèle d'embeddings différent - version ignorée")
+                return False
+        
+        self.snapshot, self.keyword_index, self.vector_store = snapshot, keyword_index, vector_store
+        self._synced_stamp, self._embedding_hashes = stamp, hashes
+        self.answer_cache.clear()  # answers were grounded on the previous articles
+        print(f"🔄 Corpus v{snapshot.corpus_version} chargé ({version}): {snapshot.article_count} articles, "
+              f"{vector_store.size} embeddings")
+        return True
+    
+    async def sync_with_database(self) -> bool:
+        """
+        Catch up with writes made to the database by other processes since the indexes
+        were loaded (scripts/add_articles.py, backfill_embeddings.py...). Embedding writes
+        alone are applied incrementally. Article changes are published as a new snapshot
+        version by a single worker (file lock) and every worker maps it through CURRENT,
+        so the indexes stay shared instead of being rebuilt in each process.
+        """
+        async with self._update_lock:
+            stamp = await self.db.get_stamp()
+            synced = self._synced_stamp or {}
+            if stamp == synced:
+                return False
+            hashes = await self.db.get_embedding_hashes()
+            if stamp.get('corpus_version') == synced.get('corpus_version') and await self._apply_embedding_writes(hashes):
+                self._synced_stamp, self._embedding_hashes = stamp, hashes
+                return True
+            
+            with build_lock(self.snapshot_root) as building:
+                if not building:
+                    return False  # another worker is publishing it: loaded on a later poll
+                loop = asyncio.get_running_loop()
+                # Own thread, event loop and connection: the build never blocks searches
+                await loop.run_in_executor(None, lambda: asyncio.run(refresh_snapshot(self.snapshot_root)))
+            if await self._reload_snapshot():
+                return True
+            # Published version unusable here (other embedding model...): private indexes
+            await self._reload_from_database(stamp)
+            self._synced_stamp, self._embedding_hashes = stamp, hashes
+            return True
+    
+    async def _apply_embedding_writes(self, hashes: Dict[int, Tuple[Optional[str], int]]) -> bool:
+        """
+        Upsert the vectors written since the last sync (other embedding_hash or size) into a
+        copy of the vector store, then swap it in; the IVF index is rebuilt only once too many
+        rows sit outside it. False if vectors were removed (a full reload is needed).
+        """
+        if not self.embedding_service:
+            return True
+        dimensions = self.embedding_service.dimensions
+        served = {article_id for article_id, (_, size) in self._embedding_hashes.items() if size == dimensions}
+        current = {article_id for article_id, (_, size) in hashes.items() if size == dimensions}
+        if served - current:
+            return False
+        changed = sorted(article_id for article_id in current if hashes[article_id] != self._embedding_hashes.get(article_id))
+        if not changed:
+            return True
+        
+        store = self.vector_store.copy()
+        for article, blob in await self.db.get_embeddings(changed):
+            store.upsert(article, self.embedding_service.bytes_to_embedding(blob))
+        if store.needs_rebuild:
+            await store.build_index(self.db)
+        self.vector_store = store
+        print(f"🧮 {len(changed)} embeddings mis à jour ({store.size} en mémoire)")
+        return True
+    
+    async def _reload_from_database(self, stamp: Dict[str, int]):
+        """Build fresh indexes from the database aside, then swap them in"""
+        keyword_index = self.keyword_index
+        if self.keyword_backend != "fts":
+            keyword_index = KeywordIndex()
+            keyword_index.build(await self.db.get_all_articles())
+        vector_store = self.vector_store
+        if self.embedding_service:
+            vector_store = VectorStore(self.vector_store.index_path, self.vector_store.vectors_path)
+            await vector_store.load(self.db, self.embedding_service.dimensions)
+        
+        # The snapshot no longer describes what is served
+        self.snapshot, self.keyword_index, self.vector_store = None, keyword_index, vector_store
+        self.answer_cache.clear()
+        print(f"🔄 Base modifiée (corpus v{stamp.get('corpus_version')}, embeddings "
+              f"v{stamp.get('embedding_version')}): {keyword_index.size} articles, {vector_store.size} embeddings")
+    
+    async def refresh(self) -> bool:
+        """Serve a new snapshot version if there is one, otherwise catch up with the database"""
+        return await self.reload_snapshot() or await self.sync_with_database()
+    
+    async def _watch_corpus(self):
+        """Poll the snapshot's CURRENT pointer and the database versions every reload_interval seconds"""
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                print(f"❌ Corpus reload error: {e}")
+    
+    async def reload_embeddings(self) -> int:
+        """(Re)load the in-memory embedding matrix from the database"""
+        count = await self.vector_store.load(self.db, self.embedding_service.dimensions if self.embedding_service else None)
+        print(f"🧮 {count} embeddings chargés en mémoire ({self.vector_store.dimensions} dims)")
+        return count
+    
+    async def reload_keyword_index(self) -> int:
+        """(Re)build the BM25 inverted index from the database"""
+        self.keyword_index.build(await self.db.get_all_articles())
+        print(f"🔤 Index BM25: {self.keyword_index.size} articles, {len(self.keyword_index.postings)} termes")
+        return self.keyword_index.size
+    
     @property
     def articles(self) -> List[Dict[str, Any]]:
         """Compatibility property for old code"""
         return []
     
-    async def search(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
-        """Search for relevant articles using embeddings or keywords"""
+    @staticmethod
+    def _query_key(query: str) -> str:
+        return " ".join(normalize_text(query).split())
+    
+    async def search(
+        self,
+        query: str,
+        top_k: int = 5,
+        filters: Optional[Dict[str, Any]] = None,
+        sort: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Search for relevant articles (concurrent identical searches are coalesced).
+        filters: structured penalty/section filters (see database.FILTER_CLAUSES)
+        sort: "relevance" (default) or one of database.SORT_ORDERS
+        """
         if not self.is_ready:
             return []
         
-        # Try embedding search first
-        if self.use_embeddings and self.embedding_service:
-            results = await self._search_by_embedding(query, top_k)
-            if results:
-                return results
+        filters = {name: value for name, value in (filters or {}).items() if value is not None}
+        # Fast path: explicit article references resolve in one indexed lookup
+        references, only_references = await self.lookup_articles(query, filters)
+        if only_references:
+            return self._sort_results(references[:top_k], sort)
+        
+        results = await self.flights.do(
+            ("search", self._query_key(query), top_k, tuple(sorted(filters.items())), sort),
+            lambda: self._search(query, top_k, filters, sort)
+        )
+        referenced_ids = {r['id'] for r in references}
+        return self._sort_results((references + [r for r in results if r['id'] not in referenced_ids])[:top_k], sort)
+    
+    async def lookup_articles(
+        self,
+        query: str,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Resolve article references in the query ("article 350", "المادة 303 مكرر"),
+        keeping those that match the structured filters.
+        Returns (articles found, whether the query was only references).
+        """
+        keys, only_references = parse_article_query(query)
+        if not keys:
+            return [], False
+        
+        articles = await self.db.get_articles_by_numero_keys(keys)
+        if filters:
+            allowed_ids = await self.db.filter_article_ids(filters)
+            articles = [article for article in articles if article['id'] in allowed_ids]
+        results = [self._build_result(article, 1.0) for article in articles]
+        return results, only_references
+    
+    def is_direct_lookup(self, query: str) -> bool:
+        """True if the query is only article references (answered without the LLM unless configured)"""
+        return parse_article_query(query)[1] and not self.direct_lookup_llm
+    
+    async def search_batch(self, queries: List[str], top_k: int = 5) -> List[List[Dict[str, Any]]]:
+        """
+        search() for many queries at once, results in query order: one embedding request
+        for all uncached queries and one matrix-matrix product over the vector store.
+        """
+        if not self.is_ready:
+            return [[] for _ in queries]
+        
+        lookups = [await self.lookup_articles(query) for query in queries]
+        pending = [i for i, (_, only_references) in enumerate(lookups) if not only_references]
+        
+        embedding_results: Dict[int, List[Dict[str, Any]]] = {}
+        if pending and self.use_embeddings and self.embedding_service and self.search_mode != "keyword":
+            embeddings = await self.embedding_service.get_query_embeddings_batch([queries[i] for i in pending])
+            matches = await self.scoring.run(self.vector_store.search_batch, embeddings, top_k)
+            for i, pairs in zip(pending, matches):
+                embedding_results[i] = [self._build_result(article, score) for article, score in pairs]
+        
+        results = []
+        for i, (references, only_references) in enumerate(lookups):
+            if only_references:
+                results.append(references[:top_k])
+                continue
+            
+            ranked = embedding_results.get(i, [])
+            if ranked and self.search_mode == "hybrid":
+                keyword_results = await self._search_by_keywords(queries[i], top_k)
+                ranked = self._fuse_results(
+                    [(ranked, self.embedding_weight), (keyword_results, self.keyword_weight)],
+                    top_k
+                )
+            elif not ranked:
+                ranked = await self._search_by_keywords(queries[i], top_k)
+            
+            referenced_ids = {r['id'] for r in references}
+            results.append((references + [r for r in ranked if r['id'] not in referenced_ids])[:top_k])
+        return results
+    
+    async def filter_articles(
+        self,
+        filters: Optional[Dict[str, Any]] = None,
+        sort: Optional[str] = None,
+        limit: int = 20,
+        offset: int = 0
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """Structured search only (no text): filtering and sorting happen in SQLite"""
+        articles, total = await self.db.search_articles(filters, sort, limit, offset)
+        return [self._build_result(article, 0.0) for article in articles], total
+    
+    async def _search(
+        self,
+        query: str,
+        top_k: int,
+        filters: Dict[str, Any],
+        sort: Optional[str]
+    ) -> List[Dict[str, Any]]:
+        """Search for relevant articles using embeddings or keywords"""
+        if not query.strip():
+            results, _ = await self.filter_articles(filters, sort, top_k)
+            return results
+        
+        # Filters are resolved once through the indexed columns, then restrict ranking
+        allowed_ids = await self.db.filter_article_ids(filters) if filters else None
+        if allowed_ids is not None and not allowed_ids:
+            return []
+        
+        results = []
+        use_embeddings = self.use_embeddings and self.embedding_service and self.search_mode != "keyword"
+        if use_embeddings and self.search_mode == "hybrid":
+            # Both retrievers run concurrently: latency is max(a, b), not a + b
+            embedding_results, keyword_results = await asyncio.gather(
+                self._search_by_embedding(query, top_k, allowed_ids),
+                self._search_by_keywords(query, top_k, allowed_ids, filters)
+            )
+            results = self._fuse_results(
+                [(embedding_results, self.embedding_weight), (keyword_results, self.keyword_weight)],
+                top_k
+            )
+        elif use_embeddings:
+            results = await self._search_by_embedding(query, top_k, allowed_ids)
         
         # Fallback to keyword search
-        return await self._search_by_keywords(query, top_k)
+        if not results:
+            results = await self._search_by_keywords(query, top_k, allowed_ids, filters)
+        
+        # A penalty sort only reorders the top_k most relevant matches: sorting a deeper
+        # pool would let severe but unrelated articles outrank the relevant ones
+        return self._sort_results(results[:top_k], sort)
     
-    async def _search_by_embedding(self, query: str, top_k: int) -> List[Dict[str, Any]]:
+    async def _search_by_embedding(
+        self,
+        query: str,
+        top_k: int,
+        allowed_ids: Optional[set] = None
+    ) -> List[Dict[str, Any]]:
         """Search using Jina AI embeddings and cosine similarity"""
         try:
             # Get query embedding
-            query_embedding = await self.embedding_service.get_query_embedding(query)
+            query_embedding = await self.flights.do(
+                ("embedding", self._query_key(query)),
+                lambda: self.embedding_service.get_query_embedding(query)
+            )
             if not query_embedding:
                 return []
             
-            # Get all articles with embeddings
-            cursor = await self.db.connection.execute("""
-                SELECT id, numero, texte, texte_arabe, categorie, section, embedding
-                FROM articles WHERE embedding IS NOT NULL
-            """)
-            rows = await cursor.fetchall()
-            
-            if not rows:
-                return []
-            
-            # Calculate similarities
-            results = []
-            for row in rows:
-                article_embedding = JinaEmbeddingService.bytes_to_embedding(row[6])
-                similarity = JinaEmbeddingService.cosine_similarity(query_embedding, article_embedding)
-                
-                results.append({
-                    'id': row[0],
-                    'numero': row[1],
-                    'texte': row[2],
-                    'texte_arabe': row[3],
-                    'categorie': row[4],
-                    'section': row[5],
-                    'score': similarity,
-                    'crime': row[1],  # Compatibility
-                    'article': row[1],
-                    'description': row[2],
-                    'penalty': {
-                        'prison': self._extract_penalty(row[2]),
-                        'amende': self._extract_amende(row[2])
-                    }
-                })
-            
-            # Sort by similarity and return top_k
-            results.sort(key=lambda x: x['score'], reverse=True)
-            return results[:top_k]
+            # Single matrix-vector product over the preloaded matrix (on a scoring thread)
+            matches = await self.scoring.run(self.vector_store.search, query_embedding, top_k, allowed_ids)
+            return [self._build_result(article, score) for article, score in matches]
             
+        except ScoringPoolSaturated:
+            raise
         except Exception as e:
             print(f"❌ Embedding search error: {e}")
             return []
     
-    async def _search_by_keywords(self, query: str, top_k: int) -> List[Dict[str, Any]]:
-        """Search using keyword matching"""
-        query_lower = self._normalize_text(query)
-        query_words = [w for w in query_lower.split() if len(w) > 2]
+    async def _search_by_keywords(
+        self,
+        query: str,
+        top_k: int,
+        allowed_ids: Optional[set] = None,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """Search using the BM25 inverted index (or SQLite FTS5)"""
+        if self.keyword_backend == "fts":
+            rows = await self.db.search_fts(query, top_k, filters)
+            best = rows[0]['score'] if rows else 0
+            return [self._build_result(row, row['score'] / best if best > 0 else 0.0) for row in rows]
         
-        # Get all articles
-        all_articles = await self.db.get_all_articles()
+        matches = await self.scoring.run(self.keyword_index.search, query, top_k, allowed_ids)
+        return [self._build_result(article, score) for article, score in matches]
+    
+    def _fuse_results(
+        self,
+        ranked_lists: List[Tuple[List[Dict[str, Any]], float]],
+        top_k: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Reciprocal rank fusion of several ranked result lists (deduplicated by id).
+        Fused scores are normalized by the best possible score (rank 1 in every non-empty list).
+        """
+        fused: Dict[int, float] = {}
+        results: Dict[int, Dict[str, Any]] = {}
+        for ranked, weight in ranked_lists:
+            for rank, result in enumerate(ranked, start=1):
+                fused[result['id']] = fused.get(result['id'], 0.0) + weight / (self.rrf_k + rank)
+                results.setdefault(result['id'], result)
         
-        scored_results = []
-        for article in all_articles:
-            score = 0
-            texte_lower = self._normalize_text(article['texte'])
-            numero_lower = article['numero'].lower()
-            categorie_lower = self._normalize_text(article.get('categorie', ''))
-            
-            # Check article number
-            for word in query_words:
-                if word.isdigit() and word in numero_lower:
-                    score += 15
-            
-            # Check category
-            for word in query_words:
-                if word in categorie_lower:
-                    score += 8
-            
-            # Check text content
-            for word in query_words:
-                if word in texte_lower:
-                    score += 3
-            
-            if score > 0:
-                scored_results.append({
-                    'id': article['id'],
-                    'numero': article['numero'],
-                    'texte': article['texte'],
-                    'texte_arabe': article.get('texte_arabe', ''),
-                    'categorie': article.get('categorie', ''),
-                    'section': article.get('section', ''),
-                    'score': min(score / 30, 1.0),
-                    'crime': article['numero'],
-                    'article': article['numero'],
-                    'description': article['texte'],
-                    'penalty': {
-                        'prison': self._extract_penalty(article['texte']),
-                        'amende': self._extract_amende(article['texte'])
-                    }
-                })
-        
-        # Sort by score
-        scored_results.sort(key=lambda x: x['score'], reverse=True)
-        return scored_results[:top_k]
+        best = sum(weight for ranked, weight in ranked_lists if ranked) / (self.rrf_k + 1)
+        ranked_ids = sorted(fused, key=fused.get, reverse=True)[:top_k]
+        return [{**results[article_id], 'score': round(fused[article_id] / best, 4)} for article_id in ranked_ids]
+    
+    @property
+    def search_method(self) -> str:
+        """Retrieval actually in use (reported by /config)"""
+        keyword = "bm25-fts5" if self.keyword_backend == "fts" else "bm25"
+        if not self.use_embeddings or self.search_mode == "keyword":
+            return keyword
+        if self.search_mode == "embedding":
+            return "embedding"
+        return f"hybrid-rrf (embedding + {keyword})"
+    
+    @staticmethod
+    def _sort_results(results: List[Dict[str, Any]], sort: Optional[str]) -> List[Dict[str, Any]]:
+        """Re-sort ranked results by penalty (stable: relevance breaks ties), same order as SQL"""
+        def severity(result):
+            penalty = result['penalty']
+            return (penalty['peine_mort'], penalty['perpetuite'])
+        
+        if sort == "prison_desc":
+            return sorted(results, key=lambda r: severity(r) + (r['penalty']['prison_max_mois'] or -1,), reverse=True)
+        if sort == "prison_asc":
+            return sorted(results, key=lambda r: severity(r) + (
+                r['penalty']['prison_max_mois'] is None, r['penalty']['prison_max_mois'] or 0
+            ))
+        if sort == "amende_desc":
+            return sorted(results, key=lambda r: r['penalty']['amende_max'] or -1, reverse=True)
+        if sort == "amende_asc":
+            return sorted(results, key=lambda r: (r['penalty']['amende_max'] is None, r['penalty']['amende_max'] or 0))
+        return results
+    
+    def _build_result(self, article: Dict[str, Any], score: float) -> Dict[str, Any]:
+        """Format an article as a search result"""
+        return {
+            'id': article['id'],
+            'numero': article['numero'],
+            'texte': article['texte'],
+            'texte_arabe': article.get('texte_arabe', ''),
+            'categorie': article.get('categorie', ''),
+            'section': article.get('section', ''),
+            'score': score,
+            'crime': article['numero'],  # Compatibility
+            'article': article['numero'],
+            'description': article['texte'],
+            'penalty': {
+                # Precomputed at ingestion (services/penalty.py)
+                'prison': article.get('prison_texte') or "Voir article",
+                'amende': article.get('amende_texte') or "N/A",
+                'prison_min_mois': article.get('prison_min_mois'),
+                'prison_max_mois': article.get('prison_max_mois'),
+                'perpetuite': bool(article.get('perpetuite')),
+                'peine_mort': bool(article.get('peine_mort')),
+                'amende_min': article.get('amende_min'),
+                'amende_max': article.get('amende_max')
+            }
+        }
     
     def _normalize_text(self, text: str) -> str:
         """Normalize text for comparison"""
-        if not text:
-            return ""
-        return (text.lower()
-                .replace('é', 'e').replace('è', 'e').replace('ê', 'e').replace('ë', 'e')
-                .replace('à', 'a').replace('â', 'a').replace('ä', 'a')
-                .replace('î', 'i').replace('ï', 'i')
-                .replace('ô', 'o').replace('ö', 'o')
-                .replace('ù', 'u').replace('û', 'u').replace('ü', 'u')
-                .replace('ç', 'c'))
-    
-    def _extract_penalty(self, text: str) -> str:
-        """Extract prison penalty from article text"""
-        import re
-        # Patterns for prison/réclusion
-        patterns = [
-            r'réclusion perpétuelle',
-            r'réclusion à temps de (\d+) à (\d+) ans?',
-            r'emprisonnement de (\d+) (?:mois|jours?) à (\d+) (?:ans?|mois)',
-            r'emprisonnement d\'un an à (\d+) ans?',
-            r'puni de mort',
-            r'puni de la mort',
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                return match.group(0)
-        
-        return "Voir article"
-    
-    def _extract_amende(self, text: str) -> str:
-        """Extract fine from article text"""
-        import re
-        pattern = r'amende de ([\d\.\s]+) (?:DA|dinars?)? à ([\d\.\s]+) (?:DA|dinars?)?'
-        match = re.search(pattern, text, re.IGNORECASE)
-        if match:
-            return f"{match.group(1)} à {match.group(2)} DA"
-        return "N/A"
+        return normalize_text(text)
     
     def _build_context(self, results: List[Dict[str, Any]]) -> str:
         """Build context string for LLM"""
@@ -220,12 +568,49 @@ class RAGService:
         
         return "\n---\n".join(context_parts)
     
+    def _answer_cache_key(self, query: str, results: List[Dict[str, Any]]) -> Optional[tuple]:
+        """(model, normalized question, ordered article ids, prompt version), None if not cacheable"""
+        if self.llm_service.provider == "mock":
+            return None
+        return (self.llm_service.model, self._query_key(query), tuple(r['id'] for r in results), PROMPT_VERSION)
+    
     async def generate_response(self, query: str, results: List[Dict[str, Any]]) -> str:
         """Generate natural language response using LLM"""
+        key = self._answer_cache_key(query, results)
+        if key is not None:
+            cached = self.answer_cache.get(key)
+            if cached is not None:
+                return cached
+        
         context = self._build_context(results)
-        response = await self.llm_service.generate_response(query, context)
+        response = await self.flights.do(
+            ("answer", self._query_key(query), tuple(r['id'] for r in results)),
+            lambda: self.llm_service.generate_response(query, context)
+        )
+        
+        if key is not None and not response.startswith(ERROR_PREFIX):
+            self.answer_cache.set(key, response)
         return response
     
+    async def generate_response_stream(self, query: str, results: List[Dict[str, Any]]) -> AsyncIterator[str]:
+        """Stream the LLM response chunk by chunk"""
+        key = self._answer_cache_key(query, results)
+        if key is not None:
+            cached = self.answer_cache.get(key)
+            if cached is not None:
+                yield cached
+                return
+        
+        context = self._build_context(results)
+        chunks = []
+        async for chunk in self.llm_service.generate_response_stream(query, context):
+            chunks.append(chunk)
+            yield chunk
+        
+        response = "".join(chunks)
+        if key is not None and not response.startswith(ERROR_PREFIX):
+            self.answer_cache.set(key, response)
+    
     def format_response(self, results: List[Dict[str, Any]], original_query: str) -> str:
         """Fallback format without LLM"""
         if not results:
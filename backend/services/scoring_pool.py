@@ -0,0 +1,67 @@
+"""
+Scoring Pool - Exécution du scoring CPU (BM25, produits matriciels) hors de la boucle asyncio
+Pool de threads borné : NumPy libère le GIL pendant les produits matriciels.
+Au-delà de max_pending tâches (en cours + en attente), les nouvelles sont refusées
+immédiatement (503) au lieu d'allonger la file et la latence de tout le monde.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+
+class ScoringPoolSaturated(Exception):
+    """Too many scoring tasks pending: the request should be retried later"""
+
+
+class ScoringPool:
+    """Bounded executor for CPU-bound retrieval (threads=0: inline on the event loop)"""
+
+    def __init__(self, threads: int = 4, max_pending: int = 32):
+        self.threads = max(threads, 0)
+        self.max_pending = max(max_pending, self.threads, 1)
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.pending = 0
+        self.peak = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def start(self):
+        if self.threads and self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="scoring")
+
+    def close(self):
+        if self.executor:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+
+    async def run(self, fn: Callable[..., Any], *args) -> Any:
+        """fn(*args) on a scoring thread; raises ScoringPoolSaturated when the queue is full"""
+        if self.executor is None:
+            return fn(*args)
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise ScoringPoolSaturated(f"{self.pending} scoring tasks pending")
+
+        loop = asyncio.get_running_loop()
+        self.pending += 1
+        self.peak = max(self.peak, self.pending)
+        future = self.executor.submit(fn, *args)
+        # Released when the thread is done, not when the caller gives up (a cancelled
+        # request does not stop the scoring already running)
+        future.add_done_callback(lambda _: loop.is_closed() or loop.call_soon_threadsafe(self._release))
+        return await asyncio.wrap_future(future)
+
+    def _release(self):
+        self.pending -= 1
+        self.completed += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "threads": self.threads,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "peak": self.peak,
+            "completed": self.completed,
+            "rejected": self.rejected
+        }
@@ -0,0 +1,262 @@
+"""
+Corpus Snapshot - Instantané en lecture seule, construit au build (scripts/build_snapshot.py)
+Articles (peines comprises), index BM25 (CSR) et matrice d'embeddings en .npy,
+estampillés avec corpus_version / embedding_version. Au démarrage les tableaux
+sont mappés (mmap, sans copie) au lieu d'être reconstruits depuis les lignes ;
+un instantané absent ou obsolète => chargement depuis la base.
+
+Chaque construction est un répertoire versionné ; le fichier CURRENT désigne la
+version servie et est remplacé atomiquement. Les workers (gunicorn) mappent les
+mêmes fichiers : le cache de pages est partagé, la RAM ne croît pas avec les workers.
+"""
+
+import json
+import os
+import shutil
+import time
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, Iterator, List
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: a single uvicorn process, nothing to coordinate
+    fcntl = None
+
+from .ann_index import IVFIndex
+from .keyword_index import KeywordIndex, FIELD_WEIGHTS
+from .vector_store import VectorStore
+
+FORMAT_VERSION = 2
+
+CURRENT_FILE = "CURRENT"
+SNAPSHOT_KEEP = int(os.getenv("SNAPSHOT_KEEP", "2"))  # versions kept on disk (older ones may still be mapped)
+
+KEYWORD_ARRAYS = ("offsets", "posting_ids", "posting_tfs", "doc_ids", "doc_lengths")
+
+
+def snapshot_path(db_path: str) -> str:
+    """Snapshot root for a database: CORPUS_SNAPSHOT_PATH or data/<db name>.snapshot"""
+    return os.getenv("CORPUS_SNAPSHOT_PATH") or os.path.splitext(db_path)[0] + ".snapshot"
+
+
+def current_version(path: str) -> Optional[str]:
+    """Name of the version CURRENT points to (None if no snapshot was built)"""
+    try:
+        with open(os.path.join(path, CURRENT_FILE), encoding="utf-8") as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+@contextmanager
+def build_lock(path: str) -> Iterator[bool]:
+    """
+    Exclusive, non-blocking lock file next to the snapshot root: True in the one process
+    allowed to build a new version, False while another one is building it
+    """
+    if fcntl is None:
+        yield True
+        return
+    with open(f"{path}.lock", "w") as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _save_json(path: str, data):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+
+
+def _publish(path: str, version: str):
+    """Point CURRENT at version (atomic rename), then drop versions beyond SNAPSHOT_KEEP"""
+    tmp = os.path.join(path, f"{CURRENT_FILE}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(tmp, os.path.join(path, CURRENT_FILE))
+
+    # Workers still serving an older version keep their mappings: unlinked files stay readable
+    versions = sorted(
+        (name for name in os.listdir(path) if os.path.isdir(os.path.join(path, name)) and name != version),
+        key=lambda name: os.path.getmtime(os.path.join(path, name)),
+        reverse=True
+    )
+    for name in versions[max(SNAPSHOT_KEEP - 1, 0):]:
+        shutil.rmtree(os.path.join(path, name), ignore_errors=True)
+
+
+async def build_snapshot(db, path: str, embedding_service=None) -> Dict[str, Any]:
+    """Write a new snapshot version under path and make it current; returns the manifest"""
+    # The stamp is read first: a write during the build leaves the snapshot stale, never wrong
+    stamp = await db.get_stamp()
+    articles = await db.get_all_articles()
+
+    keyword_index = KeywordIndex()
+    keyword_index.build(articles)
+    terms, arrays = keyword_index.to_arrays()
+
+    store = None
+    if embedding_service is not None:
+        store = VectorStore()
+        store.quantization = "none"  # codes are recomputed at load time from VECTOR_QUANTIZATION
+        await store.load(db, embedding_service.dimensions)
+
+    if os.path.isdir(path) and current_version(path) is None:
+        shutil.rmtree(path)  # unversioned (format 1) snapshot
+    version = f"v{stamp.get('corpus_version')}-{time.time_ns() // 1_000_000}"
+    tmp = os.path.join(path, f"{version}.tmp")
+    os.makedirs(tmp)
+    _save_json(os.path.join(tmp, "articles.json"), articles)
+    _save_json(os.path.join(tmp, "terms.json"), terms)
+    for name, array in arrays.items():
+        np.save(os.path.join(tmp, f"{name}.npy"), array)
+
+    manifest = {
+        "format": FORMAT_VERSION,
+        "version": version,
+        "stamp": stamp,
+        "corpus_version": stamp.get("corpus_version"),
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "articles": len(articles),
+        "terms": len(terms),
+        "keyword_fields": FIELD_WEIGHTS,
+        "model": embedding_service.model if embedding_service is not None else None,
+        "dimensions": embedding_service.dimensions if embedding_service is not None else None,
+        "vectors": store.size if store is not None else 0,
+        "ann_lists": store.ann.n_lists if store is not None and store.ann is not None else None
+    }
+    if store is not None and store.size:
+        np.save(os.path.join(tmp, "vectors.npy"), np.asarray(store.matrix, dtype=np.float32))
+        np.save(os.path.join(tmp, "ids.npy"), store.ids)
+        if store.ann is not None:
+            np.save(os.path.join(tmp, "ann_centroids.npy"), store.ann.centroids)
+            np.save(os.path.join(tmp, "ann_offsets.npy"), store.ann.offsets)
+    _save_json(os.path.join(tmp, "manifest.json"), manifest)
+
+    os.replace(tmp, os.path.join(path, version))
+    _publish(path, version)
+    return manifest
+
+
+async def refresh_snapshot(
+    path: Optional[str] = None,
+    force: bool = False,
+    match_model: bool = True
+) -> Optional[Dict[str, Any]]:
+    """
+    Build the snapshot of the configured database unless the current one is up to date
+    (same stamp and BM25 fields, and embedding model if match_model). Returns the new
+    manifest, None if kept.
+    """
+    from .database import DatabaseService
+    from .embedding_provider import create_embedding_provider
+
+    db = DatabaseService()
+    await db.initialize()
+    try:
+        path = path or snapshot_path(db.db_path)
+        # Only the model name / dimensions are used: no embedding is computed here
+        embedding_service = create_embedding_provider()
+        snapshot = CorpusSnapshot.open(path)
+        if not force and snapshot is not None and snapshot.is_up_to_date(
+            await db.get_stamp(), embedding_service, match_model
+        ):
+            return None
+        return await build_snapshot(db, path, embedding_service)
+    finally:
+        await db.close()
+
+
+class CorpusSnapshot:
+    """A built snapshot version: manifest read eagerly, arrays memory-mapped on use"""
+
+    def __init__(self, path: str, manifest: Dict[str, Any], version: str = ""):
+        self.path = path
+        self.manifest = manifest
+        self.version = version
+        self._articles: Optional[List[Dict[str, Any]]] = None
+
+    @classmethod
+    def open(cls, path: str, version: Optional[str] = None) -> Optional["CorpusSnapshot"]:
+        """The given version under the snapshot root path (default: the one CURRENT points to)"""
+        version = version or current_version(path)
+        if version is None:
+            return None
+        try:
+            with open(os.path.join(path, version, "manifest.json"), encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if manifest.get("format") != FORMAT_VERSION:
+            return None
+        return cls(os.path.join(path, version), manifest, version)
+
+    @property
+    def corpus_version(self) -> int:
+        return self.manifest["corpus_version"]
+
+    @property
+    def article_count(self) -> int:
+        return self.manifest["articles"]
+
+    def is_current(self, stamp: Dict[str, int]) -> bool:
+        """Built from this very database, with no article or embedding written since"""
+        return self.manifest.get("stamp") == stamp
+
+    def is_up_to_date(self, stamp: Dict[str, int], embedding_service=None, match_model: bool = True) -> bool:
+        """Current, and built with the same BM25 fields and (match_model) embedding model / size"""
+        model = (embedding_service.model, embedding_service.dimensions) if embedding_service is not None else (None, None)
+        return (
+            self.is_current(stamp)
+            and self.manifest.get("keyword_fields") == FIELD_WEIGHTS
+            and (not match_model or (self.manifest.get("model"), self.manifest.get("dimensions")) == model)
+        )
+
+    def _array(self, name: str) -> np.ndarray:
+        # Copy-on-write: zero-copy views of the file; in-place updates stay private to this process
+        return np.load(os.path.join(self.path, f"{name}.npy"), mmap_mode="c")
+
+    def _json(self, name: str):
+        with open(os.path.join(self.path, f"{name}.json"), encoding="utf-8") as f:
+            return json.load(f)
+
+    @property
+    def articles(self) -> List[Dict[str, Any]]:
+        if self._articles is None:
+            self._articles = self._json("articles")
+        return self._articles
+
+    def keyword_index(self) -> Optional[KeywordIndex]:
+        """BM25 index over the mapped postings (None if built with other field weights)"""
+        if self.manifest.get("keyword_fields") != FIELD_WEIGHTS:
+            return None
+        arrays = {name: self._array(name) for name in KEYWORD_ARRAYS}
+        return KeywordIndex.from_arrays(self.articles, self._json("terms"), arrays)
+
+    def attach_vectors(self, store: VectorStore, embedding_service) -> bool:
+        """Serve the snapshot's embedding matrix if it was built with the same model and size"""
+        if (self.manifest.get("model"), self.manifest.get("dimensions")) != (
+            embedding_service.model, embedding_service.dimensions
+        ):
+            return False
+        if not self.manifest.get("vectors"):
+            store.attach(np.zeros((0, 0), dtype=np.float32), np.zeros(0, dtype=np.int64), [])
+            return True
+
+        matrix, ids = self._array("vectors"), self._array("ids")
+        by_id = {article['id']: article for article in self.articles}
+        if any(article_id not in by_id for article_id in ids.tolist()):
+            return False
+        ann = None
+        if self.manifest.get("ann_lists"):
+            ann = IVFIndex(self._array("ann_centroids"), self._array("ann_offsets"), matrix, ids)
+        store.attach(matrix, ids, [by_id[article_id] for article_id in ids.tolist()], ann, embedding_service.dimensions)
+        return True
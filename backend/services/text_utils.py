@@ -0,0 +1,47 @@
+"""
+Text utilities - Normalisation et tokenisation (français / arabe)
+"""
+
+import re
+from typing import List
+
+_ACCENTS = str.maketrans({
+    'é': 'e', 'è': 'e', 'ê': 'e', 'ë': 'e',
+    'à': 'a', 'â': 'a', 'ä': 'a',
+    'î': 'i', 'ï': 'i',
+    'ô': 'o', 'ö': 'o',
+    'ù': 'u', 'û': 'u', 'ü': 'u',
+    'ç': 'c'
+})
+
+_TOKEN_PATTERN = re.compile(r'\w+')
+
+STOPWORDS = frozenset({
+    'les', 'des', 'une', 'est', 'par', 'pour', 'dans', 'qui', 'que', 'sur',
+    'aux', 'avec', 'sont', 'ces', 'son', 'ses', 'leur', 'leurs', 'cette',
+    'ont', 'lui', 'elle', 'pas', 'tout', 'toute', 'tous', 'peut', 'etre',
+    'quel', 'quelle', 'quels', 'quelles', 'quoi', 'comment', 'entre'
+})
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase and strip French accents"""
+    if not text:
+        return ""
+    return text.lower().translate(_ACCENTS)
+
+
+def _stem(token: str) -> str:
+    """Very light plural folding (vols -> vol, armes -> arme)"""
+    if len(token) > 4 and token[-1] in 'sx' and not token.isdigit():
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    """Split normalized text into search tokens (numbers are always kept)"""
+    tokens = []
+    for token in _TOKEN_PATTERN.findall(normalize_text(text)):
+        if token.isdigit() or (len(token) > 2 and token not in STOPWORDS):
+            tokens.append(_stem(token))
+    return tokens
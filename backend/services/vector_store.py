@@ -0,0 +1,350 @@
+"""
+Vector Store - Matrice d'embeddings en mémoire (NumPy)
+Tous les embeddings sont chargés une seule fois dans une matrice float32
+contiguë et normalisée L2 : une recherche = un produit matrice-vecteur.
+Au-delà de ANN_MIN_SIZE vecteurs, un index IVF (services/ann_index.py)
+limite la recherche aux listes les plus proches de la requête.
+Avec VECTOR_QUANTIZATION (int8 / binary), seuls les codes compacts restent en
+RAM ; la matrice float32 est mappée depuis le disque pour le re-classement.
+"""
+
+import asyncio
+import copy
+import hashlib
+import os
+import numpy as np
+from typing import List, Dict, Any, Tuple, Optional, Set
+
+from .ann_index import IVFIndex
+from .quantization import QuantizedVectors
+from .database import ARTICLE_FIELDS, ARTICLE_COLUMNS
+
+
+class VectorStore:
+    """Index vectoriel (produit scalaire sur vecteurs normalisés), exact ou IVF"""
+
+    def __init__(self, index_path: Optional[str] = None, vectors_path: Optional[str] = None):
+        self.matrix: np.ndarray = np.zeros((0, 0), dtype=np.float32)
+        self.ids: np.ndarray = np.zeros(0, dtype=np.int64)
+        self.metadata: List[Dict[str, Any]] = []
+        self._positions: Dict[int, int] = {}
+        # ANN: exact search below ann_min_size; nprobe trades recall for latency
+        self.index_path = index_path
+        self.ann: Optional[IVFIndex] = None
+        self.ann_min_size = int(os.getenv("ANN_MIN_SIZE", "2000"))
+        self.nprobe = int(os.getenv("ANN_NPROBE", "8"))
+        self._unindexed: Set[int] = set()  # rows added / changed since the index was built
+        # Quantized prefilter + float32 rescoring of the best top_k * rescore_factor candidates
+        self.vectors_path = vectors_path
+        self.quantization = os.getenv("VECTOR_QUANTIZATION", "none").lower()
+        self.rescore_factor = int(os.getenv(
+            "QUANTIZATION_RESCORE_FACTOR", "10" if self.quantization == "binary" else "4"
+        ))
+        self.quantized: Optional[QuantizedVectors] = None
+        self.expected_dimensions: Optional[int] = None  # provider output size; other vectors are skipped
+
+    @property
+    def size(self) -> int:
+        return len(self.metadata)
+
+    @property
+    def dimensions(self) -> int:
+        return self.matrix.shape[1] if self.matrix.ndim == 2 else 0
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        """L2-normalize rows in place (zero vectors stay zero)"""
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        np.divide(vectors, norms, out=vectors, where=norms > 0)
+        return vectors
+
+    def _set(self, matrix: np.ndarray, ids: np.ndarray, metadata: List[Dict[str, Any]]):
+        self.matrix = matrix
+        self.ids = ids
+        self.metadata = metadata
+        self._positions = {article_id: i for i, article_id in enumerate(ids.tolist())}
+        self._unindexed = set()
+
+    def _quantize(self):
+        """Build the quantized codes; keep the float32 matrix on disk (mmap) instead of in RAM"""
+        self.quantized = None
+        if self.quantization == "none" or not self.size:
+            return
+        if not isinstance(self.matrix, np.memmap) and self.vectors_path:
+            # Written aside then renamed: a file mapped by another worker is never truncated
+            tmp = f"{os.path.splitext(self.vectors_path)[0]}.{os.getpid()}.tmp.npy"
+            np.save(tmp, self.matrix)
+            os.replace(tmp, self.vectors_path)
+            self.matrix = np.load(self.vectors_path, mmap_mode="c")
+        self.quantized = QuantizedVectors.fit(self.quantization, self.matrix)
+
+    def stats(self) -> Dict[str, Any]:
+        """Size and resident memory of the vector index (reported by /config)"""
+        in_ram = 0 if isinstance(self.matrix, np.memmap) else self.matrix.nbytes
+        return {
+            "vectors": self.size,
+            "dimensions": self.dimensions,
+            "ann_lists": self.ann.n_lists if self.ann is not None else None,
+            "nprobe": self.nprobe if self.ann is not None else None,
+            "quantization": self.quantized.mode if self.quantized is not None else "none",
+            "resident_bytes": in_ram + (self.quantized.nbytes if self.quantized is not None else 0)
+        }
+
+    def _embedded(self) -> Tuple[str, tuple]:
+        """SQL condition (and parameters) selecting the vectors this store serves"""
+        return "embedding IS NOT NULL AND (? IS NULL OR embedding_dim = ?)", (self.expected_dimensions,) * 2
+
+    async def _signature(self, db) -> str:
+        """Fingerprint of the stored embeddings (ids, content hashes, sizes) - no BLOB read"""
+        condition, params = self._embedded()
+        cursor = await db.connection.execute(f"""
+            SELECT id, embedding_hash, length(embedding)
+            FROM articles WHERE {condition} ORDER BY id
+        """, params)
+        digest = hashlib.sha1()
+        for row in await cursor.fetchall():
+            digest.update(f"{row[0]}:{row[1]}:{row[2]};".encode("utf-8"))
+        return digest.hexdigest()
+
+    async def _load_index(self, db, signature: str) -> bool:
+        """Use the persisted index if it matches the database (vectors stay memory-mapped)"""
+        index = IVFIndex.load(self.index_path) if self.index_path else None
+        if index is None or index.meta.get("signature") != signature:
+            return False
+
+        condition, params = self._embedded()
+        cursor = await db.connection.execute(f"""
+            SELECT {ARTICLE_COLUMNS} FROM articles WHERE {condition}
+        """, params)
+        articles = {row[0]: dict(zip(ARTICLE_FIELDS, row)) for row in await cursor.fetchall()}
+        ids = index.ids.tolist()
+        if any(article_id not in articles for article_id in ids):
+            return False
+
+        self._set(index.vectors, index.ids, [articles[article_id] for article_id in ids])
+        self.ann = index
+        self._quantize()
+        return True
+
+    async def load(self, db, dimensions: Optional[int] = None) -> int:
+        """
+        Load every stored embedding (from the persisted ANN index when up to date).
+        dimensions: only vectors of this size (the query embedding size) are loaded.
+        """
+        self.ann = None
+        self.expected_dimensions = dimensions
+        signature = await self._signature(db)
+        if await self._load_index(db, signature):
+            print(f"🗂️ Index IVF chargé (mmap): {self.ann.n_lists} listes, nprobe={self.nprobe}")
+            return self.size
+
+        condition, params = self._embedded()
+        cursor = await db.connection.execute(f"""
+            SELECT {ARTICLE_COLUMNS}, embedding
+            FROM articles WHERE {condition} ORDER BY id
+        """, params)
+        rows = await cursor.fetchall()
+
+        if dimensions:
+            cursor = await db.connection.execute("""
+                SELECT COUNT(*) FROM articles WHERE embedding IS NOT NULL AND embedding_dim != ?
+            """, (dimensions,))
+            skipped = (await cursor.fetchone())[0]
+            if skipped:
+                print(f"⚠️ {skipped} embeddings ignorés (dimension ≠ {dimensions}) : "
+                      f"scripts/truncate_embeddings.py ou backfill_embeddings.py")
+
+        if not rows:
+            self._set(np.zeros((0, 0), dtype=np.float32), np.zeros(0, dtype=np.int64), [])
+            return 0
+
+        blob = len(ARTICLE_FIELDS)  # embedding column index
+        dims = len(rows[0][blob]) // 4
+        rows = [row for row in rows if len(row[blob]) == dims * 4]
+
+        matrix = np.empty((len(rows), dims), dtype=np.float32)
+        ids = np.empty(len(rows), dtype=np.int64)
+        metadata = []
+        for i, row in enumerate(rows):
+            matrix[i] = np.frombuffer(row[blob], dtype='<f4')
+            ids[i] = row[0]
+            metadata.append(dict(zip(ARTICLE_FIELDS, row)))
+
+        self._set(self._normalize(matrix), ids, metadata)
+        if self.size >= self.ann_min_size:
+            await self.build_index(db, signature)
+        else:
+            self._quantize()
+        return len(metadata)
+
+    def attach(
+        self,
+        matrix: np.ndarray,
+        ids: np.ndarray,
+        metadata: List[Dict[str, Any]],
+        ann: Optional[IVFIndex] = None,
+        dimensions: Optional[int] = None
+    ) -> int:
+        """Serve prebuilt (normalized, possibly memory-mapped) vectors, e.g. from a corpus snapshot"""
+        self.expected_dimensions = dimensions
+        self._set(matrix, ids, metadata)
+        self.ann = ann
+        self._quantize()
+        return self.size
+
+    def copy(self) -> "VectorStore":
+        """
+        Private copy (same settings, own arrays) to update off to the side: searches run
+        on scoring threads, so changes go to a copy that then replaces the store in one
+        assignment. The IVF index is shared: it is never modified, only replaced.
+        """
+        store = copy.copy(self)
+        store.matrix = np.array(self.matrix)
+        store.ids = self.ids.copy()
+        store.metadata = list(self.metadata)
+        store._positions = dict(self._positions)
+        store._unindexed = set(self._unindexed)
+        store.quantized = self.quantized.copy() if self.quantized is not None else None
+        return store
+
+    @property
+    def needs_rebuild(self) -> bool:
+        """Too many rows outside the index (or the corpus outgrew exact search)"""
+        if self.ann is None:
+            return self.size >= self.ann_min_size
+        return len(self._unindexed) > max(64, self.size // 10)
+
+    async def build_index(self, db, signature: Optional[str] = None):
+        """
+        (Re)build the IVF index from the current vectors and persist it next to the database.
+        k-means and quantization run in the default executor, off the event loop; the store
+        is modified, so call this on one that is not being searched (loading, or a copy()).
+        """
+        loop = asyncio.get_running_loop()
+        signature = signature or await self._signature(db)
+        index = await loop.run_in_executor(None, IVFIndex.build, np.asarray(self.matrix), self.ids)
+        index.meta = {
+            "signature": signature,
+            "count": len(index.ids),
+            "dimensions": self.dimensions,
+            "n_lists": index.n_lists
+        }
+        if self.index_path:
+            await loop.run_in_executor(None, index.save, self.index_path)
+            saved = IVFIndex.load(self.index_path)
+            if saved is not None and saved.meta == index.meta:  # not one another worker saved meanwhile
+                index = saved
+
+        metadata = [self.metadata[self._positions[article_id]] for article_id in index.ids.tolist()]
+        self._set(index.vectors, index.ids, metadata)
+        self.ann = index
+        await loop.run_in_executor(None, self._quantize)
+        print(f"🗂️ Index IVF construit: {self.size} vecteurs, {index.n_lists} listes")
+
+    def upsert(self, article: Dict[str, Any], embedding: List[float]):
+        """Add or replace a single article vector"""
+        vector = self._normalize(np.asarray(embedding, dtype=np.float32).reshape(1, -1))
+        expected = self.dimensions if self.size else self.expected_dimensions
+        if expected and vector.shape[1] != expected:
+            raise ValueError(f"Embedding dimension {vector.shape[1]} != {expected}")
+
+        metadata = {field: article.get(field) for field in ARTICLE_FIELDS}
+
+        position = self._positions.get(article['id'])
+        if position is None:
+            self.matrix = np.vstack([self.matrix, vector]) if self.size else vector
+            self.ids = np.append(self.ids, np.int64(article['id']))
+            self.metadata.append(metadata)
+            position = self._positions[article['id']] = self.size - 1
+        else:
+            self.matrix[position] = vector[0]
+            self.metadata[position] = metadata
+
+        if self.quantized is not None:
+            self.quantized.set(position, vector[0])
+
+        if self.ann is not None:
+            self._unindexed.add(position)  # searched exhaustively until the next rebuild
+
+    def _candidates(self, query: np.ndarray) -> Optional[np.ndarray]:
+        """Rows to score for an unfiltered query (None = all rows)"""
+        if self.ann is None:
+            return None
+        rows = self.ann.probe(query, self.nprobe)
+        if self._unindexed:
+            rows = np.union1d(rows, np.fromiter(self._unindexed, dtype=np.int64, count=len(self._unindexed)))
+        return rows
+
+    def search(
+        self,
+        query_embedding: List[float],
+        top_k: int,
+        allowed_ids: Optional[Set[int]] = None
+    ) -> List[Tuple[Dict[str, Any], float]]:
+        """Return the top_k (metadata, cosine similarity) pairs, restricted to allowed_ids if given"""
+        if not self.size or top_k <= 0:
+            return []
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        if query.shape[0] != self.dimensions:
+            print(f"⚠️ Query dimension {query.shape[0]} != index dimension {self.dimensions}")
+            return []
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return []
+
+        query = query / norm
+        if allowed_ids is None:
+            rows = self._candidates(query)
+        else:
+            mask = np.isin(self.ids, np.fromiter(allowed_ids, dtype=np.int64, count=len(allowed_ids)))
+            rows = np.flatnonzero(mask)
+            if not len(rows):
+                return []
+        return self._rank(query, rows, top_k)
+
+    def _rank(self, query: np.ndarray, rows: Optional[np.ndarray], top_k: int) -> List[Tuple[Dict[str, Any], float]]:
+        """Top_k among rows (None = all): quantized prefilter if enabled, then exact float32 scores"""
+        if self.quantized is not None:
+            approx = self.quantized.scores(query, rows)
+            m = min(len(approx), top_k * self.rescore_factor)
+            shortlist = np.argpartition(-approx, m - 1)[:m]
+            rows = shortlist if rows is None else rows[shortlist]
+
+        scores = (self.matrix if rows is None else self.matrix[rows]) @ query
+        k = min(top_k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        positions = top if rows is None else rows[top]
+        return [(self.metadata[p], float(scores[t])) for p, t in zip(positions.tolist(), top.tolist())]
+
+    def search_batch(
+        self,
+        query_embeddings: List[Optional[List[float]]],
+        top_k: int
+    ) -> List[List[Tuple[Dict[str, Any], float]]]:
+        """search() for many queries at once: one matrix-matrix product (IVF / quantized: per query; missing -> [])"""
+        if self.ann is not None or self.quantized is not None:
+            return [self.search(embedding, top_k) if embedding is not None else [] for embedding in query_embeddings]
+
+        results: List[List[Tuple[Dict[str, Any], float]]] = [[] for _ in query_embeddings]
+        if not self.size or top_k <= 0:
+            return results
+
+        rows = [i for i, embedding in enumerate(query_embeddings)
+                if embedding is not None and len(embedding) == self.dimensions]
+        if not rows:
+            return results
+
+        queries = self._normalize(np.asarray([query_embeddings[i] for i in rows], dtype=np.float32))
+        scores = queries @ self.matrix.T  # (queries, articles)
+        k = min(top_k, self.size)
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+        for row, positions, row_scores in zip(rows, top, top_scores):
+            results[row] = [(self.metadata[i], score) for i, score in zip(positions.tolist(), row_scores.tolist())]
+        return results
@@ -0,0 +1,57 @@
+"""
+Fixtures communes des tests
+Chaque test travaille sur une copie de data/code_penal.db (jamais sur la base
+livrée), sans clé d'API : embeddings désactivés, Mock LLM.
+"""
+
+import os
+import shutil
+import sys
+from contextlib import contextmanager
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import services.database as database
+
+SOURCE_DATABASE = os.path.join(BACKEND_DIR, "data", "code_penal.db")
+
+TEST_ENV = {
+    "EMBEDDING_PROVIDER": "none",
+    "JINA_API_KEY": "",
+    "GROQ_API_KEY": "",
+    "KEYWORD_SEARCH_BACKEND": "memory",
+    "CORPUS_SNAPSHOT_PATH": "",
+    "CORPUS_RELOAD_INTERVAL": "0",
+}
+
+
+@contextmanager
+def isolated_database(directory: str):
+    """Copy of the shipped database, used by every DatabaseService opened inside the block"""
+    path = os.path.join(directory, "code_penal.db")
+    shutil.copy(SOURCE_DATABASE, path)
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(database, "DATABASE_PATH", path)
+        for name, value in TEST_ENV.items():
+            patch.setenv(name, value)
+        yield path
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    with isolated_database(str(tmp_path)) as path:
+        yield path
+
+
+@pytest.fixture(scope="module")
+def client(tmp_path_factory):
+    """The FastAPI app started with TestClient (startup / shutdown events included)"""
+    with isolated_database(str(tmp_path_factory.mktemp("app"))):
+        from fastapi.testclient import TestClient
+        import main
+
+        with TestClient(main.app) as test_client:
+            yield test_client
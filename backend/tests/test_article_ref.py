@@ -0,0 +1,36 @@
+"""
+Tests des références d'articles : clé normalisée (numero_key) et détection dans une question
+"""
+
+from services.article_ref import normalize_suffix, numero_key, parse_article_query
+
+
+def test_numero_key():
+    assert numero_key("Art. 303 bis") == "303 bis"
+    assert numero_key("Art. 87 bis 10") == "87 bis 10"
+    assert numero_key("Art. 18 ter") == "18 ter"
+    assert numero_key("Art. 423-1") == "423-1"
+    assert numero_key("Art. 423") == "423"
+    assert numero_key("350") == "350"
+
+
+def test_suffix_spellings():
+    assert normalize_suffix("Sixiès") == "sexies"
+    assert normalize_suffix("Quinquiès") == "quinquies"
+    assert parse_article_query("Art. 2 Sixiès") == (["2 sexies"], True)
+    assert parse_article_query("art 87 bis-10") == (["87 bis 10"], True)
+
+
+def test_arabic_references():
+    assert parse_article_query("المادة 350 مكرر") == (["350 bis"], True)
+    assert parse_article_query("المادة ٣٥٠") == (["350"], True)
+    assert parse_article_query("المادة 87 مكرر 3") == (["87 bis 3"], True)
+
+
+def test_bare_references_and_questions():
+    assert parse_article_query("article 1er") == (["1"], True)
+    assert parse_article_query("articles 350 et 351") == (["350", "351"], True)
+    assert parse_article_query("que dit l'article 350 du code pénal ?") == (["350"], True)
+    assert parse_article_query("vol et article 350") == (["350"], False)
+    assert parse_article_query("articles 350-351") == (["350"], False)
+    assert parse_article_query("vol avec violence") == ([], False)
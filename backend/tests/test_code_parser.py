@@ -0,0 +1,71 @@
+"""
+Tests du parseur du Code Pénal : limites des articles, numérotation bis/ter/مكرر,
+texte arabe rattaché, contexte des titres
+"""
+
+import os
+
+import pytest
+
+from services.article_ref import numero_key
+from services.code_parser import parse_code_penal, parse_code_penal_file
+
+SOURCE_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "code penal alger")
+
+LINES = """LIVRE PREMIER
+TITRE I
+DES PEINES
+Article 1er - Il n'y a pas d'infraction sans loi.
+Art. 2. - La loi pénale n'est pas rétroactive,
+sauf si elle est moins rigoureuse.
+Art 87. bis 10. - Est puni quiconque finance un acte terroriste.
+Art. 16 ter - Texte du seize ter.
+Art. 423. 1 - (Abrogé).
+Articles de 322 à 323. – (Abrogés)
+Chapitre II
+PEINES ACCESSOIRES
+Art. 5. - Cinquième article.
+12 bis
+:1المادة لا جريمة إال بقانون
+:2المادة ال يسري قانون
+(10 مكرر 87المادة يعاقب
+""".splitlines()
+
+
+def _parse():
+    return {article['numero']: article for article in parse_code_penal(LINES)}
+
+
+def test_article_boundaries_and_continuation_lines():
+    articles = _parse()
+    assert list(articles) == [
+        'Art. 1', 'Art. 2', 'Art. 87 bis 10', 'Art. 16 ter', 'Art. 423-1', 'Art. 322', 'Art. 323', 'Art. 5'
+    ]
+    assert articles['Art. 1']['texte'] == "Il n'y a pas d'infraction sans loi."
+    assert articles['Art. 2']['texte'] == "La loi pénale n'est pas rétroactive, sauf si elle est moins rigoureuse."
+    assert articles['Art. 322']['texte'] == articles['Art. 323']['texte'] == "(Abrogés)"
+
+
+def test_headings_stop_the_previous_article():
+    articles = _parse()
+    assert "PEINES ACCESSOIRES" not in articles['Art. 323']['texte']
+    assert articles['Art. 323']['chapitre'] == ""
+    assert articles['Art. 5']['chapitre'] == "Chapitre II - PEINES ACCESSOIRES"
+    assert articles['Art. 5']['titre'] == "TITRE I - DES PEINES"
+    assert articles['Art. 5']['categorie'] == "PEINES ACCESSOIRES"
+
+
+def test_arabic_text_follows_the_article_number():
+    articles = _parse()
+    assert articles['Art. 1']['texte_arabe'].startswith(":1المادة")
+    assert articles['Art. 2']['texte_arabe'].startswith(":2المادة")
+    assert "مكرر" in articles['Art. 87 bis 10']['texte_arabe']  # "87 مكرر 10" is "87 bis 10"
+    assert articles['Art. 16 ter']['texte_arabe'] == ""
+
+
+@pytest.mark.skipif(not os.path.exists(SOURCE_FILE), reason="source text not available")
+def test_source_file_numbers_are_unique():
+    numeros = [article['numero'] for article in parse_code_penal_file(SOURCE_FILE)]
+    assert len(numeros) == len(set(numeros)) == 555
+    assert len({numero_key(numero) for numero in numeros}) == len(numeros)
+    assert {'Art. 1', 'Art. 350', 'Art. 350 bis', 'Art. 18 ter', 'Art. 87 bis 10', 'Art. 423-1'} <= set(numeros)
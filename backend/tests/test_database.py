@@ -0,0 +1,104 @@
+"""
+Tests de DatabaseService (ingestion incrémentale)
+"""
+
+import asyncio
+
+from services.database import DatabaseService
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def _open() -> DatabaseService:
+    db = DatabaseService()
+    await db.initialize()
+    return db
+
+
+def test_reingesting_same_articles_writes_nothing(db_path):
+    async def scenario():
+        db = await _open()
+        article = {'numero': 'Art. 9001', 'texte': "Texte d'essai.", 'categorie': 'Essai'}
+        first = await db.insert_articles_batch([article])
+        version = await db.get_corpus_version()
+        second = await db.insert_articles_batch([dict(article)])
+        unchanged_version = await db.get_corpus_version()
+        await db.close()
+        return first, second, version, unchanged_version
+
+    first, second, version, unchanged_version = run(scenario())
+    assert first == {'inserted': 1, 'updated': 0, 'unchanged': 0}
+    assert second == {'inserted': 0, 'updated': 0, 'unchanged': 1}
+    assert unchanged_version == version
+
+
+def test_only_missing_never_overwrites_existing_articles(db_path):
+    async def scenario():
+        db = await _open()
+        await db.insert_articles_batch([{'numero': 'Art. 9001', 'texte': "Texte complet issu de la source."}])
+        version = await db.get_corpus_version()
+        stats = await db.insert_articles_batch([
+            {'numero': 'Art. 9001', 'texte': "Résumé abrégé."},
+            {'numero': 'Art. 9002', 'texte': "Article absent de la source."}
+        ], only_missing=True)
+        existing = (await db.get_articles_by_numero_keys(['9001']))[0]
+        new_version = await db.get_corpus_version()
+        await db.close()
+        return stats, existing, new_version - version
+
+    stats, existing, bumps = run(scenario())
+    assert stats == {'inserted': 1, 'updated': 0, 'unchanged': 1}
+    assert existing['texte'] == "Texte complet issu de la source."
+    assert bumps == 1  # only the inserted row
+
+
+def test_fts_short_words_match_exactly(db_path):
+    async def scenario():
+        db = await _open()
+        await db.insert_articles_batch([
+            {'numero': 'Art. 9001', 'texte': "L'homicide commis volontairement est qualifié meurtre."},
+            {'numero': 'Art. 9002', 'texte': "Le vol d'une chose appartenant à autrui est puni."},
+        ])
+        vol = await db.search_fts("vol", 10)
+        both = await db.search_fts("vol appartenant autrui", 10)
+        prefix = await db.search_fts("volontaire", 10)
+        await db.close()
+        return vol, both, prefix
+
+    vol, both, prefix = run(scenario())
+    assert 'Art. 9001' not in [r['numero'] for r in vol]
+    assert 'Art. 9002' in [r['numero'] for r in vol]
+    assert both[0]['numero'] == 'Art. 9002'  # every term matched ranks first
+    assert 'Art. 9001' in [r['numero'] for r in prefix]  # longer words fall back to prefixes
+
+
+def test_fts_query_tiers():
+    assert DatabaseService._fts_queries("Quelle peine pour le vol avec violence ?") == [
+        '"peine" AND "vol" AND "violence"',
+        '"peine" OR "vol" OR "violence"',
+        '"peine"* OR "vol" OR "violence"*',
+    ]
+    assert DatabaseService._fts_queries("de la") == []
+
+
+def test_numero_keys_from_an_older_normalizer_are_recomputed(db_path):
+    async def scenario():
+        db = await _open()
+        article_id = await db.insert_article({'numero': 'Art. 423-1', 'texte': "(Abrogé).", 'categorie': 'Essai'})
+        await db.connection.execute("UPDATE articles SET numero_key = '423' WHERE id = ?", (article_id,))
+        await db.connection.execute("PRAGMA user_version = 0")  # stamped by an older release
+        await db.connection.commit()
+        version = await db.get_corpus_version()
+        await db.close()
+
+        db = await _open()
+        found = await db.get_articles_by_numero_keys(['423-1'])
+        unchanged_version = await db.get_corpus_version()
+        await db.close()
+        return article_id, found, version, unchanged_version
+
+    article_id, found, version, unchanged_version = run(scenario())
+    assert [article['id'] for article in found] == [article_id]
+    assert unchanged_version == version
@@ -0,0 +1,94 @@
+"""
+Tests du client HTTP partagé : Jina et Groq passent par la même session aiohttp
+(serveur aiohttp.web local à la place des API, via JINA_API_URL / GROQ_API_URL)
+"""
+
+import asyncio
+
+from aiohttp import web
+
+from services.embedding_provider import create_embedding_provider
+from services.http_client import HTTPClient
+from services.llm_service import GroqAPIError, GroqLLM, LLMService
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def _start_stub(peers):
+    async def embeddings(request):
+        peers.append(request.transport.get_extra_info("peername"))
+        payload = await request.json()
+        return web.json_response({
+            "data": [{"embedding": [0.5] * payload["dimensions"]} for _ in payload["input"]]
+        })
+
+    async def completions(request):
+        peers.append(request.transport.get_extra_info("peername"))
+        if (await request.json()).get("stream"):
+            return web.Response(status=503, text="capacité dépassée")
+        return web.json_response({"choices": [{"message": {"content": "réponse du stub"}}]})
+
+    app = web.Application()
+    app.router.add_post("/v1/embeddings", embeddings)
+    app.router.add_post("/openai/v1/chat/completions", completions)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+def test_jina_and_groq_share_one_session(monkeypatch):
+    async def scenario():
+        peers = []
+        runner, base_url = await _start_stub(peers)
+        monkeypatch.setenv("EMBEDDING_PROVIDER", "jina")
+        monkeypatch.setenv("JINA_API_KEY", "test")
+        monkeypatch.setenv("JINA_API_URL", f"{base_url}/v1/embeddings")
+        monkeypatch.setenv("JINA_EMBEDDING_DIMENSIONS", "32")
+        monkeypatch.setenv("EMBEDDING_CACHE_PATH", "")
+        monkeypatch.setenv("GROQ_API_KEY", "test")
+        monkeypatch.setenv("GROQ_API_URL", f"{base_url}/openai/v1/chat/completions")
+
+        http_client = HTTPClient()
+        await http_client.start()
+        embeddings = create_embedding_provider(http_client)
+        llm = LLMService(http_client=http_client)
+        await llm.initialize()
+        try:
+            assert embeddings.http_client.session is llm.llm.http_client.session
+            vector = await embeddings.get_query_embedding("vol qualifié")
+            answer = await llm.generate_response("vol qualifié", "Art. 350")
+            vector_again = await embeddings.get_embedding("escroquerie")
+        finally:
+            await http_client.close()
+            await runner.cleanup()
+        return peers, vector, answer, vector_again
+
+    peers, vector, answer, vector_again = run(scenario())
+    assert len(vector) == 32 and len(vector_again) == 32
+    assert answer == "réponse du stub"
+    # Sequential calls to both APIs reuse one pooled (keep-alive) connection
+    assert len(peers) == 3 and len(set(peers)) == 1
+
+
+def test_groq_stream_refusal_raises(monkeypatch):
+    async def scenario():
+        runner, base_url = await _start_stub([])
+        monkeypatch.setenv("GROQ_API_URL", f"{base_url}/openai/v1/chat/completions")
+        http_client = HTTPClient()
+        llm = GroqLLM(api_key="test", http_client=http_client)
+        try:
+            return [chunk async for chunk in llm.generate_stream("vol", "Art. 350")]
+        except GroqAPIError as e:
+            return e
+        finally:
+            await http_client.close()
+            await runner.cleanup()
+
+    error = run(scenario())
+    assert isinstance(error, GroqAPIError)
+    assert error.status == 503 and "capacité dépassée" in str(error)
@@ -0,0 +1,61 @@
+"""
+Tests des index vectoriels : copies indépendantes pour les mises à jour, index IVF
+"""
+
+import asyncio
+
+import numpy as np
+
+from services.vector_store import VectorStore
+
+ARTICLES = [
+    {'id': 1, 'numero': 'Art. 350', 'texte': "Quiconque soustrait frauduleusement une chose est coupable de vol."},
+    {'id': 2, 'numero': 'Art. 254', 'texte': "L'homicide commis volontairement est qualifié meurtre."},
+]
+
+
+def test_vector_copy_leaves_the_searched_store_untouched():
+    store = VectorStore()
+    store.quantization = "int8"
+    store.attach(np.eye(2, 4, dtype=np.float32), np.array([1, 2], dtype=np.int64), [dict(a) for a in ARTICLES])
+    updated = store.copy()
+    updated.upsert({'id': 3, 'numero': 'Art. 351', 'texte': "vol"}, [0.0, 0.0, 1.0, 0.0])
+    updated.upsert({'id': 1, 'numero': 'Art. 350', 'texte': "vol"}, [0.0, 0.0, 0.0, 1.0])
+
+    assert store.size == 2 and len(store.quantized.codes) == 2
+    assert store.search([1.0, 0.0, 0.0, 0.0], 1)[0][0]['id'] == 1
+    assert updated.size == 3 and len(updated.quantized.codes) == 3
+    assert updated.search([0.0, 0.0, 1.0, 0.0], 1)[0][0]['id'] == 3
+    assert updated.search([0.0, 0.0, 0.0, 1.0], 1)[0][0]['id'] == 1
+
+
+def test_ivf_rebuild_runs_on_a_copy():
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((256, 8)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    store = VectorStore()
+    store.attach(vectors, np.arange(1, 257, dtype=np.int64), [{'id': i} for i in range(1, 257)])
+
+    updated = store.copy()
+    asyncio.run(updated.build_index(None, signature="test"))
+    assert store.ann is None and updated.ann is not None
+    assert updated.search(vectors[41], 1)[0][0]['id'] == 42
+
+
+def test_ivf_save_swaps_without_touching_mapped_files(tmp_path):
+    from services.ann_index import IVFIndex
+
+    rng = np.random.default_rng(1)
+    vectors = rng.standard_normal((256, 8)).astype(np.float32)
+    ids = np.arange(1, 257, dtype=np.int64)
+    path = str(tmp_path / "index.ivf")
+
+    IVFIndex.build(vectors, ids).save(path)
+    mapped = IVFIndex.load(path)
+    before = np.array(mapped.vectors)
+
+    IVFIndex.build(vectors[::-1].copy(), ids[::-1].copy()).save(path)
+    reloaded = IVFIndex.load(path)
+    assert reloaded.meta["build"] != mapped.meta["build"]
+    assert np.array_equal(mapped.vectors, before)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["index.ivf"]
@@ -0,0 +1,137 @@
+"""
+Tests de l'API FastAPI (TestClient, boucle hors du thread principal)
+"""
+
+
+def test_startup_outside_main_thread(client):
+    response = client.get("/health")
+    assert response.status_code == 200
+    assert response.json()["rag_ready"] is True
+
+
+def test_chat_without_llm(client):
+    response = client.post("/chat", json={"question": "vol avec violence", "use_llm": False})
+    assert response.status_code == 200
+    assert response.json()["crimes"]
+
+
+def _failing_llm(monkeypatch, failing_question):
+    import main
+
+    generate_response = main.rag_service.generate_response
+
+    async def fake(question, results):
+        if question == failing_question:
+            raise RuntimeError("LLM unavailable")
+        return await generate_response(question, results)
+
+    monkeypatch.setattr(main.rag_service, "generate_response", fake)
+
+
+def test_chat_batch_reports_failed_items(client, monkeypatch):
+    _failing_llm(monkeypatch, "meurtre")
+    response = client.post("/chat/batch", json={"questions": ["vol avec violence", "meurtre"]})
+    assert response.status_code == 200
+    ok, failed = response.json()["results"]
+    assert ok["error"] is None and ok["response"]
+    assert failed["error"] == "LLM unavailable" and failed["crimes"]
+
+
+def test_chat_batch_stream_reports_failed_items(client, monkeypatch):
+    import json
+
+    _failing_llm(monkeypatch, "meurtre")
+    response = client.post("/chat/batch", json={"questions": ["vol avec violence", "meurtre"], "stream": True})
+    items = sorted((json.loads(line) for line in response.text.splitlines()), key=lambda item: item["index"])
+    assert [item["error"] for item in items] == [None, "LLM unavailable"]
+
+
+def test_chat_batch_stream_cancels_pending_answers(client, monkeypatch):
+    import asyncio
+    import main
+
+    cancelled = []
+
+    async def slow(question, results):
+        if question == "vol avec violence":
+            return "ok"
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            cancelled.append(question)
+            raise
+
+    monkeypatch.setattr(main.rag_service, "generate_response", slow)
+
+    async def read_first_line():
+        response = await main.chat_batch(main.ChatBatchRequest(
+            questions=["vol avec violence", "meurtre", "escroquerie"], stream=True
+        ))
+        lines = response.body_iterator
+        first = await lines.__anext__()
+        await lines.aclose()  # the client went away
+        await asyncio.sleep(0)
+        return first
+
+    first = client.portal.call(read_first_line)
+    assert '"index":0' in first
+    assert sorted(cancelled) == ["escroquerie", "meurtre"]
+
+
+def test_crimes_cursor_pages_cover_every_article_once(client):
+    ids, cursor = [], 0
+    while cursor is not None:
+        page = client.get("/crimes", params={"limit": 40, "cursor": cursor}).json()
+        assert len(page["crimes"]) <= 40
+        ids += [crime["id"] for crime in page["crimes"]]
+        cursor = page["next_cursor"]
+    assert ids == sorted(set(ids))
+    assert len(ids) == page["total"]
+
+
+def test_crimes_fields(client):
+    crime = client.get("/crimes", params={"limit": 1, "fields": "id,numero"}).json()["crimes"][0]
+    assert set(crime) == {"id", "numero"}
+    assert client.get("/crimes", params={"fields": "id,mot_de_passe"}).status_code == 400
+
+
+def test_crimes_etag_follows_the_corpus_version(client):
+    import main
+
+    first = client.get("/crimes", params={"limit": 5})
+    etag = first.headers["etag"]
+    assert client.get("/crimes", params={"limit": 5}, headers={"If-None-Match": etag}).status_code == 304
+
+    async def edit_article():
+        article = await main.rag_service.db.get_article(first.json()["crimes"][0]["id"])
+        await main.rag_service.db.connection.execute(
+            "UPDATE articles SET texte = ? WHERE id = ?", (article["texte"] + " ", article["id"])
+        )
+        await main.rag_service.db.connection.commit()
+
+    client.portal.call(edit_article)
+    changed = client.get("/crimes", params={"limit": 5}, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+
+
+def test_article_references_respect_filters(client):
+    filtered = client.post("/articles/search", json={"query": "article 1", "filters": {"min_prison_mois": 240}})
+    assert filtered.status_code == 200
+    assert filtered.json()["articles"] == []
+
+
+def test_chat_stream_reports_llm_errors_as_error_event(client, monkeypatch):
+    import main
+    from services.llm_service import GroqAPIError
+
+    async def refused(question, results):
+        raise GroqAPIError(503, "capacité dépassée")
+        yield  # async generator
+
+    monkeypatch.setattr(main.rag_service, "generate_response_stream", refused)
+    response = client.post("/chat/stream", json={"question": "vol avec violence"})
+    assert response.status_code == 200
+    assert "event: crimes" in response.text
+    assert "event: error" in response.text and "capacité dépassée" in response.text
+    assert "event: token" not in response.text and "event: done" not in response.text
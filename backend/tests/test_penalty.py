@@ -0,0 +1,98 @@
+"""
+Tests de l'extraction des peines (textes réels du Code Pénal)
+"""
+
+import pytest
+
+from services.penalty import extract_penalty
+
+ART_350 = (
+    "Quiconque soustrait frauduleusement une chose qui ne lui appartient pas est coupable de vol et puni "
+    "d'un emprisonnement d'un (1) an à cinq (5) ans et d'une amende de 100.000 DA à 500.000 DA."
+)
+ART_354 = (
+    "Sont punis d'un emprisonnement de cinq (5) à dix (10) ans et d'une amende de 500.000 DA à 1.000.000 de DA, "
+    "les individus coupables de vol commis avec une seule des circonstances suivantes :"
+)
+ART_353 = (
+    "Sont punis de la réclusion à temps, de dix à vingt ans, les individus coupables de vol commis avec "
+    "deux au moins des circonstances suivantes:"
+)
+ART_102 = (
+    "chacun des coupables est puni d’un emprisonnement de six mois au moins et de deux ans au plus, et de "
+    "l’interdiction du droit de voter et d’être éligible pendant un an au moins et cinq ans au plus."
+)
+ART_442 = (
+    "Sont punis d'un emprisonnement de dix (10) jours au moins à deux (2) mois au plus et d'une amende "
+    "de 8.000 DA à 16.000 DA :"
+)
+ART_451 = (
+    "Sont punis d’une amende de 100 à 500 DA et peuvent l’être, en outre, de l’emprisonnement de cinq jours au plus :"
+)
+ART_445 = (
+    "le récidiviste est puni d'un emprisonnement qui peut être porté à quatre (4) mois et d'une amende "
+    "qui peut être élevée à 40.000 DA."
+)
+ART_87_BIS_5 = (
+    "est puni d’une peine de réclusion à temps de cinq (5) à (10) ans et d’une amende de 100.000 DA à 500.000 DA."
+)
+ART_261 = (
+    "Tout coupable d’assassinat, de parricide ou d’empoisonnement, est puni de mort. Toutefois, la mère, "
+    "auteur principal ou complice de l’assassinat ou du meurtre de son enfant nouveau-né, est punie de la "
+    "réclusion à temps, de dix à vingt ans"
+)
+ART_119 = (
+    "emprisonnement de deux (2) ans à dix (10) ans lorsque la valeur est égale ou supérieure à 1.000.000 DA ; "
+    "réclusion à perpétuité lorsque la valeur est égale ou supérieure à 10.000.000 DA."
+)
+
+
+@pytest.mark.parametrize("text, prison_min, prison_max, prison_texte", [
+    (ART_350, 12, 60, "emprisonnement d'un (1) an à cinq (5) ans"),
+    (ART_354, 60, 120, "emprisonnement de cinq (5) à dix (10) ans"),
+    (ART_353, 120, 240, "réclusion à temps, de dix à vingt ans"),
+    (ART_102, 6, 24, "emprisonnement de six mois au moins et de deux ans au plus"),
+    (ART_442, 0.33, 2, "emprisonnement de dix (10) jours au moins à deux (2) mois au plus"),
+    (ART_87_BIS_5, 60, 120, "réclusion à temps de cinq (5) à (10) ans"),
+])
+def test_prison_ranges(text, prison_min, prison_max, prison_texte):
+    penalty = extract_penalty(text)
+    assert penalty['prison_min_mois'] == prison_min
+    assert penalty['prison_max_mois'] == prison_max
+    assert penalty['prison_texte'] == prison_texte
+
+
+@pytest.mark.parametrize("text, prison_max", [
+    (ART_451, 0.17),
+    (ART_445, 4),
+])
+def test_prison_upper_bound_only(text, prison_max):
+    penalty = extract_penalty(text)
+    assert penalty['prison_min_mois'] is None
+    assert penalty['prison_max_mois'] == prison_max
+
+
+def test_death_and_perpetuity():
+    assert extract_penalty(ART_261)['peine_mort'] == 1
+    penalty = extract_penalty(ART_119)
+    assert penalty['perpetuite'] == 1
+    assert penalty['prison_max_mois'] == 120
+
+
+@pytest.mark.parametrize("text, amende_min, amende_max", [
+    (ART_350, 100000, 500000),
+    (ART_354, 500000, 1000000),
+    (ART_442, 8000, 16000),
+    (ART_451, 100, 500),
+    ("d'une amende de 500 DA au moins à 3.000 DA au plus.", 500, 3000),
+    ("d'une amende, de 150.000 DA à 800.000 DA, lorsqu'elle précède", 150000, 800000),
+])
+def test_fine_ranges(text, amende_min, amende_max):
+    penalty = extract_penalty(text)
+    assert (penalty['amende_min'], penalty['amende_max']) == (amende_min, amende_max)
+
+
+def test_no_penalty():
+    penalty = extract_penalty("Il n'y a pas d'infraction, ni de peine ou de mesures de sûreté sans loi.")
+    assert penalty['prison_max_mois'] is None and penalty['amende_max'] is None
+    assert penalty['prison_texte'] == "" and penalty['perpetuite'] == 0
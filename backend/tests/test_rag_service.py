@@ -0,0 +1,210 @@
+"""
+Tests de RAGService (recherche par mots-clés, sans embeddings)
+"""
+
+import asyncio
+
+from services.embedding_provider import BaseEmbeddingProvider
+from services.llm_service import LLMService, ERROR_PREFIX
+from services.rag_service import RAGService
+from services.snapshot import build_lock
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def _search_all(queries):
+    rag = RAGService()
+    await rag.initialize()
+    try:
+        return [await rag.search(query, top_k, sort=sort) for query, top_k, sort in queries]
+    finally:
+        await rag.close()
+
+
+def test_penalty_sort_only_reorders_the_relevant_matches(db_path):
+    relevance, by_prison = run(_search_all([
+        ("vol qualifié", 5, "relevance"),
+        ("vol qualifié", 5, "prison_desc"),
+    ]))
+    assert relevance
+    assert {r['id'] for r in by_prison} == {r['id'] for r in relevance}
+    maxima = [r['penalty']['prison_max_mois'] or -1 for r in by_prison
+              if not (r['penalty']['peine_mort'] or r['penalty']['perpetuite'])]
+    assert maxima == sorted(maxima, reverse=True)
+
+
+def test_writes_from_another_process_are_picked_up(db_path):
+    from services.database import DatabaseService
+
+    async def scenario():
+        rag = RAGService()
+        await rag.initialize()
+        writer = DatabaseService()  # e.g. scripts/add_articles.py
+        await writer.initialize()
+        try:
+            assert not await rag.sync_with_database()
+            await writer.insert_article({
+                'numero': 'Art. 999 bis',
+                'texte': "Quiconque braconne un zygopetale rarissime est puni.",
+                'categorie': 'Test'
+            })
+            before = await rag.search("zygopetale", 3)
+            with build_lock(rag.snapshot_root):  # another worker is publishing the new version
+                assert not await rag.sync_with_database()
+            assert await rag.sync_with_database()
+            after = await rag.search("zygopetale", 3)
+            return before, after, rag.snapshot, await writer.get_stamp()
+        finally:
+            await writer.close()
+            await rag.close()
+
+    before, after, snapshot, stamp = run(scenario())
+    assert not before
+    assert after[0]['numero'] == 'Art. 999 bis'
+    # Served from a published (shared, mapped) snapshot version, not private indexes
+    assert snapshot is not None and snapshot.is_current(stamp)
+
+
+class _FourDimensions:
+    """Stands in for the embedding provider: only the vector size and decoding are used here"""
+    name = model = "test"
+    dimensions = 4
+    bytes_to_embedding = staticmethod(BaseEmbeddingProvider.bytes_to_embedding)
+
+    async def close(self):
+        pass
+
+
+def test_embedding_writes_are_applied_incrementally(db_path):
+    from services.database import DatabaseService
+
+    async def scenario():
+        rag = RAGService()
+        await rag.initialize()
+        rag.embedding_service = _FourDimensions()
+        writer = DatabaseService()  # e.g. scripts/backfill_embeddings.py
+        await writer.initialize()
+        fetched = []
+        get_embeddings = rag.db.get_embeddings
+
+        async def recording(article_ids):
+            fetched.append(list(article_ids))
+            return await get_embeddings(article_ids)
+
+        rag.db.get_embeddings = recording
+        try:
+            ids = [article['id'] for article in (await writer.get_all_articles())[:3]]
+            blob = BaseEmbeddingProvider.embedding_to_bytes
+            await writer.update_embeddings_batch([(ids[0], blob([1, 0, 0, 0]), "a"), (ids[1], blob([0, 1, 0, 0]), "b")])
+            empty = rag.vector_store
+            assert await rag.sync_with_database()
+            first = rag.vector_store
+
+            await writer.update_embeddings_batch([(ids[1], blob([0, 0, 1, 0]), "b2"), (ids[2], blob([0, 0, 0, 1]), "c")])
+            assert await rag.sync_with_database()
+            second = rag.vector_store
+
+            # A cleared vector cannot be patched out: full reload
+            await writer.connection.execute("UPDATE articles SET embedding = NULL WHERE id = ?", (ids[0],))
+            await writer.connection.commit()
+            assert await rag.sync_with_database()
+            return ids, fetched, empty, first, second, rag.vector_store
+        finally:
+            await writer.close()
+            await rag.close()
+
+    ids, fetched, empty, first, second, reloaded = run(scenario())
+    assert fetched == [ids[:2], ids[1:]]  # only the rows written since the last sync
+    assert empty.size == 0 and first.size == 2  # updates went to copies
+    assert second.size == 3
+    assert second.search([0, 0, 1, 0], 1)[0][0]['id'] == ids[1]
+    assert first.search([0, 1, 0, 0], 1)[0][0]['id'] == ids[1]
+    assert sorted(reloaded.ids.tolist()) == ids[1:]
+
+
+def test_article_references_follow_the_penalty_sort(db_path):
+    by_key, by_prison = run(_search_all([
+        ("articles 350 et 353", 5, None),
+        ("articles 350 et 353", 5, "prison_desc"),
+    ]))
+    assert [r['article'] for r in by_key] == ['Art. 350', 'Art. 353']
+    assert [r['article'] for r in by_prison] == ['Art. 353', 'Art. 350']
+
+
+ANSWER_RESULTS = [
+    {'id': 1, 'numero': 'Art. 350', 'categorie': 'Vols', 'texte': "Quiconque soustrait frauduleusement une chose..."},
+    {'id': 2, 'numero': 'Art. 353', 'categorie': 'Vols', 'texte': "Est puni de la réclusion le vol commis..."},
+]
+
+
+class _CountingLLM:
+    """LLM service double: counts generations, answers with an error when told to"""
+    provider = "groq"
+    model = "test-model"
+
+    def __init__(self):
+        self.calls = 0
+        self.fail = False
+
+    async def generate_response(self, question, context):
+        self.calls += 1
+        return f"{ERROR_PREFIX} (503): indisponible" if self.fail else f"réponse {self.calls}"
+
+
+def test_answer_cache_key_and_reuse(monkeypatch):
+    async def scenario():
+        rag = RAGService()
+        rag.llm_service = _CountingLLM()
+        first = await rag.generate_response("Vol  simple ?", ANSWER_RESULTS)
+        same = await rag.generate_response("vol simple ?", ANSWER_RESULTS)  # normalized question
+        reordered = await rag.generate_response("vol simple ?", ANSWER_RESULTS[::-1])
+        monkeypatch.setattr("services.rag_service.PROMPT_VERSION", "test")
+        new_prompt = await rag.generate_response("vol simple ?", ANSWER_RESULTS)
+        return first, same, reordered, new_prompt, rag.llm_service.calls
+
+    first, same, reordered, new_prompt, calls = run(scenario())
+    assert same == first
+    assert reordered != first and new_prompt not in (first, reordered)
+    assert calls == 3
+
+
+def test_answer_cache_skips_errors_and_mock_llm(monkeypatch):
+    monkeypatch.delenv("GROQ_API_KEY", raising=False)
+
+    async def scenario():
+        rag = RAGService()
+        rag.llm_service = _CountingLLM()
+        rag.llm_service.fail = True
+        await rag.generate_response("vol", ANSWER_RESULTS)
+        await rag.generate_response("vol", ANSWER_RESULTS)
+        error_calls, error_entries = rag.llm_service.calls, len(rag.answer_cache)
+
+        mock = RAGService()
+        mock.llm_service = LLMService()
+        await mock.llm_service.initialize()  # MockLLM
+        await mock.generate_response("vol", ANSWER_RESULTS)
+        return error_calls, error_entries, mock.llm_service.provider, len(mock.answer_cache)
+
+    error_calls, error_entries, provider, mock_entries = run(scenario())
+    assert error_calls == 2 and error_entries == 0
+    assert provider == "mock" and mock_entries == 0
+
+
+def test_rrf_deduplicates_and_weights_the_lists():
+    rag = RAGService()
+    rag.rrf_k = 60
+    keyword = [{'id': 1, 'source': 'bm25'}, {'id': 2, 'source': 'bm25'}, {'id': 3, 'source': 'bm25'}]
+    embedding = [{'id': 3, 'source': 'vector'}, {'id': 1, 'source': 'vector'}]
+
+    equal = rag._fuse_results([(keyword, 1.0), (embedding, 1.0)], 5)
+    assert [r['id'] for r in equal] == [1, 3, 2]  # 1/61 + 1/62 > 1/63 + 1/61
+    assert [r['source'] for r in equal] == ['bm25'] * 3  # first list's copy kept once
+    assert equal[0]['score'] == round((1 / 61 + 1 / 62) / (2 / 61), 4)
+
+    favour_embedding = rag._fuse_results([(keyword, 1.0), (embedding, 3.0)], 2)
+    assert [r['id'] for r in favour_embedding] == [3, 1]
+
+    only_keyword = rag._fuse_results([(keyword, 1.0), ([], 1.0)], 5)
+    assert only_keyword[0]['score'] == 1.0  # normalized over the non-empty lists
@@ -0,0 +1,72 @@
+"""
+Tests de SingleFlight : appels identiques simultanés fusionnés en une seule tâche
+"""
+
+import asyncio
+
+from services.singleflight import SingleFlight
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_concurrent_identical_calls_share_one_task():
+    async def scenario():
+        flights = SingleFlight()
+        started = []
+
+        async def work():
+            started.append(1)
+            await asyncio.sleep(0.01)
+            return "résultat"
+
+        results = await asyncio.gather(*[flights.do("key", work) for _ in range(5)])
+        other = await flights.do("other", work)
+        return results, other, started, flights.stats()
+
+    results, other, started, stats = run(scenario())
+    assert results == ["résultat"] * 5 and other == "résultat"
+    assert len(started) == 2
+    assert stats == {"calls": 6, "shared": 4, "in_flight": 0}
+
+
+def test_cancelled_waiter_does_not_cancel_the_shared_work():
+    async def scenario():
+        flights = SingleFlight()
+        release = asyncio.Event()
+
+        async def work():
+            await release.wait()
+            return 42
+
+        first = asyncio.create_task(flights.do("key", work))
+        second = asyncio.create_task(flights.do("key", work))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        return first, await second
+
+    first, result = run(scenario())
+    assert first.cancelled()
+    assert result == 42
+
+
+def test_errors_reach_every_waiter_and_are_not_kept():
+    async def scenario():
+        flights = SingleFlight()
+        calls = []
+
+        async def failing():
+            calls.append(1)
+            await asyncio.sleep(0)
+            raise RuntimeError("API indisponible")
+
+        outcomes = await asyncio.gather(flights.do("key", failing), flights.do("key", failing), return_exceptions=True)
+        retry = await asyncio.gather(flights.do("key", failing), return_exceptions=True)
+        return outcomes, retry, calls
+
+    outcomes, retry, calls = run(scenario())
+    assert all(isinstance(outcome, RuntimeError) for outcome in outcomes + retry)
+    assert len(calls) == 2  # the failed flight was forgotten: the retry ran again
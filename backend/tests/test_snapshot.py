@@ -0,0 +1,28 @@
+"""
+Tests de l'instantané du corpus : reconstruction seulement si obsolète
+"""
+
+import asyncio
+import json
+import os
+
+from services.snapshot import refresh_snapshot, snapshot_path, current_version
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_startup_keeps_a_snapshot_built_for_another_model(db_path):
+    built = run(refresh_snapshot())
+    root = snapshot_path(db_path)
+    manifest_path = os.path.join(root, current_version(root), "manifest.json")
+    with open(manifest_path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    manifest["model"], manifest["dimensions"] = "jina-embeddings-v3", 1024  # image built with other keys
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+
+    assert built is not None
+    assert run(refresh_snapshot(match_model=False)) is None
+    assert run(refresh_snapshot())["version"] != built["version"]
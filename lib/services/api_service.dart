@@ -64,17 +64,25 @@ class ApiService {
     }
   }
 
-  /// Get all crimes from the database
+  /// Get all crimes from the database (follows the keyset pages of /crimes)
   static Future<List<dynamic>> getAllCrimes() async {
+    final crimes = <dynamic>[];
     try {
-      final response = await http.get(Uri.parse('$baseUrl/crimes'));
-      if (response.statusCode == 200) {
+      int? cursor = 0;
+      while (cursor != null) {
+        final response = await http.get(
+          Uri.parse('$baseUrl/crimes?limit=200&cursor=$cursor'),
+        );
+        if (response.statusCode != 200) {
+          break;
+        }
         final data = jsonDecode(response.body);
-        return data['crimes'];
+        crimes.addAll(data['crimes']);
+        cursor = data['next_cursor'];
       }
-      return [];
+      return crimes;
     } catch (e) {
-      return [];
+      return crimes;
     }
   }
 }